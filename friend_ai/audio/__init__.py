@@ -1,3 +1,5 @@
-from .playback import AudioPlayer
+from .echo import EchoGate
+from .playback import AudioPlayer, NullAudioPlayer
+from .ringbuffer import FrameRingBuffer
 
-__all__ = ["AudioPlayer"]
\ No newline at end of file
+__all__ = ["AudioPlayer", "EchoGate", "FrameRingBuffer", "NullAudioPlayer"]
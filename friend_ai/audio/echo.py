@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import time
+from typing import Optional
+
+import numpy as np
+
+
+class EchoGate:
+    """Tells the user's voice apart from our own TTS coming back through the mic.
+
+    AudioPlayer pushes the energy of every block it hands to the device,
+    stamped with when it should be heard. For each microphone frame the gate
+    looks up the loudest reference block within the echo tail before it and
+    predicts the echo energy as `erl * reference`. The frame counts as user
+    speech only if it is `margin_db` louder than that prediction. Frames that
+    look like pure echo update `erl` (the echo return loss), so the gate
+    follows the speaker volume and room. With no recent playback every frame
+    passes, leaving the decision to VAD.
+
+    This is energy gating, not cancellation: it is cheap enough to run per
+    VAD frame in Python and is all barge-in needs. Double-talk where the user
+    is quieter than the predicted echo is missed until playback pauses.
+    """
+
+    def __init__(
+        self,
+        tail_ms: float = 250.0,
+        margin_db: float = 6.0,
+        initial_erl: float = 1.0,
+        adapt_rate: float = 0.05,
+        floor: float = 1e-6,
+        history: int = 1024,
+    ):
+        self.tail_s = tail_ms / 1000.0
+        self.margin = 10.0 ** (margin_db / 10.0)
+        self.erl = initial_erl
+        self.adapt_rate = adapt_rate
+        self.floor = floor
+        # Preallocated ring of (audible-at time, block end, mean energy); one
+        # writer (the output callback), readers only look.
+        self._t0 = np.full(history, -np.inf)
+        self._t1 = np.full(history, -np.inf)
+        self._energy = np.zeros(history)
+        self._n = 0
+
+    def push_reference(self, block: np.ndarray, sample_rate: int, latency_s: float = 0.0) -> None:
+        """Called from the output callback with the samples just written."""
+        if not len(block):
+            return
+        start = time.perf_counter() + latency_s
+        idx = self._n % len(self._energy)
+        self._energy[idx] = float(np.dot(block, block)) / len(block)
+        self._t0[idx] = start
+        self._t1[idx] = start + len(block) / float(sample_rate)
+        self._n += 1
+
+    def reference_energy(self, t_start: float, t_end: float) -> float:
+        """Loudest playback that could be echoing in the mic between t_start and t_end."""
+        mask = (self._t0 <= t_end) & (self._t1 >= t_start - self.tail_s)
+        return float(self._energy[mask].max()) if mask.any() else 0.0
+
+    def playing(self, now: Optional[float] = None) -> bool:
+        now = time.perf_counter() if now is None else now
+        return self.reference_energy(now - 0.05, now) > self.floor
+
+    def is_user_speech(self, frame: np.ndarray, sample_rate: int, t_end: Optional[float] = None) -> bool:
+        """`frame` is int16 mic audio that ended at perf_counter() time `t_end`."""
+        t_end = time.perf_counter() if t_end is None else t_end
+        t_start = t_end - len(frame) / float(sample_rate)
+        ref = self.reference_energy(t_start, t_end)
+        if ref <= self.floor:
+            return True
+        x = frame.astype(np.float32) / 32768.0
+        mic = float(np.dot(x, x)) / max(1, len(x))
+        if mic > self.erl * ref * self.margin:
+            return True
+        self.erl += self.adapt_rate * (mic / ref - self.erl)
+        return False
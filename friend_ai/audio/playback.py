@@ -1,46 +1,237 @@
 from __future__ import annotations
 
 import threading
-from typing import Optional
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, Callable, Deque, List, Optional, Tuple
 
 import numpy as np
-import sounddevice as sd
+
+from friend_ai import tracing
+
+from .echo import EchoGate
+from .ringbuffer import FrameRingBuffer
+
+if TYPE_CHECKING:
+    import sounddevice as sd
+
+# (audio, sample_rate, on_start, trace turn id)
+_Chunk = Tuple[np.ndarray, int, Optional[Callable[[], None]], Optional[int]]
+
+
+def _resample(audio: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
+    if src_rate == dst_rate or not len(audio):
+        return audio
+    n_out = int(round(len(audio) * dst_rate / src_rate))
+    return np.interp(np.linspace(0, len(audio) - 1, n_out), np.arange(len(audio)), audio).astype(np.float32)
 
 
 class AudioPlayer:
-    def __init__(self):
-        self._stop_event = threading.Event()
-        self._thread: Optional[threading.Thread] = None
+    """One output stream, opened on first use and kept open for the session.
+
+    The device callback pulls from a preallocated FrameRingBuffer. enqueue()
+    never blocks: chunks wait in a deque and a feeder thread copies them into
+    the ring as the callback frees space. stop() does not touch the device or
+    join anything; it asks the callback to fade out over its very next block
+    and drop what is buffered, so silence starts within one block (~10 ms).
+    Chunks at another sample rate are resampled to the stream's rate.
+    """
+
+    def __init__(self, blocksize: int = 256, buffer_s: float = 10.0, fade_ms: float = 8.0, poll_s: float = 0.005):
+        self.blocksize = blocksize
+        self.buffer_s = buffer_s
+        self.fade_ms = fade_ms
+        self.poll_s = poll_s
+        self.sample_rate: Optional[int] = None
+        self.underruns = 0
         self._stream: Optional[sd.OutputStream] = None
+        self._ring: Optional[FrameRingBuffer] = None
+        self._pending: Deque[List[Any]] = deque()  # [audio, offset, on_start, turn_id]
+        # (stream position of a chunk's first sample, on_start, turn_id)
+        self._markers: Deque[Tuple[int, Optional[Callable[[], None]], Optional[int]]] = deque()
+        self._flush_to: Optional[int] = None  # set by stop(), consumed by the callback
+        self._fade_len = 0
+        self._lock = threading.Lock()  # feeder vs. stop(); never taken by the callback
+        self._open_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._feeder: Optional[threading.Thread] = None
+        self._latency_s = 0.0
+        # Gets every block written to the device (echo reference for barge-in).
+        self.reference: Optional[EchoGate] = None
+
+    @property
+    def busy(self) -> bool:
+        """True while audio is queued or still in the ring."""
+        return bool(self._pending) or (self._ring is not None and self._ring.available() > 0)
 
     def play(self, audio: np.ndarray, sample_rate: int) -> None:
         self.stop()
-        self._stop_event.clear()
-
-        def run():
-            with sd.OutputStream(samplerate=sample_rate, channels=1, dtype="float32") as stream:
-                self._stream = stream
-                idx = 0
-                block = 1024
-                while not self._stop_event.is_set() and idx < len(audio):
-                    chunk = audio[idx : idx + block]
-                    if chunk.ndim == 1:
-                        stream.write(chunk.reshape(-1, 1))
-                    else:
-                        stream.write(chunk)
-                    idx += block
-
-        self._thread = threading.Thread(target=run, daemon=True)
+        self.enqueue(audio, sample_rate)
+
+    def enqueue(self, audio: np.ndarray, sample_rate: int, on_start: Optional[Callable[[], None]] = None) -> None:
+        """Queue audio behind whatever is already playing.
+
+        `on_start` is called from the feeder thread once the first sample of
+        this chunk has been handed to the device.
+        """
+        self._ensure_open(sample_rate)
+        audio = np.asarray(audio, dtype=np.float32)
+        if audio.ndim > 1:
+            audio = audio.mean(axis=1)
+        audio = _resample(audio, sample_rate, self.sample_rate)
+        if not len(audio):
+            return
+        with self._lock:
+            self._pending.append([audio, 0, on_start, tracing.get_tracer().current_turn()])
+
+    def _ensure_open(self, sample_rate: int) -> None:
+        if self._stream is not None:
+            return
+        with self._open_lock:
+            if self._stream is not None:
+                return
+            import sounddevice as sd
+
+            n_frames = max(2, int(self.buffer_s * sample_rate) // self.blocksize)
+            self._ring = FrameRingBuffer(self.blocksize, n_frames=n_frames, dtype=np.float32)
+            self._fade_len = max(1, int(sample_rate * self.fade_ms / 1000.0))
+            self.sample_rate = sample_rate
+            self._closed.clear()
+            self._feeder = threading.Thread(target=self._feed_loop, name="audio-feeder", daemon=True)
+            self._feeder.start()
+            stream = sd.OutputStream(
+                samplerate=sample_rate,
+                channels=1,
+                dtype="float32",
+                blocksize=self.blocksize,
+                latency="low",
+                callback=self._callback,
+            )
+            stream.start()
+            self._latency_s = float(stream.latency)
+            self._stream = stream
+
+    def _feed_loop(self) -> None:
+        ring = self._ring
+        assert ring is not None
+        while not self._closed.wait(self.poll_s):
+            with self._lock:
+                while self._pending:
+                    item = self._pending[0]
+                    audio, offset = item[0], item[1]
+                    n = min(len(audio) - offset, ring.free())
+                    if n <= 0 and offset < len(audio):
+                        break
+                    if offset == 0:
+                        self._markers.append((ring.write_pos, item[2], item[3]))
+                    ring.write(audio[offset : offset + n])
+                    item[1] = offset + n
+                    if item[1] >= len(audio):
+                        self._pending.popleft()
+                started = []
+                while self._markers and self._markers[0][0] < ring.read_pos:
+                    started.append(self._markers.popleft())
+            for _, on_start, turn_id in started:
+                tracing.mark("playback.chunk", turn_id)
+                if on_start is not None:
+                    on_start()
+
+    def _callback(self, outdata, frames, time_info, status) -> None:
+        ring = self._ring
+        out = outdata[:, 0]
+        n = ring.read_into(out)
+        flush_to = self._flush_to
+        if flush_to is not None:
+            self._flush_to = None
+            fade = min(n, self._fade_len)
+            out[:fade] *= np.linspace(1.0, 0.0, fade, dtype=np.float32)
+            out[fade:] = 0.0
+            ring.skip_to(flush_to)
+        elif n < frames:
+            out[n:] = 0.0
+            if self._pending:
+                self.underruns += 1
+        if self.reference is not None:
+            self.reference.push_reference(out, self.sample_rate, self._latency_s)
+
+    def stop(self) -> None:
+        """Barge-in: fade out and drop everything queued. Returns immediately."""
+        with self._lock:
+            self._pending.clear()
+            self._markers.clear()
+            if self._ring is not None and self._ring.available() > 0:
+                self._flush_to = self._ring.write_pos
+
+    def close(self) -> None:
+        self.stop()
+        self._closed.set()
+        stream, self._stream = self._stream, None
+        if stream is not None:
+            try:
+                stream.stop()
+                stream.close()
+            except Exception:
+                pass
+
+
+class NullAudioPlayer:
+    """AudioPlayer stand-in for headless runs: keeps the same queueing and
+    timing (each chunk "plays" for its real duration) but never opens a device.
+
+    Taking a chunk and marking it playing happen under one lock, so `busy`
+    never reads False while a chunk is in flight. stop() bumps a generation
+    number; a chunk taken before it ends early however the two interleave.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._chunks: Deque[_Chunk] = deque()
+        self._playing = False
+        self._generation = 0  # bumped by stop()
+        self.queued_s = 0.0
+        self.played_s = 0.0
+        self._thread = threading.Thread(target=self._run, daemon=True)
         self._thread.start()
 
-    def stop(self):
-        if self._thread and self._thread.is_alive():
-            self._stop_event.set()
-            if self._stream:
-                try:
-                    self._stream.abort()
-                except Exception:
-                    pass
-            self._thread.join(timeout=1.0)
-        self._thread = None
-        self._stream = None
\ No newline at end of file
+    @property
+    def busy(self) -> bool:
+        with self._cond:
+            return self._playing or bool(self._chunks)
+
+    def play(self, audio: np.ndarray, sample_rate: int) -> None:
+        self.stop()
+        self.enqueue(audio, sample_rate)
+
+    def enqueue(self, audio: np.ndarray, sample_rate: int, on_start: Optional[Callable[[], None]] = None) -> None:
+        with self._cond:
+            self.queued_s += len(audio) / float(sample_rate)
+            self._chunks.append((audio, sample_rate, on_start, tracing.get_tracer().current_turn()))
+            self._cond.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._chunks:
+                    self._cond.wait()
+                audio, sr, on_start, turn_id = self._chunks.popleft()
+                self._playing = True
+                generation = self._generation
+            if on_start is not None:
+                on_start()
+            t0 = time.perf_counter()
+            duration = len(audio) / float(sr)
+            with self._cond:
+                # Returns early on stop(), like aborting the real stream.
+                self._cond.wait_for(lambda: self._generation != generation, timeout=duration)
+                self.played_s += min(duration, time.perf_counter() - t0)
+                self._playing = False
+            tracing.get_tracer().record("playback.chunk", t0, time.perf_counter(), turn_id, samples=len(audio))
+
+    def close(self) -> None:
+        self.stop()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._chunks.clear()
+            self._generation += 1
+            self._cond.notify_all()
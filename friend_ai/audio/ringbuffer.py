@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import threading
+from typing import List
+
+import numpy as np
+
+
+class FrameRingBuffer:
+    """Preallocated single-producer/single-consumer sample ring.
+
+    The producer (an audio callback) calls `write`; the consumer calls
+    `peek_frames` to get read-only views of whole frames and `advance` once it
+    is done with them. The only copy is the one from the driver buffer into
+    the ring. The indices need no lock: each has a single writer and CPython
+    makes the int stores atomic. The only lock is the one inside the Event
+    that wakes a blocked `wait`; `write` takes it only when the event is not
+    already set, i.e. once after the consumer has drained the ring, and the
+    consumer holds it just long enough to flip the flag. When the consumer
+    falls behind, incoming samples are dropped and counted instead of
+    blocking the callback.
+    """
+
+    def __init__(self, frame_samples: int, n_frames: int = 256, dtype=np.int16):
+        self.frame_samples = frame_samples
+        self.capacity = frame_samples * n_frames
+        self._buf = np.zeros(self.capacity, dtype=dtype)
+        self._ro = self._buf.view()
+        self._ro.flags.writeable = False
+        self._written = 0  # total samples ever written; only the producer stores this
+        self._read = 0  # total samples ever consumed; only the consumer stores this
+        self.overruns = 0
+        self.dropped_samples = 0
+        self._ready = threading.Event()
+
+    def write(self, samples: np.ndarray) -> int:
+        n = len(samples)
+        free = self.capacity - (self._written - self._read)
+        if n > free:
+            self.overruns += 1
+            self.dropped_samples += n - free
+            n = free
+        if n <= 0:
+            return 0
+        start = self._written % self.capacity
+        first = min(n, self.capacity - start)
+        self._buf[start : start + first] = samples[:first]
+        if first < n:
+            self._buf[: n - first] = samples[first:n]
+        self._written += n
+        if not self._ready.is_set():  # lock-free check; set() takes the Event's lock
+            self._ready.set()
+        return n
+
+    def available(self) -> int:
+        return self._written - self._read
+
+    def free(self) -> int:
+        return self.capacity - (self._written - self._read)
+
+    @property
+    def write_pos(self) -> int:
+        """Total samples ever written (a position in the stream, not in the buffer)."""
+        return self._written
+
+    @property
+    def read_pos(self) -> int:
+        return self._read
+
+    def wait(self, timeout: float) -> bool:
+        if self.available() >= self.frame_samples:
+            return True
+        self._ready.clear()
+        if self.available() >= self.frame_samples:
+            return True
+        return self._ready.wait(timeout) and self.available() >= self.frame_samples
+
+    def peek_frames(self, max_frames: int = 32) -> List[np.ndarray]:
+        n = min(max_frames, self.available() // self.frame_samples)
+        frames: List[np.ndarray] = []
+        pos = self._read % self.capacity
+        for _ in range(n):
+            # capacity is a whole number of frames, so a frame never wraps
+            frames.append(self._ro[pos : pos + self.frame_samples])
+            pos = (pos + self.frame_samples) % self.capacity
+        return frames
+
+    def peek_block(self, max_frames: int = 32) -> np.ndarray:
+        """Whole frames as one read-only (n, frame_samples) view for batch
+        processing. Stops at the wrap point; the next call returns the rest."""
+        pos = self._read % self.capacity
+        n = min(max_frames, self.available() // self.frame_samples, (self.capacity - pos) // self.frame_samples)
+        return self._ro[pos : pos + n * self.frame_samples].reshape(n, self.frame_samples)
+
+    def advance(self, n_frames: int) -> None:
+        self._read += n_frames * self.frame_samples
+
+    def read_into(self, out: np.ndarray) -> int:
+        """Consumer side for arbitrary block sizes (e.g. an output device callback):
+        copies up to len(out) samples and consumes them."""
+        n = min(len(out), self.available())
+        start = self._read % self.capacity
+        first = min(n, self.capacity - start)
+        out[:first] = self._buf[start : start + first]
+        if first < n:
+            out[first:n] = self._buf[: n - first]
+        self._read += n
+        return n
+
+    def skip_to(self, pos: int) -> None:
+        """Drops everything before stream position `pos`."""
+        self._read = max(self._read, min(pos, self._written))
+
+    def clear(self) -> None:
+        self._read = self._written
@@ -0,0 +1,4 @@
+from .replay import ReplayReport, ReplaySession, run_replay
+from .stubs import HashEmbedder, StubLLM, StubTTS, StubWhisper
+
+__all__ = ["ReplayReport", "ReplaySession", "run_replay", "HashEmbedder", "StubLLM", "StubTTS", "StubWhisper"]
@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import dataclasses
+import os
+import resource
+import tempfile
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from friend_ai import components, tracing
+from friend_ai.audio import NullAudioPlayer
+from friend_ai.config import Config, ConfigLoader
+from friend_ai.memory.embeddings import CachedEmbedder
+from friend_ai.realtime import CallSession
+from friend_ai.server import ModelClient, RemoteWhisper
+
+from .stubs import HashEmbedder, StubLLM, StubTTS, StubWhisper
+
+STUBBABLE = ("stt", "memory", "llm", "tts")
+
+
+def load_wav(path: str, sample_rate: int = 16000) -> np.ndarray:
+    """Mono int16 at `sample_rate`, the format the microphone stream delivers."""
+    import soundfile as sf
+
+    audio, sr = sf.read(path, dtype="float32", always_2d=True)
+    audio = audio.mean(axis=1)
+    if sr != sample_rate and len(audio):
+        n_out = int(round(len(audio) * sample_rate / sr))
+        audio = np.interp(np.linspace(0, len(audio) - 1, n_out), np.arange(len(audio)), audio)
+    return (np.clip(audio, -1.0, 1.0) * 32767.0).astype(np.int16)
+
+
+def transcript_for(path: str) -> str:
+    """Sidecar `<name>.txt` next to the WAV, else the file name itself."""
+    txt = os.path.splitext(path)[0] + ".txt"
+    if os.path.exists(txt):
+        with open(txt, "r", encoding="utf-8") as f:
+            return f.read().strip()
+    return os.path.splitext(os.path.basename(path))[0].replace("_", " ").replace("-", " ")
+
+
+class ReplaySession(CallSession):
+    """CallSession fed from WAV files instead of the microphone, playing into a
+    NullAudioPlayer. Memories go to a throwaway directory, never the real store,
+    unless models come from a daemon (`remote`): then they go to its store, in
+    the `session` namespace."""
+
+    def __init__(
+        self,
+        cfg: Optional[Config] = None,
+        stubs: Iterable[str] = (),
+        data_dir: Optional[str] = None,
+        remote: Optional[ModelClient] = None,
+        session: Optional[str] = None,
+    ):
+        cfg = cfg if cfg is not None else ConfigLoader.load()
+        self._tmp = tempfile.TemporaryDirectory(prefix="friend_ai_replay_") if data_dir is None else None
+        db_dir = data_dir or self._tmp.name
+        self.stubs = set(stubs)
+        cfg = dataclasses.replace(cfg, app=dataclasses.replace(cfg.app, db_dir=db_dir))
+        if "tts" in self.stubs:
+            # Keep the stub's silent clips out of the real TTS audio cache.
+            cfg = dataclasses.replace(cfg, app=dataclasses.replace(cfg.app, cache_dir=os.path.join(db_dir, "cache")))
+        if "memory" in self.stubs:
+            cfg = dataclasses.replace(cfg, memory=dataclasses.replace(cfg.memory, backend="numpy"))
+        self.stub_whisper = StubWhisper() if "stt" in self.stubs else None
+        super().__init__(remote=remote, cfg=cfg, session=session)
+        self.player = NullAudioPlayer()
+
+    def _build_transcriber(self):
+        if self.stub_whisper is not None:
+            whisper = self.stub_whisper
+        elif self.remote is not None:
+            whisper = RemoteWhisper(self.remote)
+        else:
+            whisper = components.build_whisper(self.cfg)
+        return components.build_transcriber(self.cfg, whisper=whisper)
+
+    def _build_memory(self):
+        if "memory" not in self.stubs:
+            return super()._build_memory()
+        store = components.build_memory_store(self.cfg)
+        store.embedder = CachedEmbedder(HashEmbedder(), "stub-hash", max_entries=self.cfg.memory.embedding_cache_size)
+        return store, components.build_memory_writer(self.cfg, store)
+
+    def _build_llm(self):
+        return StubLLM() if "llm" in self.stubs else super()._build_llm()
+
+    def _build_tts(self):
+        return StubTTS() if "tts" in self.stubs else super()._build_tts()
+
+    def stop(self):
+        super().stop()
+        if self._tmp is not None:
+            self._tmp.cleanup()
+
+
+class _Feeder(threading.Thread):
+    """Paces queued audio into the transcriber in real time (scaled by `speed`),
+    and silence whenever nothing is queued, like an open microphone."""
+
+    def __init__(self, session: ReplaySession, speed: float = 1.0):
+        super().__init__(daemon=True)
+        self.transcriber = session.transcriber
+        self.block = self.transcriber.frame_samples
+        self.period = self.block / float(self.transcriber.sample_rate) / speed
+        self._pending: Deque[np.ndarray] = deque()
+        self._silence = np.zeros(self.block, dtype=np.int16)
+        self._stop = threading.Event()
+
+    def push(self, audio: np.ndarray) -> None:
+        for start in range(0, len(audio), self.block):
+            self._pending.append(audio[start : start + self.block])
+
+    @property
+    def draining(self) -> bool:
+        return bool(self._pending)
+
+    def run(self) -> None:
+        deadline = time.perf_counter()
+        while not self._stop.is_set():
+            block = self._pending.popleft() if self._pending else self._silence
+            self.transcriber.feed(block)
+            deadline += self.period
+            delay = deadline - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+@dataclass
+class ReplayReport:
+    files: int = 0
+    turns: int = 0
+    interrupted: int = 0
+    timeouts: int = 0
+    startup_s: Dict[str, Optional[float]] = field(default_factory=dict)
+    wall_s: float = 0.0
+    speech_s: float = 0.0
+    tts_audio_s: float = 0.0
+    stt_rtf: Optional[float] = None
+    tts_rtf: Optional[float] = None
+    cpu_s: float = 0.0
+    cpu_util: float = 0.0  # cpu seconds / wall seconds; >1 means several cores busy
+    rss_mb: float = 0.0
+    peak_rss_mb: float = 0.0
+    turn_ms: List[Dict[str, Optional[float]]] = field(default_factory=list)
+    latency: Dict[str, Any] = field(default_factory=dict)
+    stages: Dict[str, Any] = field(default_factory=dict)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return dataclasses.asdict(self)
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024.0 * 1024.0)
+
+
+def _cpu_s() -> float:
+    ru = resource.getrusage(resource.RUSAGE_SELF)
+    return ru.ru_utime + ru.ru_stime
+
+
+def _reply_finished(session: CallSession, n_before: int) -> bool:
+    if session.turns <= n_before or session.timings[-1].llm_done is None:
+        return False
+    return session.pipeline.idle() and not session.player.busy
+
+
+def run_replay(
+    session: ReplaySession,
+    wav_paths: List[str],
+    speed: float = 1.0,
+    turn_timeout_s: float = 60.0,
+) -> ReplayReport:
+    """Plays each file into the session, then waits until its reply has been
+    fully "spoken" before the next file, like a user waiting their turn."""
+    tracer = tracing.enable()
+    report = ReplayReport(files=len(wav_paths))
+    session.warmup.wait_all()
+    report.startup_s = {p.name: p.duration_s for p in session.warmup.report()}
+    cpu0, t0 = _cpu_s(), time.perf_counter()
+    session.start(open_mic=False)
+    feeder = _Feeder(session, speed=speed)
+    feeder.start()
+    try:
+        for path in wav_paths:
+            audio = load_wav(path, session.transcriber.sample_rate)
+            if session.stub_whisper is not None:
+                session.stub_whisper.expect(transcript_for(path))
+            n_before = session.turns
+            feeder.push(audio)
+            audio_s = len(audio) / float(session.transcriber.sample_rate)
+            report.speech_s += audio_s
+            deadline = time.perf_counter() + turn_timeout_s + audio_s / speed
+            while time.perf_counter() < deadline:
+                if not feeder.draining and _reply_finished(session, n_before):
+                    break
+                time.sleep(0.02)
+            else:
+                report.timeouts += 1
+    finally:
+        feeder.stop()
+        report.wall_s = time.perf_counter() - t0
+        report.cpu_s = _cpu_s() - cpu0
+        session.stop()
+
+    report.turns = session.turns
+    report.interrupted = sum(1 for t in session.timings if t.cancelled)
+    report.turn_ms = [t.as_ms() for t in session.timings]
+    report.cpu_util = report.cpu_s / report.wall_s if report.wall_s else 0.0
+    report.rss_mb = _rss_mb()
+    report.peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+    report.tts_audio_s = session.player.queued_s
+    durations = tracer.span_durations()
+    stt_s = sum(durations.get("stt.decode", [])) + sum(durations.get("stt.partial", []))
+    if report.speech_s:
+        report.stt_rtf = stt_s / report.speech_s
+    tts = session.pipeline["tts"].stats
+    if report.tts_audio_s:
+        # Time inside the TTS stage minus time blocked handing audio to playback.
+        report.tts_rtf = (tts.busy_s - tts.blocked_s) / report.tts_audio_s
+    report.latency = tracer.summary()
+    report.stages = session.pipeline.metrics()
+    return report
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import hashlib
+import time
+from typing import Iterator, List
+
+import numpy as np
+
+from friend_ai.llm import GenerationStats, Message, estimate_tokens
+from friend_ai.stt import Word
+
+# Deterministic stand-ins with configurable cost, so the pipeline around the
+# models can be benchmarked on a box without model weights or a GPU.
+
+
+class StubWhisper:
+    """Returns the transcript it was told to expect, spread over the audio."""
+
+    def __init__(self, rtf: float = 0.05, sample_rate: int = 16000):
+        self.rtf = rtf
+        self.sample_rate = sample_rate
+        self.transcript = ""
+
+    def expect(self, transcript: str) -> None:
+        self.transcript = transcript
+
+    def decode_words(self, audio: np.ndarray) -> List[Word]:
+        duration = len(audio) / float(self.sample_rate)
+        time.sleep(duration * self.rtf)
+        words = self.transcript.split()
+        if not words or duration <= 0:
+            return []
+        step = duration / len(words)
+        return [Word(start=i * step, end=(i + 1) * step, text=" " + w) for i, w in enumerate(words)]
+
+
+class StubLLM:
+    def __init__(self, prefill_s: float = 0.15, token_s: float = 0.03, reply_words: int = 40):
+        self.prefill_s = prefill_s
+        self.token_s = token_s
+        self.reply_words = reply_words
+        self.last_stats = GenerationStats()
+
+    def _reply(self, messages: List[Message]) -> List[str]:
+        last_user = next((m.content for m in reversed(messages) if m.role == "user"), "")
+        seed = last_user.split("\n", 1)[0].split() or ["okay"]
+        words = [seed[i % len(seed)] for i in range(self.reply_words)]
+        # A sentence break every eight words gives the segmenter something to cut on.
+        return [w + ("." if (i + 1) % 8 == 0 else "") + " " for i, w in enumerate(words)]
+
+    def count_tokens(self, text: str) -> int:
+        return estimate_tokens(text)
+
+    def generate(self, messages: List[Message]) -> str:
+        return "".join(self.generate_stream(messages)).strip()
+
+    def generate_stream(self, messages: List[Message]) -> Iterator[str]:
+        prompt_tokens = sum(len(m.content.split()) for m in messages)
+        n = 0
+        try:
+            time.sleep(self.prefill_s)
+            for tok in self._reply(messages):
+                time.sleep(self.token_s)
+                n += 1
+                yield tok
+        finally:
+            self.last_stats = GenerationStats(prompt_tokens=prompt_tokens, completion_tokens=n)
+
+
+class StubTTS:
+    sink = None
+
+    def __init__(self, rtf: float = 0.3, sample_rate: int = 24000, chars_per_s: float = 15.0, chunk_s: float = 0.5):
+        self.rtf = rtf
+        self.sample_rate = sample_rate
+        self.chars_per_s = chars_per_s
+        self.chunk_s = chunk_s
+
+    def warm_voice(self, speaker_ref_wav: str) -> None:
+        pass
+
+    def synthesize_stream(self, text: str, speaker_ref_wav: str, language: str = "en") -> Iterator[np.ndarray]:
+        remaining = len(text) / self.chars_per_s
+        while remaining > 0:
+            chunk_s = min(self.chunk_s, remaining)
+            time.sleep(chunk_s * self.rtf)
+            remaining -= chunk_s
+            yield np.zeros(int(chunk_s * self.sample_rate), dtype=np.float32)
+
+    def synthesize(self, text: str, speaker_ref_wav: str, language: str = "en") -> np.ndarray:
+        parts = list(self.synthesize_stream(text, speaker_ref_wav, language))
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.float32)
+
+
+class HashEmbedder:
+    """Bag-of-words feature hashing; stands in for sentence-transformers."""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def __call__(self, texts: List[str]) -> List[List[float]]:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                h = int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little")
+                out[row, h % self.dim] += 1.0 if (h >> 63) else -1.0
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        out /= np.where(norms == 0, 1.0, norms)
+        return out.tolist()
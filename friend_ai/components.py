@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import os
+from typing import Optional
+
+from friend_ai.config import Config
+
+# Builders shared by CallSession, the model daemon and the CLI scripts so every
+# entry point configures the models the same way. Imports stay inside the
+# functions to keep `import friend_ai.components` cheap.
+
+
+def build_memory_store(cfg: Config, warm: bool = False):
+    from friend_ai.memory import MemoryStore
+
+    store = MemoryStore(
+        persist_dir=cfg.app.db_dir,
+        collection_name=cfg.memory.collection_name,
+        embedding_model=cfg.memory.embedding_model,
+        embedding_cache_size=cfg.memory.embedding_cache_size,
+        backend=cfg.memory.backend,
+        vector_dtype=cfg.memory.vector_dtype,
+        fetch_k=cfg.memory.fetch_k,
+        recency_half_life_days=cfg.memory.recency_half_life_days,
+        recency_weight=cfg.memory.recency_weight,
+        mmr_lambda=cfg.memory.mmr_lambda,
+        embedding_engine=cfg.memory.embedding_engine,
+        onnx_dir=os.path.join(cfg.app.cache_dir, "onnx"),
+        embedding_max_batch=cfg.memory.embedding_max_batch,
+        embedding_batch_wait_ms=cfg.memory.embedding_batch_wait_ms,
+    )
+    if warm:
+        # Load the embedding model now rather than on the first request.
+        store.embed(["warmup"])
+    return store
+
+
+def build_consolidator(cfg: Config, store):
+    from friend_ai.memory.consolidate import Consolidator
+
+    return Consolidator(
+        store,
+        threshold=cfg.memory.dedup_threshold,
+    )
+
+
+def build_memory_writer(cfg: Config, store):
+    from friend_ai.memory import MemoryWriter
+
+    return MemoryWriter(
+        store,
+        batch_size=cfg.memory.write_batch_size,
+        max_delay_s=cfg.memory.write_max_delay_s,
+    )
+
+
+def build_llm(cfg: Config):
+    from friend_ai.llm import LocalLLM
+
+    return LocalLLM(
+        model_path=cfg.llm.model_path,
+        temperature=cfg.llm.temperature,
+        top_p=cfg.llm.top_p,
+        max_tokens=cfg.llm.max_tokens,
+        prompt_cache_mb=cfg.llm.prompt_cache_mb,
+        n_threads=cfg.llm.threads or None,
+        n_ctx=cfg.llm.n_ctx,
+    )
+
+
+def build_tts(cfg: Config, save_audio: Optional[bool] = None, warm: bool = False):
+    from friend_ai.tts import CoquiXTTS, WavSink
+
+    save = cfg.tts.save_audio if save_audio is None else save_audio
+    tts = CoquiXTTS(
+        model_name=cfg.tts.model_name,
+        device=cfg.app.device,
+        default_sample_rate=cfg.tts.sample_rate,
+        latent_cache_dir=os.path.join(cfg.app.cache_dir, "xtts_latents"),
+        sink=WavSink(cfg.app.audio_out_dir, prefix="call") if save else None,
+        threads=cfg.tts.threads,
+    )
+    if warm:
+        tts.warm_voice(cfg.tts.speaker_ref_wav)
+    return tts
+
+
+def build_tts_cache(cfg: Config, tts):
+    """Wraps any TTS engine (local, remote or stub) with the on-disk audio cache."""
+    if cfg.tts.cache_mb <= 0:
+        return tts
+    from friend_ai.tts import AudioCache, CachedTTS
+
+    cache = AudioCache(os.path.join(cfg.app.cache_dir, "tts_audio"), max_bytes=cfg.tts.cache_mb << 20)
+    return CachedTTS(tts, cache, model_name=cfg.tts.model_name, max_chars=cfg.tts.cache_max_chars)
+
+
+def build_fillers(cfg: Config, tts):
+    from friend_ai.tts import FillerClips
+
+    return FillerClips(tts, cfg.tts.fillers or [], cfg.tts.speaker_ref_wav, cfg.tts.voice_clone_language)
+
+
+def build_whisper(cfg: Config):
+    from friend_ai.stt import LocalWhisper, ProcessWhisper
+
+    if cfg.stt.process:
+        return ProcessWhisper(
+            model_size=cfg.stt.whisper_model_size,
+            threads=cfg.stt.threads,
+            cpus=cfg.stt.cpus,
+            max_seconds=cfg.stt.max_window_s + 5.0,
+        )
+    return LocalWhisper(model_size=cfg.stt.whisper_model_size, threads=cfg.stt.threads)
+
+
+def build_transcriber(cfg: Config, whisper=None, echo_gate=None, on_barge_in=None):
+    from friend_ai.stt import RealtimeTranscriber
+
+    return RealtimeTranscriber(
+        model_size=cfg.stt.whisper_model_size,
+        vad_aggressiveness=cfg.stt.vad_aggressiveness,
+        sample_rate=16000,
+        partial_interval_s=cfg.stt.partial_interval_s,
+        max_window_s=cfg.stt.max_window_s,
+        silence_ms=cfg.stt.silence_ms,
+        silence_min_ms=cfg.stt.silence_min_ms,
+        silence_max_ms=cfg.stt.silence_max_ms,
+        adaptive_endpoint=cfg.stt.adaptive_endpoint,
+        preroll_ms=cfg.stt.preroll_ms,
+        whisper=whisper,
+        echo_gate=echo_gate,
+        on_barge_in=on_barge_in,
+        barge_in_frames=cfg.pipeline.barge_in_frames,
+    )
+
+
+def build_echo_gate(cfg: Config):
+    from friend_ai.audio import EchoGate
+
+    return EchoGate(tail_ms=cfg.pipeline.echo_tail_ms, margin_db=cfg.pipeline.echo_margin_db)
@@ -1,7 +1,7 @@
 import os
 import yaml
 from dataclasses import dataclass
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
 
 DEFAULT_CONFIG_PATH = os.path.join("/workspace", "config.yaml")
@@ -13,6 +13,8 @@ class AppConfig:
     audio_out_dir: str
     db_dir: str
     device: str
+    cache_dir: str = "data/cache"
+    socket_path: str = "data/friend_ai.sock"
 
 
 @dataclass
@@ -20,12 +22,38 @@ class MemoryConfig:
     embedding_model: str
     collection_name: str
     top_k_default: int
+    write_batch_size: int = 32
+    write_max_delay_s: float = 0.25
+    embedding_cache_size: int = 4096
+    backend: str = "chroma"  # chroma | numpy
+    vector_dtype: str = "float32"  # numpy backend only: float32 | float16
+    fetch_k: int = 20
+    recency_half_life_days: float = 30.0
+    recency_weight: float = 0.0
+    mmr_lambda: float = 1.0
+    dedup_threshold: float = 0.92  # cosine similarity at which utterances are merged by consolidation
+    consolidate_interval_h: float = 0.0  # model daemon: consolidate this often while idle; 0 = only on demand
+    embedding_engine: str = "torch"  # torch | onnx (int8, no torch at runtime) | onnx-fp32
+    embedding_max_batch: int = 64  # concurrent embed calls are coalesced up to this many texts; 0 disables
+    embedding_batch_wait_ms: float = 0.0  # how long a batch waits for more callers; 0 = only what is already queued
 
 
 @dataclass
 class STTConfig:
     whisper_model_size: str
     vad_aggressiveness: int
+    partial_interval_s: float = 1.0  # 0 disables partial hypotheses
+    max_window_s: float = 15.0
+    silence_ms: float = 700.0  # end-of-utterance silence before any pauses have been observed
+    silence_min_ms: float = 300.0
+    silence_max_ms: float = 1000.0
+    adaptive_endpoint: bool = True  # follow the speaker's own pause length within [min, max]
+    preroll_ms: float = 300.0  # audio kept from before VAD fires, so word onsets are not clipped
+    process: bool = False  # decode in a worker process (audio via shared memory), off the GIL
+    threads: int = 0  # 0 = library default
+    cpus: Optional[List[int]] = None  # pin the worker process to these cores (process mode only)
+    batch_max: int = 8  # model daemon: concurrent decodes from different sessions share one Whisper call
+    batch_wait_ms: float = 0.0  # how long a batch waits for more sessions; 0 = only what is already queued
 
 
 @dataclass
@@ -35,6 +63,12 @@ class TTSConfig:
     speaker_ref_wav: str
     sample_rate: int
     voice_clone_language: str
+    save_audio: bool = False
+    threads: int = 0  # torch intra-op threads; 0 = library default
+    cache_mb: int = 64  # on-disk cache of synthesized short replies; 0 disables
+    cache_max_chars: int = 160  # only texts up to this length are cached
+    fillers: Optional[List[str]] = None  # backchannel clips played while a reply is late
+    filler_after_ms: float = 0.0  # play one if no reply audio this long after the transcript; 0 disables
 
 
 @dataclass
@@ -44,6 +78,23 @@ class LLMConfig:
     temperature: float
     top_p: float
     max_tokens: int
+    prompt_cache_mb: int = 256
+    history_turns: int = 12
+    threads: int = 0  # llama.cpp threads; 0 = library default
+    n_ctx: int = 4096
+    memory_share: float = 0.25  # at most this share of the prompt budget goes to retrieved memories
+    summarize: bool = True  # compact turns that leave the window into a rolling summary
+    summary_max_tokens: int = 160
+
+
+@dataclass
+class PipelineConfig:
+    stage_queue_size: int = 4  # pending turns / sentence segments between stages
+    audio_queue_size: int = 8  # synthesized chunks waiting for the player
+    barge_in: bool = True  # stop playback on VAD frames, before the transcript is final
+    barge_in_frames: int = 3  # consecutive 30 ms user-speech frames
+    echo_margin_db: float = 6.0  # how much louder than the predicted echo user speech must be
+    echo_tail_ms: float = 250.0
 
 
 @dataclass
@@ -53,6 +104,7 @@ class Config:
     stt: STTConfig
     tts: TTSConfig
     llm: LLMConfig
+    pipeline: PipelineConfig
 
 
 class ConfigLoader:
@@ -65,8 +117,10 @@ class ConfigLoader:
         stt = STTConfig(**raw["stt"])  
         tts = TTSConfig(**raw["tts"])  
         llm = LLMConfig(**raw["llm"])  
+        pipeline = PipelineConfig(**(raw.get("pipeline") or {}))
         # Ensure dirs exist
         os.makedirs(app.data_dir, exist_ok=True)
         os.makedirs(app.audio_out_dir, exist_ok=True)
         os.makedirs(app.db_dir, exist_ok=True)
-        return Config(app=app, memory=memory, stt=stt, tts=tts, llm=llm)
\ No newline at end of file
+        os.makedirs(app.cache_dir, exist_ok=True)
+        return Config(app=app, memory=memory, stt=stt, tts=tts, llm=llm, pipeline=pipeline)
\ No newline at end of file
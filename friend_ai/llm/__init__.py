@@ -1,3 +1,3 @@
-from .engine import LocalLLM, Message
+from .engine import GenerationStats, LocalLLM, Message, estimate_tokens
 
-__all__ = ["LocalLLM", "Message"]
\ No newline at end of file
+__all__ = ["GenerationStats", "LocalLLM", "Message", "estimate_tokens"]
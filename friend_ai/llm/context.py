@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from .engine import Message
+
+# Chat-template tokens around each message (role header, end-of-turn).
+PER_MESSAGE_TOKENS = 8
+
+
+@dataclass
+class ContextStats:
+    budget: int = 0
+    used: int = 0
+    memories: int = 0
+    memories_dropped: int = 0
+    history_turns: int = 0
+
+
+class ContextBuilder:
+    """Assembles a chat prompt that fits in n_ctx minus the reply's tokens.
+
+    Fills the budget by priority: system prompt and the new utterance first,
+    then the rolling summary, then retrieved memories (best first, at most
+    `memory_share` of the budget), then recent history. When the history no
+    longer fits (or exceeds `max_turns`), the oldest turns are cut in one
+    block down to half the history budget, at a user turn, so the prompt
+    prefix, and llama.cpp's KV cache for it, stays the same for several turns
+    instead of shifting every turn. The caller gets the number of turns cut,
+    to compact them into the summary.
+    """
+
+    def __init__(
+        self,
+        count_tokens: Callable[[str], int],
+        n_ctx: int = 4096,
+        reply_tokens: int = 512,
+        memory_share: float = 0.25,
+        max_turns: int = 0,
+        cache_size: int = 4096,
+    ):
+        self.count_tokens = count_tokens
+        self.budget = max(0, n_ctx - reply_tokens)
+        self.memory_share = memory_share
+        self.max_turns = max_turns
+        self.cache_size = cache_size
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.last = ContextStats()
+
+    def tokens(self, text: str) -> int:
+        """Tokens for one message, template overhead included. History texts
+        are counted once and then served from the cache."""
+        with self._lock:
+            n = self._counts.get(text)
+        if n is None:
+            n = self.count_tokens(text) + PER_MESSAGE_TOKENS
+            with self._lock:
+                if len(self._counts) >= self.cache_size:
+                    self._counts.clear()
+                self._counts[text] = n
+        return n
+
+    def _cut(self, history: Sequence, history_budget: int) -> int:
+        """Index of the first history turn to keep."""
+        sizes = [self.tokens(t.text) for t in history]
+        if sum(sizes) <= history_budget and (not self.max_turns or len(history) <= self.max_turns):
+            return 0
+        target_tokens = history_budget // 2
+        target_turns = self.max_turns // 2 if self.max_turns else len(history)
+        start, total = len(history), 0
+        while start > 0 and len(history) - start < target_turns and total + sizes[start - 1] <= target_tokens:
+            start -= 1
+            total += sizes[start]
+        while start < len(history) and history[start].role != "user":
+            start += 1
+        return start
+
+    def build(
+        self,
+        system: str,
+        user_text: str,
+        history: Sequence,
+        memories: Sequence[str] = (),
+        summary: str = "",
+    ) -> Tuple[List[Message], int]:
+        """`history` holds DialogueTurn-like objects (role, text) before the new
+        utterance. Returns the messages and how many leading history turns were
+        cut; those are not in the prompt."""
+        if summary:
+            system = f"{system}\n\nSummary of the conversation so far:\n{summary}"
+        remaining = self.budget - self.tokens(system) - self.tokens(user_text)
+
+        kept: List[str] = []
+        memory_budget = int(max(0, remaining) * self.memory_share)
+        header = "\n\nRelevant memories:\n"
+        # Counted like messages (cached, slightly over) so repeats cost no tokenizer call.
+        spent = self.tokens(header) if memories else 0
+        for text in memories:
+            n = self.tokens(text)
+            if spent + n > memory_budget:
+                break
+            kept.append(text)
+            spent += n
+        aug_user = user_text
+        if kept:
+            aug_user += header + "\n".join(f"- {m}" for m in kept)
+            remaining -= spent
+
+        cut = self._cut(history, max(0, remaining))
+        window = history[cut:]
+        messages = [
+            Message(role="system", content=system),
+            *[Message(role=t.role, content=t.text) for t in window],
+            Message(role="user", content=aug_user),
+        ]
+        self.last = ContextStats(
+            budget=self.budget,
+            used=self.budget - remaining + sum(self.tokens(t.text) for t in window),
+            memories=len(kept),
+            memories_dropped=len(memories) - len(kept),
+            history_turns=len(window),
+        )
+        return messages, cut
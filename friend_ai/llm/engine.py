@@ -1,16 +1,13 @@
 from __future__ import annotations
 
 import os
+import time
 from dataclasses import dataclass
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional, Sequence
 
+from friend_ai import tracing
 from friend_ai.config import ConfigLoader
 
-try:
-    from llama_cpp import Llama
-except Exception:
-    Llama = None  # type: ignore
-
 
 @dataclass
 class Message:
@@ -18,29 +15,157 @@ class Message:
     content: str
 
 
+@dataclass
+class GenerationStats:
+    prompt_tokens: int = 0
+    # Leading prompt tokens whose KV state was reused instead of prefilled:
+    # from the context left by the previous call or from a state restored
+    # from the prompt cache, whichever llama.cpp picked (the longer).
+    cached_tokens: int = 0
+    completion_tokens: int = 0
+
+    @property
+    def prefill_tokens(self) -> int:
+        return max(0, self.prompt_tokens - self.cached_tokens)
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English with Llama-style BPE vocabularies.
+    return max(1, (len(text) + 3) // 4)
+
+
+def _common_prefix_len(a, b) -> int:
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
 class LocalLLM:
-    def __init__(self, model_path: str, temperature: float = 0.6, top_p: float = 0.95, max_tokens: int = 512):
+    def __init__(
+        self,
+        model_path: str,
+        temperature: float = 0.6,
+        top_p: float = 0.95,
+        max_tokens: int = 512,
+        prompt_cache_mb: int = 0,
+        n_threads: Optional[int] = None,
+        n_ctx: int = 4096,
+    ):
         self.model_path = model_path
+        self.n_ctx = n_ctx
         self.temperature = temperature
         self.top_p = top_p
         self.max_tokens = max_tokens
         self.model: Optional[object] = None
-        if Llama is not None and os.path.exists(self.model_path):
-            self.model = Llama(model_path=self.model_path, n_ctx=4096, n_threads=None)
+        self.last_stats = GenerationStats()
+        if os.path.exists(self.model_path):
+            try:
+                from llama_cpp import Llama, LlamaRAMCache
+            except Exception:
+                return
+            self.model = Llama(model_path=self.model_path, n_ctx=n_ctx, n_threads=n_threads)
+            # llama.cpp already reuses the KV prefix of the previous call; the RAM
+            # cache additionally keeps states for prompts that diverged from it.
+            if prompt_cache_mb > 0:
+                self.model.set_cache(LlamaRAMCache(capacity_bytes=prompt_cache_mb << 20))
+
+    def count_tokens(self, text: str) -> int:
+        """Prompt tokens `text` takes with this model's tokenizer (estimated without a model)."""
+        if self.model is None:
+            return estimate_tokens(text)
+        return len(self.model.tokenize(text.encode("utf-8"), add_bos=False, special=False))  # type: ignore[union-attr]
+
+    def _evaluated_tokens(self) -> List[int]:
+        try:
+            return list(self.model.input_ids)  # type: ignore[union-attr]
+        except Exception:
+            return []
+
+    def _reusable_prefixes(self) -> List[Sequence[int]]:
+        """Token sequences whose KV state the next call can start from: the
+        current context, and each state held by the prompt cache."""
+        prefixes: List[Sequence[int]] = [self._evaluated_tokens()]
+        cache = getattr(self.model, "cache", None)
+        prefixes.extend(getattr(cache, "cache_state", {}).keys())  # LlamaRAMCache keys are token tuples
+        return prefixes
+
+    def _record_stats(self, before: List[Sequence[int]], completion_tokens: int) -> None:
+        after = self._evaluated_tokens()
+        prompt_tokens = max(0, len(after) - completion_tokens)
+        prompt = after[:prompt_tokens]
+        cached = max((_common_prefix_len(p, prompt) for p in before), default=0)
+        self.last_stats = GenerationStats(
+            prompt_tokens=prompt_tokens,
+            cached_tokens=cached,
+            completion_tokens=completion_tokens,
+        )
+
+    def _fallback_reply(self, messages: List[Message]) -> str:
+        last_user = next((m.content for m in reversed(messages) if m.role == "user"), "" )
+        return f"I heard you say: '{last_user}'. I'm not fully set up yet. Please add a local GGUF model to {self.model_path}."
 
     def generate(self, messages: List[Message]) -> str:
         if self.model is None:
             # Minimal fallback
-            last_user = next((m.content for m in reversed(messages) if m.role == "user"), "" )
-            return f"I heard you say: '{last_user}'. I'm not fully set up yet. Please add a local GGUF model to {self.model_path}."
+            return self._fallback_reply(messages)
         # llama.cpp chat completion
         formatted = [
             {"role": m.role, "content": m.content} for m in messages
         ]
-        out = self.model.create_chat_completion(
+        before = self._reusable_prefixes()
+        with tracing.span("llm.generate"):
+            out = self.model.create_chat_completion(
+                messages=formatted,
+                temperature=self.temperature,
+                top_p=self.top_p,
+                max_tokens=self.max_tokens,
+            )
+        self._record_stats(before, out.get("usage", {}).get("completion_tokens", 0))
+        return out["choices"][0]["message"]["content"].strip()
+
+    def generate_stream(self, messages: List[Message]) -> Iterator[str]:
+        if self.model is None:
+            yield self._fallback_reply(messages)
+            return
+        formatted = [
+            {"role": m.role, "content": m.content} for m in messages
+        ]
+        before = self._reusable_prefixes()
+        tracer = tracing.get_tracer()
+        t0 = time.perf_counter()
+        stream = self.model.create_chat_completion(
             messages=formatted,
             temperature=self.temperature,
             top_p=self.top_p,
             max_tokens=self.max_tokens,
+            stream=True,
         )
-        return out["choices"][0]["message"]["content"].strip()
\ No newline at end of file
+        pieces: List[str] = []
+        try:
+            for chunk in stream:
+                delta = chunk["choices"][0].get("delta", {})
+                token = delta.get("content")
+                if token:
+                    if not pieces:
+                        # Prompt evaluation ends when the first token comes out.
+                        tracer.record("llm.prefill", t0, time.perf_counter())
+                    pieces.append(token)
+                    yield token
+        finally:
+            # Also runs when the caller closes us early (barge-in): stop
+            # llama.cpp decoding and still record what was evaluated. A delta
+            # can carry several tokens (held back for stop strings or split
+            # UTF-8), so the reply is re-tokenized rather than counting deltas.
+            stream.close()
+            completion_tokens = self.count_tokens("".join(pieces)) if pieces else 0
+            self._record_stats(before, completion_tokens)
+            tracer.record(
+                "llm.generate",
+                t0,
+                time.perf_counter(),
+                prompt_tokens=self.last_stats.prompt_tokens,
+                cached_tokens=self.last_stats.cached_tokens,
+                completion_tokens=completion_tokens,
+            )
@@ -1,3 +1,14 @@
-from .store import MemoryStore, MemoryItem
+from .ingest import Ingestor, IngestReport, ingest_paths, iter_documents
+from .store import MemoryItem, MemoryNamespace, MemoryStore
+from .writer import MemoryWriter
 
-__all__ = ["MemoryStore", "MemoryItem"]
\ No newline at end of file
+__all__ = [
+    "Ingestor",
+    "IngestReport",
+    "MemoryItem",
+    "MemoryNamespace",
+    "MemoryStore",
+    "MemoryWriter",
+    "ingest_paths",
+    "iter_documents",
+]
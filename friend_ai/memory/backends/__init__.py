@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from .base import MemoryBackend
+
+
+def create_backend(name: str, persist_dir: str, collection_name: str, vector_dtype: str = "float32") -> MemoryBackend:
+    # Backends are imported lazily so choosing "numpy" never imports chromadb.
+    if name == "chroma":
+        from .chroma import ChromaBackend
+
+        return ChromaBackend(persist_dir=persist_dir, collection_name=collection_name)
+    if name == "numpy":
+        from .numpy_mmap import NumpyBackend
+
+        return NumpyBackend(persist_dir=persist_dir, collection_name=collection_name, dtype=vector_dtype)
+    raise ValueError(f"Unknown memory backend: {name!r} (expected 'chroma' or 'numpy')")
+
+
+__all__ = ["MemoryBackend", "create_backend"]
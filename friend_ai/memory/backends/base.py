@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+@dataclass
+class BackendHit:
+    id: str
+    text: str
+    metadata: Optional[Dict[str, Any]]
+    distance: float  # cosine distance, 0 = identical
+    embedding: Optional[List[float]] = None  # only filled when requested
+    score: Optional[float] = None  # set by reranking
+
+
+# Chroma-style metadata filter, e.g. {"from": "user"} or
+# {"$and": [{"from": {"$ne": "assistant"}}, {"ts": {"$gte": 1.7e9}}]}
+Where = Dict[str, Any]
+
+# ids, texts, metadatas, (n, dim) float32 embeddings
+Records = Tuple[List[str], List[str], List[Optional[Dict[str, Any]]], np.ndarray]
+
+
+class MemoryBackend:
+    """Storage/index behind MemoryStore. Embeddings are always supplied by the caller."""
+
+    name = "base"
+
+    def add(
+        self,
+        ids: Sequence[str],
+        texts: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        metadatas: Sequence[Optional[Dict[str, Any]]],
+    ) -> None:
+        """Stores the items; an item whose id is already stored replaces it."""
+        raise NotImplementedError
+
+    def query(
+        self,
+        embedding: Sequence[float],
+        top_k: int,
+        where: Optional[Where] = None,
+        include_embeddings: bool = False,
+    ) -> List[BackendHit]:
+        raise NotImplementedError
+
+    def delete(self, ids: Sequence[str]) -> None:
+        raise NotImplementedError
+
+    def count(self) -> int:
+        raise NotImplementedError
+
+    def get_all(self) -> Records:
+        """Every live item with its embedding (for offline jobs, not the hot path)."""
+        raise NotImplementedError
+
+    def compact(self) -> None:
+        """Reclaims space held by deleted items; a no-op where the index does it itself."""
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+import chromadb
+import numpy as np
+
+from .base import BackendHit, MemoryBackend, Records, Where
+
+_PAGE = 5000
+
+
+class ChromaBackend(MemoryBackend):
+    name = "chroma"
+
+    def __init__(self, persist_dir: str, collection_name: str) -> None:
+        os.makedirs(persist_dir, exist_ok=True)
+        self.client = chromadb.PersistentClient(path=persist_dir)
+        # Embeddings come from MemoryStore, so no embedding function is attached.
+        self.collection = self.client.get_or_create_collection(
+            name=collection_name,
+            embedding_function=None,
+            metadata={"hnsw:space": "cosine"},
+        )
+
+    def add(
+        self,
+        ids: Sequence[str],
+        texts: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        metadatas: Sequence[Optional[Dict[str, Any]]],
+    ) -> None:
+        # Chroma rejects an id repeated within one call; the last one wins, as in a sequence of calls.
+        keep = sorted({memory_id: i for i, memory_id in enumerate(ids)}.values())
+        self.collection.upsert(
+            documents=[texts[i] for i in keep],
+            metadatas=[metadatas[i] or {} for i in keep],
+            ids=[ids[i] for i in keep],
+            embeddings=[list(embeddings[i]) for i in keep],
+        )
+
+    def query(
+        self,
+        embedding: Sequence[float],
+        top_k: int,
+        where: Optional[Where] = None,
+        include_embeddings: bool = False,
+    ) -> List[BackendHit]:
+        include = ["documents", "metadatas", "distances"]
+        if include_embeddings:
+            include.append("embeddings")
+        results = self.collection.query(
+            query_embeddings=[list(embedding)],
+            n_results=top_k,
+            where=where or None,
+            include=include,
+        )
+        ids = results.get("ids", [[]])[0]
+        docs = results.get("documents", [[]])[0]
+        metas = results.get("metadatas", [[]])[0]
+        dists = (results.get("distances") or [[]])[0]
+        embs = (results.get("embeddings") or [[]])[0] if include_embeddings else []
+        out: List[BackendHit] = []
+        for idx, doc in enumerate(docs):
+            dist = float(dists[idx]) if idx < len(dists) else 0.0
+            emb = list(embs[idx]) if idx < len(embs) else None
+            out.append(BackendHit(id=ids[idx], text=doc, metadata=metas[idx], distance=dist, embedding=emb))
+        return out
+
+    def delete(self, ids: Sequence[str]) -> None:
+        self.collection.delete(ids=list(ids))
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def get_all(self) -> Records:
+        ids: List[str] = []
+        texts: List[str] = []
+        metas: List[Optional[Dict[str, Any]]] = []
+        vectors: List[Any] = []
+        offset = 0
+        while True:
+            page = self.collection.get(
+                include=["documents", "metadatas", "embeddings"], limit=_PAGE, offset=offset
+            )
+            if not page["ids"]:
+                break
+            ids.extend(page["ids"])
+            texts.extend(page["documents"])
+            metas.extend(page["metadatas"])
+            vectors.extend(page["embeddings"])
+            offset += len(page["ids"])
+        if not ids:
+            return ids, texts, metas, np.zeros((0, 0), dtype=np.float32)
+        return ids, texts, metas, np.asarray(vectors, dtype=np.float32)
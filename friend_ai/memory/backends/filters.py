@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+_MISSING = object()
+
+
+class MetadataColumns:
+    """Lazily built per-field column arrays over a list of metadata dicts.
+
+    Columns are cached until `invalidate` is called, so repeated filters on
+    the same fields cost one vectorized pass per query.
+    """
+
+    def __init__(self, metas: List[Optional[Dict[str, Any]]]):
+        self._metas = metas
+        self._objects: Dict[str, np.ndarray] = {}
+        self._numbers: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self._metas)
+
+    def invalidate(self) -> None:
+        self._objects.clear()
+        self._numbers.clear()
+
+    def objects(self, field: str) -> np.ndarray:
+        col = self._objects.get(field)
+        if col is None:
+            col = np.empty(len(self._metas), dtype=object)
+            col[:] = [(m or {}).get(field, _MISSING) for m in self._metas]
+            self._objects[field] = col
+        return col
+
+    def numbers(self, field: str) -> np.ndarray:
+        col = self._numbers.get(field)
+        if col is None:
+            col = np.array(
+                [
+                    v if isinstance(v, (int, float)) and not isinstance(v, bool) else np.nan
+                    for v in ((m or {}).get(field) for m in self._metas)
+                ],
+                dtype=np.float64,
+            )
+            self._numbers[field] = col
+        return col
+
+
+def where_mask(where: Dict[str, Any], columns: MetadataColumns) -> np.ndarray:
+    """Evaluate a Chroma-style `where` filter into a boolean row mask.
+
+    As in Chroma, a condition on a field never matches rows without that field.
+    """
+    n = len(columns)
+    mask = np.ones(n, dtype=bool)
+    for key, cond in where.items():
+        if key == "$and":
+            for sub in cond:
+                mask &= where_mask(sub, columns)
+        elif key == "$or":
+            any_mask = np.zeros(n, dtype=bool)
+            for sub in cond:
+                any_mask |= where_mask(sub, columns)
+            mask &= any_mask
+        else:
+            mask &= _field_mask(columns, key, cond)
+    return mask
+
+
+def _field_mask(columns: MetadataColumns, field: str, cond: Any) -> np.ndarray:
+    col = columns.objects(field)
+    mask = col != _MISSING
+    if not isinstance(cond, dict):
+        cond = {"$eq": cond}
+    for op, value in cond.items():
+        if op == "$eq":
+            mask &= col == value
+        elif op == "$ne":
+            mask &= col != value
+        elif op in ("$in", "$nin"):
+            hit = np.isin(col, np.array(list(value), dtype=object))
+            mask &= hit if op == "$in" else ~hit
+        elif op in ("$gt", "$gte", "$lt", "$lte"):
+            num = columns.numbers(field)
+            with np.errstate(invalid="ignore"):
+                if op == "$gt":
+                    mask &= num > value
+                elif op == "$gte":
+                    mask &= num >= value
+                elif op == "$lt":
+                    mask &= num < value
+                else:
+                    mask &= num <= value
+        else:
+            raise ValueError(f"Unsupported where operator: {op}")
+    return mask
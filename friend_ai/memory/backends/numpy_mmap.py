@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .base import BackendHit, MemoryBackend, Records, Where
+from .filters import MetadataColumns, where_mask
+
+_BLOCK_ROWS = 16384
+
+
+class NumpyBackend(MemoryBackend):
+    """Exact cosine search over a memory-mapped `.npy` matrix.
+
+    Layout under `<persist_dir>/<collection_name>/`:
+      vectors.npy  - (capacity, dim) unit-normalized rows, float32 or float16
+      meta.jsonl   - one {"id", "text", "metadata"} record per row, plus
+                     {"delete": id} tombstones
+
+    The sidecar is the source of truth for the row count: vectors are flushed
+    before their metadata is appended, so a crash can only leave unused rows
+    at the end of the matrix (and a partial last record, dropped on load). compact() writes both files anew and swaps
+    them in behind a marker file, which _load rolls forward after a crash.
+    """
+
+    name = "numpy"
+
+    def __init__(self, persist_dir: str, collection_name: str, dtype: str = "float32") -> None:
+        self.dir = os.path.join(persist_dir, collection_name)
+        os.makedirs(self.dir, exist_ok=True)
+        self.dtype = np.dtype(dtype)
+        self._vec_path = os.path.join(self.dir, "vectors.npy")
+        self._meta_path = os.path.join(self.dir, "meta.jsonl")
+        self._compact_marker = os.path.join(self.dir, "compact.pending")
+        self._lock = threading.RLock()
+        self._ids: List[str] = []
+        self._texts: List[str] = []
+        self._metas: List[Optional[Dict[str, Any]]] = []
+        self._row_of: Dict[str, int] = {}
+        self._alive = np.zeros(0, dtype=bool)
+        self._vectors: Optional[np.memmap] = None
+        self._columns = MetadataColumns(self._metas)
+        self._load()
+
+    def _finish_compaction(self) -> None:
+        # Both replacement files were complete when the marker was written.
+        for path in (self._vec_path, self._meta_path):
+            tmp = path + ".compact"
+            if os.path.exists(tmp):
+                os.replace(tmp, path)
+        os.remove(self._compact_marker)
+
+    def _load(self) -> None:
+        if os.path.exists(self._compact_marker):
+            self._finish_compaction()
+        deleted = set()
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path, "rb+") as f:
+                good = 0  # end of the last complete record
+                for line in f:
+                    if not line.strip():
+                        good += len(line)
+                        continue
+                    try:
+                        rec = json.loads(line) if line.endswith(b"\n") else None
+                    except ValueError:
+                        rec = None
+                    if rec is None:
+                        # A crash mid-append; its vector row is unused and gets reused.
+                        f.truncate(good)
+                        break
+                    good += len(line)
+                    if "delete" in rec:
+                        row = self._row_of.pop(rec["delete"], None)
+                        if row is not None:
+                            deleted.add(row)
+                        continue
+                    row = self._row_of.get(rec["id"])
+                    if row is not None:
+                        deleted.add(row)  # replaced by this record
+                    self._row_of[rec["id"]] = len(self._ids)
+                    self._ids.append(rec["id"])
+                    self._texts.append(rec["text"])
+                    self._metas.append(rec.get("metadata"))
+        self._alive = np.ones(len(self._ids), dtype=bool)
+        if deleted:
+            self._alive[list(deleted)] = False
+        if os.path.exists(self._vec_path):
+            self._vectors = np.load(self._vec_path, mmap_mode="r+")
+            self.dtype = self._vectors.dtype
+            if self._vectors.shape[0] < len(self._ids):
+                raise RuntimeError(f"{self._vec_path} has fewer rows than {self._meta_path}")
+
+    def _ensure_capacity(self, rows: int, dim: int) -> np.memmap:
+        vectors = self._vectors
+        if vectors is not None:
+            if vectors.shape[1] != dim:
+                raise ValueError(f"Embedding dim {dim} does not match stored dim {vectors.shape[1]}")
+            if vectors.shape[0] >= rows:
+                return vectors
+        capacity = max(rows, 1024, 2 * (vectors.shape[0] if vectors is not None else 0))
+        tmp = self._vec_path + ".tmp.npy"
+        grown = np.lib.format.open_memmap(tmp, mode="w+", dtype=self.dtype, shape=(capacity, dim))
+        n = len(self._ids)
+        if vectors is not None and n:
+            grown[:n] = vectors[:n]
+        grown.flush()
+        del grown
+        self._vectors = None
+        os.replace(tmp, self._vec_path)
+        self._vectors = np.load(self._vec_path, mmap_mode="r+")
+        return self._vectors
+
+    def add(
+        self,
+        ids: Sequence[str],
+        texts: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        metadatas: Sequence[Optional[Dict[str, Any]]],
+    ) -> None:
+        with self._lock:
+            # Last one wins for an id repeated within the call.
+            keep = sorted({memory_id: i for i, memory_id in enumerate(ids)}.values())
+            if not keep:
+                return
+            mat = np.asarray([embeddings[i] for i in keep], dtype=np.float32)
+            norms = np.linalg.norm(mat, axis=1, keepdims=True)
+            mat /= np.maximum(norms, 1e-12)
+            start = len(self._ids)
+            vectors = self._ensure_capacity(start + len(keep), mat.shape[1])
+            vectors[start : start + len(keep)] = mat
+            vectors.flush()
+            with open(self._meta_path, "a", encoding="utf-8") as f:
+                for i in keep:
+                    f.write(json.dumps({"id": ids[i], "text": texts[i], "metadata": metadatas[i]}) + "\n")
+            self._alive = np.concatenate([self._alive, np.ones(len(keep), dtype=bool)])
+            for i in keep:
+                self._append(ids[i], texts[i], metadatas[i])
+            self._columns.invalidate()
+
+    def _append(self, memory_id: str, text: str, metadata: Optional[Dict[str, Any]]) -> None:
+        # A record for an id already stored replaces it: its old row goes dead.
+        old = self._row_of.get(memory_id)
+        if old is not None and old < len(self._alive):
+            self._alive[old] = False
+        self._row_of[memory_id] = len(self._ids)
+        self._ids.append(memory_id)
+        self._texts.append(text)
+        self._metas.append(metadata)
+
+    def _scores(self, q: np.ndarray) -> np.ndarray:
+        n = len(self._ids)
+        vectors = self._vectors
+        if vectors.dtype == np.float32:
+            return np.asarray(vectors[:n] @ q, dtype=np.float32)
+        # float16 has no BLAS path; upcast block by block to bound temporaries.
+        scores = np.empty(n, dtype=np.float32)
+        for s in range(0, n, _BLOCK_ROWS):
+            e = min(n, s + _BLOCK_ROWS)
+            scores[s:e] = vectors[s:e].astype(np.float32) @ q
+        return scores
+
+    def query(
+        self,
+        embedding: Sequence[float],
+        top_k: int,
+        where: Optional[Where] = None,
+        include_embeddings: bool = False,
+    ) -> List[BackendHit]:
+        with self._lock:
+            allowed = self._alive
+            if where:
+                allowed = allowed & where_mask(where, self._columns)
+            n_allowed = int(allowed.sum())
+            if self._vectors is None or n_allowed == 0 or top_k <= 0:
+                return []
+            q = np.array(embedding, dtype=np.float32)
+            q /= max(float(np.linalg.norm(q)), 1e-12)
+            scores = self._scores(q)
+            scores[~allowed] = -np.inf
+            k = min(top_k, n_allowed)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            return [
+                BackendHit(
+                    id=self._ids[row],
+                    text=self._texts[row],
+                    metadata=self._metas[row],
+                    distance=float(1.0 - scores[row]),
+                    embedding=self._vectors[row].astype(np.float32).tolist() if include_embeddings else None,
+                )
+                for row in top
+            ]
+
+    def delete(self, ids: Sequence[str]) -> None:
+        with self._lock:
+            rows = [(memory_id, self._row_of.pop(memory_id)) for memory_id in ids if memory_id in self._row_of]
+            if not rows:
+                return
+            with open(self._meta_path, "a", encoding="utf-8") as f:
+                for memory_id, row in rows:
+                    f.write(json.dumps({"delete": memory_id}) + "\n")
+                    self._alive[row] = False
+
+    def count(self) -> int:
+        with self._lock:
+            return int(self._alive.sum())
+
+    def get_all(self) -> Records:
+        with self._lock:
+            rows = np.flatnonzero(self._alive)
+            if self._vectors is None or not len(rows):
+                return [], [], [], np.zeros((0, 0), dtype=np.float32)
+            vectors = np.asarray(self._vectors[rows], dtype=np.float32)
+            return (
+                [self._ids[r] for r in rows],
+                [self._texts[r] for r in rows],
+                [self._metas[r] for r in rows],
+                vectors,
+            )
+
+    def compact(self) -> None:
+        """Rewrites the matrix and sidecar without deleted rows and tombstones."""
+        with self._lock:
+            rows = np.flatnonzero(self._alive)
+            if len(rows) == len(self._ids) and (self._vectors is None or self._vectors.shape[0] <= max(1024, 2 * len(rows))):
+                return
+            vec_tmp = self._vec_path + ".compact"
+            meta_tmp = self._meta_path + ".compact"
+            if self._vectors is not None:
+                dim = self._vectors.shape[1]
+                out = np.lib.format.open_memmap(vec_tmp, mode="w+", dtype=self.dtype, shape=(max(len(rows), 1024), dim))
+                for s in range(0, len(rows), _BLOCK_ROWS):
+                    block = rows[s : s + _BLOCK_ROWS]
+                    out[s : s + len(block)] = self._vectors[block]
+                out.flush()
+                del out
+            with open(meta_tmp, "w", encoding="utf-8") as f:
+                for r in rows:
+                    f.write(json.dumps({"id": self._ids[r], "text": self._texts[r], "metadata": self._metas[r]}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            with open(self._compact_marker, "w"):
+                pass
+            self._vectors = None
+            self._finish_compaction()
+            self._ids, self._texts, self._metas = [], [], []
+            self._row_of = {}
+            self._columns = MetadataColumns(self._metas)
+            self._load()
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import hashlib
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from friend_ai.tracing import percentile
+
+from .embeddings import normalize_text
+
+# Backchannels that carry no fact worth recalling. An utterance is filler
+# only if it is made up entirely of these phrases ("okay thanks", "yeah, got
+# it"); their words alone never count, so "I see you" or "no, I got it" stay.
+FILLER_PHRASES = frozenset(
+    ["ok", "okay", "alright", "yeah", "yep", "hmm", "mm", "mm-hm", "mhm", "uh", "um", "uh-huh", "ah", "oh",
+     "thanks", "cool", "got it", "i see", "thank you", "thanks a lot", "all right", "sounds good"]
+)
+_MAX_PHRASE_WORDS = max(len(p.split()) for p in FILLER_PHRASES)
+# Only conversational items are merged or expired; ingested documents and
+# summaries are left alone.
+CONVERSATIONAL = ("user", "assistant")
+
+
+class _UnionFind:
+    def __init__(self, n: int):
+        self.parent = np.arange(n)
+
+    def find(self, i: int) -> int:
+        root = i
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[i] != root:
+            self.parent[i], i = root, self.parent[i]
+        return int(root)
+
+    def union(self, a: int, b: int) -> None:
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+
+def near_duplicate_clusters(vectors: np.ndarray, threshold: float, block: int = 2048) -> List[List[int]]:
+    """Groups of row indices whose cosine similarity chains reach `threshold`.
+
+    Similarities are computed block by block (block x n) so memory stays
+    bounded; pairs above the threshold are merged with union-find.
+    """
+    n = len(vectors)
+    if n < 2:
+        return []
+    unit = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    uf = _UnionFind(n)
+    for start in range(0, n, block):
+        sims = unit[start : start + block] @ unit.T
+        rows, cols = np.nonzero(sims >= threshold)
+        rows += start
+        upper = cols > rows  # each pair once, no self-pairs
+        for r, c in zip(rows[upper], cols[upper]):
+            uf.union(r, c)
+    groups: Dict[int, List[int]] = {}
+    for i in range(n):
+        groups.setdefault(uf.find(i), []).append(i)
+    return [g for g in groups.values() if len(g) > 1]
+
+
+@dataclass
+class ConsolidationReport:
+    items_before: int = 0
+    items_after: int = 0
+    expired: int = 0
+    clusters: int = 0
+    merged: int = 0  # items folded into a canonical one
+    query_p50_ms_before: Optional[float] = None
+    query_p50_ms_after: Optional[float] = None
+    elapsed_s: float = 0.0
+    dry_run: bool = False
+    examples: List[Dict[str, Any]] = field(default_factory=list)
+
+    def line(self) -> str:
+        shrink = 100.0 * (1 - self.items_after / self.items_before) if self.items_before else 0.0
+        lat = ""
+        if self.query_p50_ms_before is not None and self.query_p50_ms_after is not None:
+            lat = f", query p50 {self.query_p50_ms_before:.2f} -> {self.query_p50_ms_after:.2f} ms"
+        verb = "would go" if self.dry_run else "went"
+        return (
+            f"items {verb} {self.items_before} -> {self.items_after} ({shrink:.1f}% fewer): "
+            f"{self.expired} expired, {self.merged} merged into {self.clusters} canonical items{lat} "
+            f"[{self.elapsed_s:.1f}s]"
+        )
+
+
+class Consolidator:
+    """Offline clean-up of a MemoryStore's collection.
+
+    1. Expires conversational items with no recall value: utterances made
+       only of backchannel phrases ("ok", "yeah, got it").
+    2. Clusters near-duplicates (cosine >= `threshold`) among the remaining
+       conversational items of the same speaker and namespace, and replaces
+       each cluster with one canonical item: the member closest to the
+       cluster centroid. Its metadata records the provenance: how many items
+       it stands for, their ids, and the first and last time it was said.
+    3. Compacts the backend's index.
+
+    New canonical items are written before their members are deleted, so an
+    interruption can leave a duplicate but never lose one.
+    """
+
+    def __init__(
+        self,
+        store,
+        threshold: float = 0.92,
+        latency_queries: int = 50,
+    ):
+        self.store = store
+        self.threshold = threshold
+        self.latency_queries = latency_queries
+
+    def _query_p50_ms(self, vectors: np.ndarray) -> Optional[float]:
+        if not len(vectors) or self.latency_queries <= 0:
+            return None
+        rng = np.random.default_rng(0)
+        picks = rng.choice(len(vectors), size=min(self.latency_queries, len(vectors)), replace=False)
+        lat = []
+        for q in vectors[picks]:
+            t0 = time.perf_counter()
+            self.store.backend.query(q.tolist(), 5)
+            lat.append((time.perf_counter() - t0) * 1000.0)
+        return percentile(lat, 50)
+
+    @staticmethod
+    def _low_value(text: str, meta: Dict[str, Any]) -> bool:
+        if meta.get("from") not in CONVERSATIONAL or meta.get("merged_count"):
+            return False
+        words = [w for w in (w.strip(".,!?;:\"'") for w in normalize_text(text).split()) if w]
+        # covered[i]: words[:i] splits into whole filler phrases
+        covered = [True] + [False] * len(words)
+        for end in range(1, len(words) + 1):
+            covered[end] = any(
+                covered[end - n] and " ".join(words[end - n : end]) in FILLER_PHRASES
+                for n in range(1, min(end, _MAX_PHRASE_WORDS) + 1)
+            )
+        return covered[-1]
+
+    @staticmethod
+    def _canonical(members: Sequence[int], ids, texts, metas, vectors: np.ndarray) -> Dict[str, Any]:
+        unit = vectors[list(members)]
+        unit = unit / np.maximum(np.linalg.norm(unit, axis=1, keepdims=True), 1e-12)
+        centroid = unit.mean(axis=0)
+        scores = unit @ centroid
+        best = members[int(np.argmax(scores))]
+        sources: List[str] = []
+        count = 0
+        stamps: List[float] = []
+        for i in members:
+            m = metas[i] or {}
+            # A member may itself be an earlier merge; carry its provenance over.
+            sources.extend(m["merged_ids"].split(",") if m.get("merged_ids") else [ids[i]])
+            count += int(m.get("merged_count", 1))
+            stamps.extend(float(m[k]) for k in ("first_ts", "ts") if k in m)
+        meta = dict(metas[best] or {})
+        meta.update(merged_count=count, merged_ids=",".join(sources))
+        if stamps:
+            meta.update(first_ts=min(stamps), ts=max(stamps))
+        digest = hashlib.sha256(meta["merged_ids"].encode("utf-8")).hexdigest()[:24]
+        return {"id": f"merged-{digest}", "text": texts[best], "metadata": meta, "embedding": vectors[best].tolist()}
+
+    def run(self, dry_run: bool = False) -> ConsolidationReport:
+        t0 = time.perf_counter()
+        backend = self.store.backend
+        ids, texts, metas, vectors = backend.get_all()
+        metas = [m or {} for m in metas]
+        report = ConsolidationReport(items_before=len(ids), dry_run=dry_run)
+        report.query_p50_ms_before = self._query_p50_ms(vectors)
+
+        expired = [i for i in range(len(ids)) if self._low_value(texts[i], metas[i])]
+        expired_set = set(expired)
+        report.expired = len(expired)
+
+        canonical: List[Dict[str, Any]] = []
+        merged: List[int] = []
+        # Merged only within one speaker of one session namespace.
+        groups: Dict[Tuple[str, str], List[int]] = {}
+        for i in range(len(ids)):
+            if metas[i].get("from") in CONVERSATIONAL and i not in expired_set:
+                groups.setdefault((str(metas[i].get("ns", "")), metas[i]["from"]), []).append(i)
+        for rows in groups.values():
+            for cluster in near_duplicate_clusters(vectors[rows], self.threshold):
+                members = [rows[c] for c in cluster]
+                canonical.append(self._canonical(members, ids, texts, metas, vectors))
+                merged.extend(members)
+                if len(report.examples) < 5:
+                    report.examples.append(
+                        {"canonical": canonical[-1]["text"], "members": [texts[m] for m in members[:5]]}
+                    )
+        report.clusters = len(canonical)
+        report.merged = len(merged)
+
+        if not dry_run:
+            if canonical:
+                backend.add(
+                    [c["id"] for c in canonical],
+                    [c["text"] for c in canonical],
+                    [c["embedding"] for c in canonical],
+                    [c["metadata"] for c in canonical],
+                )
+            doomed = [ids[i] for i in expired + merged]
+            if doomed:
+                backend.delete(doomed)
+            backend.compact()
+            report.items_after = backend.count()
+            _, _, _, after = backend.get_all()
+            report.query_p50_ms_after = self._query_p50_ms(after)
+        else:
+            report.items_after = report.items_before - report.expired - report.merged + report.clusters
+        report.elapsed_s = time.perf_counter() - t0
+        return report
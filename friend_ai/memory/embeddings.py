@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, List, Optional, Sequence, Tuple
+
+Embedding = List[float]
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.split()).casefold()
+
+
+class SentenceTransformerEmbedder:
+    """Loads the model on first use so constructing a store stays cheap."""
+
+    def __init__(self, model_name: str, device: str = "cpu", batch_size: int = 64):
+        self.model_name = model_name
+        self.device = device
+        self.batch_size = batch_size
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._model is None:
+                from sentence_transformers import SentenceTransformer
+
+                self._model = SentenceTransformer(self.model_name, device=self.device)
+        return self._model
+
+    def __call__(self, texts: List[str]) -> List[Embedding]:
+        model = self._model or self._load()
+        return model.encode(list(texts), batch_size=self.batch_size, convert_to_numpy=True).tolist()
+
+
+ENGINES = ("torch", "onnx", "onnx-fp32")
+
+
+def create_embedder(engine: str, model_name: str, onnx_dir: str):
+    """torch: sentence-transformers. onnx / onnx-fp32: the int8 / fp32 ONNX
+    export of the same model under `onnx_dir`, run on onnxruntime."""
+    if engine == "torch":
+        return SentenceTransformerEmbedder(model_name)
+    if engine in ("onnx", "onnx-fp32"):
+        from .onnx_embedder import OnnxEmbedder, model_dir
+
+        return OnnxEmbedder(model_name, model_dir(onnx_dir, model_name), quantize=engine == "onnx")
+    raise ValueError(f"unknown embedding engine '{engine}' (expected one of {', '.join(ENGINES)})")
+
+
+class MicroBatcher:
+    """Coalesces concurrent calls of a batch function into one model call.
+
+    The first request opens a batch; requests arriving within `max_wait_ms`
+    join it until it holds `max_batch` items. One worker thread runs the
+    model, so callers on several threads (retrieval, the memory writer, the
+    daemon's clients) share a forward pass instead of queueing for the
+    model one by one. A single call larger than `max_batch` goes through
+    whole. Used for texts to embed and, in the daemon, audio to transcribe.
+    """
+
+    def __init__(self, embed_fn: Callable[[List[Any]], Sequence[Any]], max_batch: int = 64, max_wait_ms: float = 2.0):
+        self.embed_fn = embed_fn
+        self.max_batch = max_batch
+        self.max_wait_s = max_wait_ms / 1000.0
+        self.batches = 0
+        self.requests = 0
+        self._queue: Deque[Tuple[List[Any], Future]] = deque()
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="embed-batcher", daemon=True)
+        self._thread.start()
+
+    def __call__(self, texts: List[Any]) -> List[Any]:
+        fut: Future = Future()
+        with self._cond:
+            self._queue.append((list(texts), fut))
+            self._cond.notify()
+        return fut.result()
+
+    def _take(self) -> List[Tuple[List[Any], Future]]:
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+            deadline = time.perf_counter() + self.max_wait_s
+            batch = [self._queue.popleft()]
+            size = len(batch[0][0])
+            while size < self.max_batch:
+                if self._queue:
+                    if size + len(self._queue[0][0]) > self.max_batch:
+                        break
+                    batch.append(self._queue.popleft())
+                    size += len(batch[-1][0])
+                    continue
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take()
+            texts = [t for req, _ in batch for t in req]
+            try:
+                vectors = list(self.embed_fn(texts))
+            except BaseException as exc:
+                for _, fut in batch:
+                    fut.set_exception(exc)
+                continue
+            self.batches += 1
+            self.requests += len(batch)
+            start = 0
+            for req, fut in batch:
+                fut.set_result(vectors[start : start + len(req)])
+                start += len(req)
+
+
+class CachedEmbedder:
+    """LRU cache in front of an embedding function.
+
+    Keys are (model name, normalized text), so short repeated phrases
+    ("ok", "thanks") only reach the model once. Misses in a call are embedded
+    together in a single batch.
+    """
+
+    def __init__(self, embed_fn: Callable[[List[str]], Sequence[Sequence[float]]], model_name: str, max_entries: int = 4096):
+        self.embed_fn = embed_fn
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[Tuple[str, str], Embedding]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __call__(self, texts: List[str]) -> List[Embedding]:
+        keys = [(self.model_name, normalize_text(t)) for t in texts]
+        out: List[Optional[Embedding]] = [None] * len(texts)
+        missing: "OrderedDict[Tuple[str, str], List[int]]" = OrderedDict()
+        with self._lock:
+            for idx, key in enumerate(keys):
+                emb = self._cache.get(key)
+                if emb is not None:
+                    self._cache.move_to_end(key)
+                    out[idx] = emb
+                    self.hits += 1
+                else:
+                    missing.setdefault(key, []).append(idx)
+        if missing:
+            batch = [texts[idxs[0]] for idxs in missing.values()]
+            vectors = [list(map(float, v)) for v in self.embed_fn(batch)]
+            with self._lock:
+                for (key, idxs), vec in zip(missing.items(), vectors):
+                    for idx in idxs:
+                        out[idx] = vec
+                    self.misses += 1
+                    if self.max_entries > 0:
+                        self._cache[key] = vec
+                        self._cache.move_to_end(key)
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+        return out  # type: ignore[return-value]
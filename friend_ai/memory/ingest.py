@@ -0,0 +1,314 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from .embeddings import Embedding, normalize_text
+
+SUFFIXES = (".jsonl", ".md", ".markdown", ".txt")
+# Keys tried, in order, for the text and timestamp of a JSONL record.
+JSONL_TEXT_KEYS = ("text", "content", "message", "body")
+JSONL_TS_KEYS = ("ts", "timestamp", "time", "date")
+JSONL_ROLE_KEYS = ("from", "role", "author", "sender")
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_HEADING = re.compile(r"^\s{0,3}#{1,6}\s+(.*?)\s*#*\s*$")
+
+
+@dataclass
+class Document:
+    text: str
+    source: str
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+def _ts(value: Any) -> Optional[float]:
+    if isinstance(value, (int, float)):
+        return float(value) / 1000.0 if value > 1e11 else float(value)  # epoch ms or s
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            return None
+    return None
+
+
+def read_jsonl(path: str) -> Iterator[Document]:
+    """One document per record; a bare JSON string is taken as the text."""
+    with open(path, "r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(record, str):
+                record = {"text": record}
+            if not isinstance(record, dict):
+                continue
+            text = next((record[k] for k in JSONL_TEXT_KEYS if isinstance(record.get(k), str)), None)
+            if not text or not text.strip():
+                continue
+            meta: Dict[str, Any] = {"line": lineno}
+            ts = next((t for t in (_ts(record.get(k)) for k in JSONL_TS_KEYS) if t is not None), None)
+            if ts is not None:
+                meta["ts"] = ts
+            role = next((record[k] for k in JSONL_ROLE_KEYS if isinstance(record.get(k), str)), None)
+            if role:
+                meta["role"] = role
+            yield Document(text=text, source=path, metadata=meta)
+
+
+def read_text(path: str) -> Iterator[Document]:
+    """Paragraphs (blank-line separated) of a plain-text or Markdown file,
+    streamed line by line. Markdown headings start a new paragraph and are
+    kept as the `section` of the paragraphs under them."""
+    markdown = path.lower().endswith((".md", ".markdown"))
+    section = ""
+    lines: List[str] = []
+
+    def flush() -> Optional[Document]:
+        text = " ".join(lines).strip()
+        lines.clear()
+        if not text:
+            return None
+        return Document(text=text, source=path, metadata={"section": section} if section else {})
+
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            heading = _HEADING.match(line) if markdown else None
+            if heading or not line.strip():
+                doc = flush()
+                if doc is not None:
+                    yield doc
+                if heading:
+                    section = heading.group(1)
+                continue
+            lines.append(line.strip())
+    doc = flush()
+    if doc is not None:
+        yield doc
+
+
+def iter_files(paths: Iterable[str]) -> Iterator[str]:
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(SUFFIXES):
+                        yield os.path.join(root, name)
+        elif path.lower().endswith(SUFFIXES):
+            yield path
+
+
+def iter_documents(paths: Iterable[str]) -> Iterator[Document]:
+    """Documents from files and directories, read lazily, one file at a time."""
+    for path in iter_files(paths):
+        reader = read_jsonl if path.lower().endswith(".jsonl") else read_text
+        mtime = os.path.getmtime(path)
+        for doc in reader(path):
+            doc.metadata.setdefault("ts", mtime)
+            yield doc
+
+
+def chunk_text(text: str, max_chars: int = 800) -> List[str]:
+    """Packs whole sentences into chunks of at most `max_chars` (a longer
+    sentence is split at whitespace)."""
+    text = " ".join(text.split())
+    if len(text) <= max_chars:
+        return [text] if text else []
+    chunks: List[str] = []
+    current = ""
+    for sentence in _SENTENCE_END.split(text):
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(sentence[:cut])
+            sentence = sentence[cut:].lstrip()
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current} {sentence}" if current else sentence
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()[:32]
+
+
+class Manifest:
+    """Append-only file of content hashes already written to the collection.
+
+    A hash is appended only after its batch has been stored, so an
+    interrupted run resumes by re-reading the input and skipping these.
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.hashes: Set[str] = set()
+        if path and os.path.exists(path):
+            with open(path, "r") as f:
+                self.hashes.update(line.strip() for line in f if line.strip())
+        self._f = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._f = open(path, "a")
+
+    def __contains__(self, digest: str) -> bool:
+        return digest in self.hashes
+
+    def add(self, digests: Sequence[str]) -> None:
+        self.hashes.update(digests)
+        if self._f is not None:
+            self._f.write("".join(f"{d}\n" for d in digests))
+            self._f.flush()
+            os.fsync(self._f.fileno())
+
+    def close(self) -> None:
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+
+@dataclass
+class IngestReport:
+    documents: int = 0
+    chunks: int = 0
+    written: int = 0
+    skipped: int = 0  # chunks already in the collection (or repeated in the input)
+    elapsed_s: float = 0.0
+
+    @property
+    def docs_per_s(self) -> float:
+        return self.documents / self.elapsed_s if self.elapsed_s else 0.0
+
+    @property
+    def chunks_per_s(self) -> float:
+        return self.written / self.elapsed_s if self.elapsed_s else 0.0
+
+    def line(self) -> str:
+        return (
+            f"{self.documents} docs, {self.chunks} chunks: {self.written} written, {self.skipped} skipped "
+            f"in {self.elapsed_s:.1f}s ({self.docs_per_s:.1f} docs/s, {self.chunks_per_s:.1f} chunks/s)"
+        )
+
+
+_Batch = Tuple[List[str], List[str], List[Dict[str, Any]]]  # hashes, texts, metadatas
+
+
+class Ingestor:
+    """Streams documents into a memory store in bulk.
+
+    Documents are chunked, de-duplicated by content hash (against the
+    manifest and within the run), grouped into batches of `batch_size`, and
+    embedded on `workers` threads while earlier batches are written. At most
+    2 x workers batches are in flight, so memory stays flat however large the
+    input. Writes happen on the calling thread, one add_many per batch, with
+    the content hash as the memory id.
+
+    `embed_fn` defaults to store.embed. For a local MemoryStore pass
+    store.embedding_function to bypass the query LRU cache, which bulk
+    text would only churn.
+    """
+
+    def __init__(
+        self,
+        store,
+        manifest: Optional[Manifest] = None,
+        embed_fn: Optional[Callable[[List[str]], Sequence[Embedding]]] = None,
+        batch_size: int = 256,
+        workers: int = 2,
+        chunk_chars: int = 800,
+        source_tag: str = "ingest",
+        id_prefix: str = "ingest",
+    ):
+        self.store = store
+        self.manifest = manifest or Manifest(None)
+        self.embed_fn = embed_fn or store.embed
+        self.batch_size = batch_size
+        self.workers = max(1, workers)
+        self.chunk_chars = chunk_chars
+        self.source_tag = source_tag
+        self.id_prefix = id_prefix
+
+    def _batches(self, docs: Iterable[Document], report: IngestReport) -> Iterator[_Batch]:
+        seen: Set[str] = set()
+        hashes: List[str] = []
+        texts: List[str] = []
+        metas: List[Dict[str, Any]] = []
+        for doc in docs:
+            report.documents += 1
+            for idx, chunk in enumerate(chunk_text(doc.text, self.chunk_chars)):
+                report.chunks += 1
+                digest = content_hash(chunk)
+                if digest in self.manifest or digest in seen:
+                    report.skipped += 1
+                    continue
+                seen.add(digest)
+                meta = {"from": self.source_tag, "source": doc.source, "chunk": idx}
+                meta.update(doc.metadata)
+                hashes.append(digest)
+                texts.append(chunk)
+                metas.append(meta)
+                if len(texts) >= self.batch_size:
+                    yield hashes, texts, metas
+                    hashes, texts, metas = [], [], []
+        if texts:
+            yield hashes, texts, metas
+
+    def _write(self, batch: _Batch, embeddings: Sequence[Embedding], report: IngestReport) -> None:
+        hashes, texts, metas = batch
+        self.store.add_many(texts, metadatas=metas, ids=[f"{self.id_prefix}-{h}" for h in hashes], embeddings=list(embeddings))
+        self.manifest.add(hashes)
+        report.written += len(texts)
+
+    def ingest(
+        self,
+        docs: Iterable[Document],
+        progress: Optional[Callable[[IngestReport], None]] = None,
+        progress_every_s: float = 2.0,
+    ) -> IngestReport:
+        report = IngestReport()
+        t0 = last = time.perf_counter()
+        inflight: Deque[Tuple[_Batch, Future]] = deque()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ingest-embed") as pool:
+            for batch in self._batches(docs, report):
+                inflight.append((batch, pool.submit(self.embed_fn, batch[1])))
+                # Written in input order; an interrupted run only loses the in-flight batches.
+                while len(inflight) >= 2 * self.workers or (inflight and inflight[0][1].done()):
+                    done, fut = inflight.popleft()
+                    self._write(done, fut.result(), report)
+                now = time.perf_counter()
+                if progress is not None and now - last >= progress_every_s:
+                    report.elapsed_s = now - t0
+                    progress(report)
+                    last = now
+            while inflight:
+                done, fut = inflight.popleft()
+                self._write(done, fut.result(), report)
+        report.elapsed_s = time.perf_counter() - t0
+        return report
+
+
+def ingest_paths(store, paths: Iterable[str], manifest_path: Optional[str] = None, **kwargs) -> IngestReport:
+    manifest = Manifest(manifest_path)
+    try:
+        return Ingestor(store, manifest=manifest, **kwargs).ingest(iter_documents(paths))
+    finally:
+        manifest.close()
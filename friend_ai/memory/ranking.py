@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from .backends.base import BackendHit
+
+
+def rerank(
+    hits: List[BackendHit],
+    query_embedding,
+    top_k: int,
+    half_life_days: float = 0.0,
+    recency_weight: float = 0.0,
+    mmr_lambda: float = 1.0,
+    now: Optional[float] = None,
+) -> List[BackendHit]:
+    """Recency-weighted relevance followed by greedy MMR selection.
+
+    relevance = cosine_sim * ((1 - w) + w * 0.5 ** (age / half_life))
+    Items without a `ts` metadata field are treated as brand new. MMR with
+    lambda = 1.0 keeps plain relevance order.
+    """
+    if not hits:
+        return []
+    sims = 1.0 - np.array([h.distance for h in hits], dtype=np.float32)
+    relevance = sims
+    if recency_weight > 0 and half_life_days > 0:
+        now = time.time() if now is None else now
+        ts = np.array([(h.metadata or {}).get("ts", now) for h in hits], dtype=np.float64)
+        age_days = np.maximum(0.0, now - ts) / 86400.0
+        decay = np.power(0.5, age_days / half_life_days).astype(np.float32)
+        relevance = sims * ((1.0 - recency_weight) + recency_weight * decay)
+    k = min(top_k, len(hits))
+    if mmr_lambda >= 1.0 or any(h.embedding is None for h in hits):
+        order = np.argsort(-relevance, kind="stable")[:k]
+        return [_scored(hits[i], relevance[i]) for i in order]
+
+    emb = np.asarray([h.embedding for h in hits], dtype=np.float32)
+    emb /= np.maximum(np.linalg.norm(emb, axis=1, keepdims=True), 1e-12)
+    pairwise = emb @ emb.T
+    selected: List[int] = []
+    max_sim = np.zeros(len(hits), dtype=np.float32)  # similarity to the closest selected item
+    available = np.ones(len(hits), dtype=bool)
+    for _ in range(k):
+        mmr = mmr_lambda * relevance - (1.0 - mmr_lambda) * max_sim
+        mmr[~available] = -np.inf
+        best = int(np.argmax(mmr))
+        selected.append(best)
+        available[best] = False
+        max_sim = np.maximum(max_sim, pairwise[best])
+    return [_scored(hits[i], relevance[i]) for i in selected]
+
+
+def _scored(hit: BackendHit, score) -> BackendHit:
+    hit.score = float(score)
+    return hit
@@ -5,8 +5,12 @@ import uuid
 from dataclasses import dataclass
 from typing import List, Optional, Dict, Any
 
-import chromadb
-from chromadb.utils import embedding_functions
+from friend_ai import tracing
+
+from .backends import MemoryBackend, create_backend
+from .backends.base import Where
+from .embeddings import CachedEmbedder, Embedding, MicroBatcher, create_embedder
+from .ranking import rerank
 
 
 @dataclass
@@ -14,39 +18,158 @@ class MemoryItem:
     id: str
     text: str
     metadata: Optional[Dict[str, Any]] = None
+    distance: Optional[float] = None
+    score: Optional[float] = None
 
 
 class MemoryStore:
-    def __init__(self, persist_dir: str, collection_name: str, embedding_model: str) -> None:
+    def __init__(
+        self,
+        persist_dir: str,
+        collection_name: str,
+        embedding_model: str,
+        embedding_cache_size: int = 4096,
+        backend: str = "chroma",
+        vector_dtype: str = "float32",
+        fetch_k: int = 20,
+        recency_half_life_days: float = 30.0,
+        recency_weight: float = 0.0,
+        mmr_lambda: float = 1.0,
+        embedding_engine: str = "torch",
+        onnx_dir: Optional[str] = None,
+        embedding_max_batch: int = 64,
+        embedding_batch_wait_ms: float = 0.0,
+    ) -> None:
         self.persist_dir = persist_dir
-        os.makedirs(self.persist_dir, exist_ok=True)
-        self.client = chromadb.PersistentClient(path=self.persist_dir)
-        self.embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name=embedding_model
+        self.backend: MemoryBackend = create_backend(
+            backend, persist_dir=persist_dir, collection_name=collection_name, vector_dtype=vector_dtype
+        )
+        self.embedding_function = create_embedder(
+            embedding_engine, embedding_model, onnx_dir or os.path.join(persist_dir, "onnx")
+        )
+        # Concurrent callers (retrieval, the memory writer, daemon clients) share forward passes.
+        self.batcher = (
+            MicroBatcher(self.embedding_function, max_batch=embedding_max_batch, max_wait_ms=embedding_batch_wait_ms)
+            if embedding_max_batch > 0
+            else None
         )
-        self.collection = self.client.get_or_create_collection(
-            name=collection_name,
-            embedding_function=self.embedding_function,
-            metadata={"hnsw:space": "cosine"},
+        self.embedder = CachedEmbedder(
+            self.batcher or self.embedding_function, embedding_model, max_entries=embedding_cache_size
         )
+        self.fetch_k = fetch_k
+        self.recency_half_life_days = recency_half_life_days
+        self.recency_weight = recency_weight
+        self.mmr_lambda = mmr_lambda
 
-    def add(self, text: str, metadata: Optional[Dict[str, Any]] = None, item_id: Optional[str] = None) -> MemoryItem:
+    def embed(self, texts: List[str]) -> List[Embedding]:
+        with tracing.span("memory.embed", n=len(texts)):
+            return self.embedder(texts)
+
+    def add(
+        self,
+        text: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        item_id: Optional[str] = None,
+        embedding: Optional[Embedding] = None,
+    ) -> MemoryItem:
         memory_id = item_id or str(uuid.uuid4())
-        self.collection.add(documents=[text], metadatas=[metadata or {}], ids=[memory_id])
-        return MemoryItem(id=memory_id, text=text, metadata=metadata)
-
-    def query(self, query_text: str, top_k: int = 5) -> List[MemoryItem]:
-        results = self.collection.query(query_texts=[query_text], n_results=top_k)
-        out: List[MemoryItem] = []
-        ids = results.get("ids", [[]])[0]
-        docs = results.get("documents", [[]])[0]
-        metas = results.get("metadatas", [[]])[0]
-        for idx, doc in enumerate(docs):
-            out.append(MemoryItem(id=ids[idx], text=doc, metadata=metas[idx]))
-        return out
+        return self.add_many([text], metadatas=[metadata], ids=[memory_id], embeddings=[embedding])[0]
+
+    def add_many(
+        self,
+        texts: List[str],
+        metadatas: Optional[List[Optional[Dict[str, Any]]]] = None,
+        ids: Optional[List[str]] = None,
+        embeddings: Optional[List[Optional[Embedding]]] = None,
+    ) -> List[MemoryItem]:
+        if not texts:
+            return []
+        metadatas = metadatas or [None] * len(texts)
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        embeddings = list(embeddings or [None] * len(texts))
+        missing = [idx for idx, emb in enumerate(embeddings) if emb is None]
+        if missing:
+            # One batched forward pass for the whole group instead of one per document.
+            for idx, emb in zip(missing, self.embed([texts[idx] for idx in missing])):
+                embeddings[idx] = emb
+        with tracing.span("memory.add", n=len(texts)):
+            self.backend.add(ids, texts, embeddings, metadatas)
+        return [MemoryItem(id=i, text=t, metadata=m) for i, t, m in zip(ids, texts, metadatas)]
+
+    def query(
+        self,
+        query_text: str,
+        top_k: int = 5,
+        embedding: Optional[Embedding] = None,
+        where: Optional[Where] = None,
+    ) -> List[MemoryItem]:
+        if embedding is None:
+            embedding = self.embed([query_text])[0]
+        use_mmr = self.mmr_lambda < 1.0
+        rescoring = use_mmr or self.recency_weight > 0
+        # Over-fetch only when there is re-scoring to do; the filter itself runs in the backend.
+        n = max(top_k, self.fetch_k) if rescoring else top_k
+        with tracing.span("memory.query"):
+            hits = self.backend.query(embedding, n, where=where, include_embeddings=use_mmr)
+            if rescoring:
+                hits = rerank(
+                    hits,
+                    embedding,
+                    top_k,
+                    half_life_days=self.recency_half_life_days,
+                    recency_weight=self.recency_weight,
+                    mmr_lambda=self.mmr_lambda,
+                )
+        return [
+            MemoryItem(id=h.id, text=h.text, metadata=h.metadata, distance=h.distance, score=h.score)
+            for h in hits
+        ]
 
     def delete(self, item_id: str) -> None:
-        self.collection.delete(ids=[item_id])
+        self.backend.delete([item_id])
 
     def count(self) -> int:
-        return self.collection.count()
\ No newline at end of file
+        return self.backend.count()
+
+
+def scope_where(where: Optional[Where], namespace: str) -> Where:
+    return {"ns": namespace} if not where else {"$and": [where, {"ns": namespace}]}
+
+
+class MemoryNamespace:
+    """One session's view of a shared MemoryStore.
+
+    Writes are tagged with metadata ns=<name> and queries only see items
+    with that tag, so sessions sharing one store (and one embedder) never
+    recall each other's memories. Anything else goes to the store.
+    """
+
+    def __init__(self, store: MemoryStore, name: str):
+        self.store = store
+        self.name = name
+
+    def __getattr__(self, attr):
+        return getattr(self.store, attr)
+
+    def add(
+        self,
+        text: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        item_id: Optional[str] = None,
+        embedding: Optional[Embedding] = None,
+    ) -> MemoryItem:
+        memory_id = item_id or str(uuid.uuid4())
+        return self.add_many([text], metadatas=[metadata], ids=[memory_id], embeddings=[embedding])[0]
+
+    def add_many(self, texts, metadatas=None, ids=None, embeddings=None) -> List[MemoryItem]:
+        metadatas = [dict(m or {}, ns=self.name) for m in (metadatas or [None] * len(texts))]
+        return self.store.add_many(texts, metadatas=metadatas, ids=ids, embeddings=embeddings)
+
+    def query(
+        self,
+        query_text: str,
+        top_k: int = 5,
+        embedding: Optional[Embedding] = None,
+        where: Optional[Where] = None,
+    ) -> List[MemoryItem]:
+        return self.store.query(query_text, top_k=top_k, embedding=embedding, where=scope_where(where, self.name))
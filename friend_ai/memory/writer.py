@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import threading
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from .backends.base import Where
+from .embeddings import Embedding
+from .store import MemoryItem, MemoryStore
+
+_Pending = Tuple[int, str, Optional[Dict[str, Any]], str, Optional[Embedding]]
+
+
+class MemoryWriter:
+    """Write-behind queue in front of a MemoryStore.
+
+    `add` returns immediately; a background thread groups pending writes into
+    one `MemoryStore.add_many` call (one embedding forward pass, one
+    collection write). `flush` is a durability barrier for everything added
+    before it, and `query` flushes first so callers always read their own
+    writes.
+    """
+
+    def __init__(self, store: MemoryStore, batch_size: int = 32, max_delay_s: float = 0.25):
+        self.store = store
+        self.batch_size = batch_size
+        self.max_delay_s = max_delay_s
+        self.last_error: Optional[BaseException] = None
+        self._pending: List[_Pending] = []
+        self._cond = threading.Condition()
+        self._submitted = 0  # sequence number of the last queued write
+        self._done = 0  # writes with sequence <= this have been attempted
+        self._failed_seq = 0  # highest sequence number that failed to persist
+        self._reported_failed = 0
+        self._flush_requested = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self) -> int:
+        with self._cond:
+            return self._submitted - self._done
+
+    def add(
+        self,
+        text: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        item_id: Optional[str] = None,
+        embedding: Optional[Embedding] = None,
+    ) -> MemoryItem:
+        memory_id = item_id or str(uuid.uuid4())
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("MemoryWriter is closed")
+            self._submitted += 1
+            self._pending.append((self._submitted, text, metadata, memory_id, embedding))
+            self._cond.notify_all()
+        return MemoryItem(id=memory_id, text=text, metadata=metadata)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every write queued before this call has been persisted.
+
+        Returns False on timeout or if a write failed since the last flush
+        (see `last_error`).
+        """
+        with self._cond:
+            target = self._submitted
+            if self._done < target:
+                self._flush_requested = True
+                self._cond.notify_all()
+            ok = self._cond.wait_for(lambda: self._done >= target, timeout=timeout)
+            failed = self._failed_seq > self._reported_failed
+            self._reported_failed = self._failed_seq
+            return ok and not failed
+
+    def query(
+        self,
+        query_text: str,
+        top_k: int = 5,
+        embedding: Optional[Embedding] = None,
+        where: Optional[Where] = None,
+    ) -> List[MemoryItem]:
+        self.flush()
+        return self.store.query(query_text, top_k=top_k, embedding=embedding, where=where)
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        self.flush(timeout=timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout=timeout)
+
+    def _take_batch(self) -> List[_Pending]:
+        with self._cond:
+            self._cond.wait_for(lambda: self._pending or self._closed)
+            if not self._pending:
+                return []
+            # Give more writes a chance to join this batch unless someone is waiting.
+            if not self._flush_requested and len(self._pending) < self.batch_size:
+                self._cond.wait_for(
+                    lambda: self._flush_requested or self._closed or len(self._pending) >= self.batch_size,
+                    timeout=self.max_delay_s,
+                )
+            batch = self._pending[: self.batch_size]
+            del self._pending[: self.batch_size]
+            if not self._pending:
+                self._flush_requested = False
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return
+            try:
+                self.store.add_many(
+                    [item[1] for item in batch],
+                    metadatas=[item[2] for item in batch],
+                    ids=[item[3] for item in batch],
+                    embeddings=[item[4] for item in batch],
+                )
+            except Exception as exc:
+                self.last_error = exc
+                with self._cond:
+                    self._failed_seq = batch[-1][0]
+            with self._cond:
+                self._done = batch[-1][0]
+                self._cond.notify_all()
@@ -1,19 +1,28 @@
 from __future__ import annotations
 
-import os
+import queue
 import threading
 import time
-from dataclasses import dataclass
-from typing import List
-
-import numpy as np
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
 
+from friend_ai import components, tracing
 from friend_ai.audio import AudioPlayer
-from friend_ai.config import ConfigLoader
-from friend_ai.llm import LocalLLM, Message
-from friend_ai.memory import MemoryStore
+from friend_ai.config import Config, ConfigLoader
+from friend_ai.llm import GenerationStats, LocalLLM, Message
+from friend_ai.llm.context import ContextBuilder
+from friend_ai.memory import MemoryItem, MemoryNamespace, MemoryStore, MemoryWriter
+from friend_ai.server.client import ModelClient, RemoteLLM, RemoteMemoryStore, RemoteTTS, RemoteWhisper
 from friend_ai.stt import RealtimeTranscriber, TranscriptionEvent
-from friend_ai.tts import CoquiXTTS
+from friend_ai.tts import CoquiXTTS, segment_stream
+
+from .pipeline import CancelToken, Job, Pipeline, TurnCancelled
+from .startup import Warmup
+from .summary import RollingSummarizer
+
+
+SYSTEM_PROMPT = "You are a caring, concise AI friend. Personalize replies based on prior memories."
 
 
 @dataclass
@@ -22,96 +31,371 @@ class DialogueTurn:
     text: str
 
 
+@dataclass
+class TurnTimings:
+    # perf_counter() timestamps; None when the stage never happened. The same
+    # points are also recorded as trace marks (see friend_ai.tracing).
+    turn_id: Optional[int] = None
+    transcript_final: float = field(default_factory=time.perf_counter)
+    llm_first_token: Optional[float] = None
+    first_segment: Optional[float] = None
+    tts_first_audio: Optional[float] = None
+    playback_start: Optional[float] = None
+    llm_done: Optional[float] = None
+    llm_stats: Optional[GenerationStats] = None
+    cancelled: bool = False
+
+    def as_ms(self) -> Dict[str, Optional[float]]:
+        out: Dict[str, Optional[float]] = {}
+        for name in ("llm_first_token", "first_segment", "tts_first_audio", "playback_start", "llm_done"):
+            ts = getattr(self, name)
+            out[name] = None if ts is None else round((ts - self.transcript_final) * 1000.0, 1)
+        return out
+
+    @property
+    def time_to_first_audio_ms(self) -> Optional[float]:
+        return self.as_ms()["playback_start"]
+
+
+@dataclass
+class _Turn:
+    user: DialogueTurn
+    timings: TurnTimings
+    memories: List[MemoryItem] = field(default_factory=list)
+
+
+def _mark_cancelled(job: Job) -> None:
+    # Stage payloads are either a _Turn or a tuple starting with one.
+    turn = job.payload[0] if isinstance(job.payload, tuple) else job.payload
+    turn.timings.cancelled = True
+
+
 class CallSession:
-    def __init__(self):
-        self.cfg = ConfigLoader.load()
-        self.store = MemoryStore(
-            persist_dir=self.cfg.app.db_dir,
-            collection_name=self.cfg.memory.collection_name,
-            embedding_model=self.cfg.memory.embedding_model,
-        )
-        self.llm = LocalLLM(
-            model_path=self.cfg.llm.model_path,
-            temperature=self.cfg.llm.temperature,
-            top_p=self.cfg.llm.top_p,
-            max_tokens=self.cfg.llm.max_tokens,
-        )
-        self.tts = CoquiXTTS(
-            model_name=self.cfg.tts.model_name,
-            device=self.cfg.app.device,
-            default_sample_rate=self.cfg.tts.sample_rate,
-        )
-        self.transcriber = RealtimeTranscriber(
-            model_size=self.cfg.stt.whisper_model_size,
-            vad_aggressiveness=self.cfg.stt.vad_aggressiveness,
-            sample_rate=16000,
-        )
+    def __init__(
+        self,
+        remote: Optional[ModelClient] = None,
+        cfg: Optional[Config] = None,
+        session: Optional[str] = None,
+    ):
+        # With a ModelClient, models live in the daemon and this process only
+        # handles audio I/O and the turn loop. A `session` name keeps this
+        # call's memories in their own namespace of the (shared) store.
+        self.remote = remote
+        self.session = session
+        self.warmup = Warmup(max_workers=4)
+        self.cfg = cfg if cfg is not None else ConfigLoader.load()
+        self.warmup.mark("config")
+        # Shared by the player (reference signal) and the transcriber (mic frames).
+        self.echo_gate = components.build_echo_gate(self.cfg) if self.cfg.pipeline.barge_in else None
+        # STT first: the microphone opens as soon as Whisper is loaded, while
+        # the other models keep warming in the background.
+        self.warmup.submit("stt", self._build_transcriber)
+        self.warmup.submit("memory", self._build_memory)
+        self.warmup.submit("llm", self._build_llm)
+        self.warmup.submit("tts", lambda: components.build_tts_cache(self.cfg, self._build_tts()))
+        self._filler_after_s = self.cfg.tts.filler_after_ms / 1000.0 if self.cfg.tts.fillers else 0.0
+        if self._filler_after_s > 0:
+            self.warmup.submit("fillers", lambda: components.build_fillers(self.cfg, self.tts))
         self.player = AudioPlayer()
+        self.player.reference = self.echo_gate
+        # Only the turns still in the prompt window; older ones are folded
+        # into the rolling summary, so the call can run indefinitely.
         self.history: List[DialogueTurn] = []
+        self._history_lock = threading.Lock()
+        self.context = ContextBuilder(
+            count_tokens=lambda text: self.llm.count_tokens(text),
+            n_ctx=self.cfg.llm.n_ctx,
+            reply_tokens=self.cfg.llm.max_tokens,
+            memory_share=self.cfg.llm.memory_share,
+            max_turns=self.cfg.llm.history_turns,
+        )
+        # Reply generation and the summarizer share one model.
+        self._llm_lock = threading.Lock()
+        self.summarizer: Optional[RollingSummarizer] = None
+        if self.cfg.llm.summarize:
+            self.summarizer = RollingSummarizer(
+                llm=lambda: self.llm,
+                memory=lambda: self.memory,
+                lock=self._llm_lock,
+                can_run=self._idle,
+                max_tokens=self.cfg.llm.summary_max_tokens,
+                # One per session namespace (ids are shared across namespaces).
+                item_id=f"summary-{session}" if session else "summary",
+            )
+        self.timings: Deque[TurnTimings] = deque(maxlen=200)  # the most recent turns
+        self.turns = 0  # all turns started, unlike len(timings)
         self._stop = threading.Event()
-        self._resp_thread = threading.Thread(target=self._response_loop, daemon=True)
+        # STT feeds the intake thread; each later stage runs on its own thread
+        # behind a bounded queue, so retrieval for a new utterance overlaps
+        # generation and synthesis of the previous reply.
+        qsize = self.cfg.pipeline.stage_queue_size
+        self.pipeline = Pipeline()
+        self.pipeline.add("retrieve", self._retrieve_stage, maxsize=qsize, on_cancel=_mark_cancelled)
+        self.pipeline.add("llm", self._llm_stage, maxsize=qsize, on_cancel=_mark_cancelled)
+        self.pipeline.add("tts", self._tts_stage, maxsize=qsize, on_cancel=_mark_cancelled)
+        self.pipeline.add(
+            "playback", self._playback_stage, maxsize=self.cfg.pipeline.audio_queue_size, on_cancel=_mark_cancelled
+        )
+        self._current: Optional[Job] = None
+        # Held while cancelling + flushing the player and while enqueueing
+        # audio, so no chunk of a cancelled turn slips in after the flush.
+        self._play_lock = threading.Lock()
+        self._intake_thread = threading.Thread(target=self._intake_loop, daemon=True)
+
+    def _build_transcriber(self) -> RealtimeTranscriber:
+        whisper = RemoteWhisper(self.remote) if self.remote is not None else components.build_whisper(self.cfg)
+        return components.build_transcriber(
+            self.cfg, whisper=whisper, echo_gate=self.echo_gate, on_barge_in=self._on_barge_in
+        )
+
+    def _build_memory(self) -> Tuple[MemoryStore, MemoryWriter]:
+        if self.remote is not None:
+            store = RemoteMemoryStore(self.remote, namespace=self.session)
+        else:
+            store = components.build_memory_store(self.cfg, warm=True)
+            if self.session:
+                store = MemoryNamespace(store, self.session)
+        return store, components.build_memory_writer(self.cfg, store)
+
+    def _build_llm(self) -> LocalLLM:
+        if self.remote is not None:
+            return RemoteLLM(self.remote)
+        return components.build_llm(self.cfg)
 
-    def start(self):
+    def _build_tts(self) -> CoquiXTTS:
+        if self.remote is not None:
+            return RemoteTTS(self.remote)
+        return components.build_tts(self.cfg, warm=True)
+
+    # Components block until their warmup task has finished.
+    @property
+    def transcriber(self) -> RealtimeTranscriber:
+        return self.warmup.get("stt")
+
+    @property
+    def store(self) -> MemoryStore:
+        return self.warmup.get("memory")[0]
+
+    @property
+    def memory(self) -> MemoryWriter:
+        return self.warmup.get("memory")[1]
+
+    @property
+    def llm(self) -> LocalLLM:
+        return self.warmup.get("llm")
+
+    @property
+    def tts(self) -> CoquiXTTS:
+        return self.warmup.get("tts")
+
+    def start(self, open_mic: bool = True):
+        # open_mic=False leaves audio input to transcriber.feed() (replay, tests).
         self._stop.clear()
-        self.transcriber.start()
-        self._resp_thread.start()
+        self.transcriber.start(open_mic=open_mic)
+        self.warmup.mark("mic_open")
+        self.pipeline.start()
+        self._intake_thread.start()
+        if self.summarizer is not None:
+            self.summarizer.start()
 
     def stop(self):
         self._stop.set()
-        self.transcriber.stop()
-        self.player.stop()
+        if self._current is not None:
+            self._current.token.cancel()
+        self.pipeline.stop()
+        if self.summarizer is not None:
+            self.summarizer.stop()
+        self.warmup.shutdown()
+        if self.warmup.done("stt"):
+            self.transcriber.stop()
+        self.player.close()
+        if self.warmup.done("memory"):
+            self.memory.close()
+        if self.warmup.done("tts") and self.tts.sink is not None:
+            self.tts.sink.close()
 
-    def _response_loop(self):
+    def interrupt(self) -> None:
+        """Barge-in: abort the in-flight turn in every stage and silence playback."""
+        with self._play_lock:
+            if self._current is not None:
+                self._current.token.cancel()
+                if self.player.busy:
+                    self._current.payload.timings.cancelled = True
+            self.player.stop()
+
+    def _idle(self) -> bool:
+        """No turn in flight, nothing playing and the user is not speaking."""
+        return self.pipeline.idle() and not self.player.busy and not self.transcriber.endpointer.voiced
+
+    def _on_barge_in(self) -> None:
+        # Runs on the STT worker as soon as the user talks over playback; the
+        # transcript of what they said arrives later as a normal final event.
+        if self.player.busy:
+            self.interrupt()
+
+    def _intake_loop(self):
         while not self._stop.is_set():
             try:
                 evt: TranscriptionEvent = self.transcriber.events_q.get(timeout=0.1)
-            except Exception:
+            except queue.Empty:
                 continue
             if not evt.is_final:
                 continue
             user_text = evt.text.strip()
             if not user_text:
                 continue
-            # Barge-in: stop any current playback
-            self.player.stop()
-            self.history.append(DialogueTurn(role="user", text=user_text))
-            # Persist user memory
-            self.store.add(user_text, metadata={"from": "user", "ts": time.time()})
-            # Retrieve related memories to ground reply
-            related = self.store.query(user_text, top_k=self.cfg.memory.top_k_default)
-            mem_context = "\n".join(f"- {m.text}" for m in related)
-            system_prompt = (
-                "You are a caring, concise AI friend. Personalize replies based on prior memories."
+            turn_id = evt.turn_id if evt.turn_id is not None else tracing.new_turn()
+            timings = TurnTimings(turn_id=turn_id)
+            tracing.mark("turn.transcript_final", turn_id, ts=timings.transcript_final)
+            self.interrupt()
+            turn = _Turn(user=DialogueTurn(role="user", text=user_text), timings=timings)
+            with self._history_lock:
+                self.history.append(turn.user)
+            self.timings.append(timings)
+            self.turns += 1
+            self._current = Job(token=CancelToken(), payload=turn, turn_id=turn_id)
+            if self._filler_after_s > 0:
+                timer = threading.Timer(self._filler_after_s, self._play_filler, args=(self._current,))
+                timer.daemon = True
+                timer.start()
+            self.pipeline["retrieve"].put(self._current)
+
+    def _play_filler(self, job: Job) -> None:
+        # Covers a slow reply (retrieval + prefill + first sentence) with a
+        # short backchannel clip. Only before any reply audio is queued, so
+        # the clip never lands in the middle of the answer.
+        if not self.warmup.done("fillers"):
+            return
+        try:
+            fillers = self.warmup.get("fillers")
+        except Exception:
+            return
+        if not len(fillers):
+            return
+        timings = job.payload.timings
+        with self._play_lock:
+            if job.token.cancelled or timings.tts_first_audio is not None:
+                return
+            phrase, audio = fillers.next()
+            self.player.enqueue(
+                audio,
+                fillers.sample_rate,
+                on_start=lambda: tracing.mark("playback.filler", timings.turn_id, phrase=phrase),
             )
-            aug_user = user_text
-            if mem_context:
-                aug_user += f"\n\nRelevant memories:\n{mem_context}"
-            messages = [
-                Message(role="system", content=system_prompt),
-                *[Message(role=t.role, content=t.text) for t in self.history[-6:]],
-                Message(role="user", content=aug_user),
-            ]
-            reply = self.llm.generate(messages)
-            self.history.append(DialogueTurn(role="assistant", text=reply))
-            # TTS
-            audio = self._synthesize_np(reply)
-            self.player.play(audio=audio, sample_rate=self.cfg.tts.sample_rate)
-
-    def _synthesize_np(self, text: str) -> np.ndarray:
-        # Use Coqui to get numpy audio by saving then reading, or extend TTS class to return np
-        # Here we call a hidden method by generating file then loading, but we prefer memory. We'll generate file then load.
-        out_path = os.path.join(
-            self.cfg.app.audio_out_dir, f"call-{int(time.time())}.wav"
-        )
-        res = self.tts.synthesize_to_file(
-            text=text,
+
+    def _retrieve_stage(self, job: Job) -> None:
+        turn: _Turn = job.payload
+        user_text = turn.user.text
+        # Retrieve related memories to ground the reply, then persist this
+        # turn in the background (it is already in the prompt verbatim). Both
+        # share one embedding of the utterance. Queued after the query, so the
+        # query's flush does not wait on it and it is not recalled as its own
+        # top memory; queued even if the turn is cancelled: the user did say it.
+        embedding = self.store.embed([user_text])[0]
+        try:
+            job.token.check()
+            turn.memories = self.memory.query(
+                user_text,
+                top_k=self.cfg.memory.top_k_default,
+                embedding=embedding,
+            )
+        finally:
+            self.memory.add(user_text, metadata={"from": "user", "ts": time.time()}, embedding=embedding)
+        self.pipeline["llm"].put(job, upstream=self.pipeline["retrieve"].stats)
+
+    def _llm_stage(self, job: Job) -> None:
+        turn: _Turn = job.payload
+        timings = turn.timings
+        messages = self._build_messages(turn)
+        reply_parts: List[str] = []
+
+        def tokens() -> Iterator[str]:
+            gen = self.llm.generate_stream(messages)
+            self._llm_lock.acquire()
+            try:
+                for tok in gen:
+                    job.token.check()
+                    if timings.llm_first_token is None:
+                        timings.llm_first_token = time.perf_counter()
+                        tracing.mark("llm.first_token", ts=timings.llm_first_token)
+                    reply_parts.append(tok)
+                    yield tok
+            finally:
+                # Closing the generator stops llama.cpp (or the daemon stream)
+                # from producing tokens nobody will hear.
+                gen.close()
+                self._llm_lock.release()
+                timings.llm_done = time.perf_counter()
+                tracing.mark("llm.last_token", ts=timings.llm_done)
+
+        tts_stage = self.pipeline["tts"]
+        try:
+            for segment in segment_stream(tokens()):
+                if timings.first_segment is None:
+                    timings.first_segment = time.perf_counter()
+                    tracing.mark("segment.first", ts=timings.first_segment)
+                # Blocks while TTS is behind, which pauses generation too.
+                if not tts_stage.put(Job(job.token, (turn, segment), job.turn_id), upstream=self.pipeline["llm"].stats):
+                    raise TurnCancelled()
+        finally:
+            timings.llm_stats = self.llm.last_stats
+            reply = "".join(reply_parts).strip()
+            if reply:
+                self._record_reply(turn.user, reply)
+
+    def _tts_stage(self, job: Job) -> None:
+        turn, segment = job.payload
+        timings = turn.timings
+        playback = self.pipeline["playback"]
+        chunks = self.tts.synthesize_stream(
+            text=segment,
             speaker_ref_wav=self.cfg.tts.speaker_ref_wav,
             language=self.cfg.tts.voice_clone_language,
-            output_path=out_path,
-            sample_rate=self.cfg.tts.sample_rate,
         )
-        import soundfile as sf
-        audio, sr = sf.read(res.audio_path, dtype="float32")
-        if audio.ndim > 1:
-            audio = audio[:, 0]
-        return audio.astype(np.float32)
\ No newline at end of file
+        try:
+            for audio in chunks:
+                job.token.check()
+                if timings.tts_first_audio is None:
+                    timings.tts_first_audio = time.perf_counter()
+                    tracing.mark("tts.first_audio", ts=timings.tts_first_audio)
+                chunk_job = Job(job.token, (turn, audio, self.tts.sample_rate), job.turn_id)
+                if not playback.put(chunk_job, upstream=self.pipeline["tts"].stats):
+                    raise TurnCancelled()
+        finally:
+            chunks.close()
+
+    def _playback_stage(self, job: Job) -> None:
+        turn, audio, sample_rate = job.payload
+        timings = turn.timings
+
+        def mark_playback():
+            if timings.playback_start is None:
+                timings.playback_start = time.perf_counter()
+                tracing.mark("playback.start", timings.turn_id, ts=timings.playback_start)
+
+        with self._play_lock:
+            job.token.check()
+            self.player.enqueue(audio, sample_rate, on_start=mark_playback)
+
+    def _record_reply(self, user: DialogueTurn, reply: str) -> None:
+        # A newer utterance may already be in history; keep each reply right
+        # after the user turn it answers (a cancelled reply is kept as far as
+        # it was generated).
+        with self._history_lock:
+            idx = next(i for i in range(len(self.history) - 1, -1, -1) if self.history[i] is user)
+            self.history.insert(idx + 1, DialogueTurn(role="assistant", text=reply))
+
+    def _build_messages(self, turn: _Turn) -> List[Message]:
+        summary = self.summarizer.summary if self.summarizer is not None else ""
+        # The summary is already in the prompt; its stored copy would only repeat it.
+        memories = [m.text for m in turn.memories if m.text != summary]
+        with self._history_lock:
+            end = next(i for i in range(len(self.history) - 1, -1, -1) if self.history[i] is turn.user)
+            messages, cut = self.context.build(SYSTEM_PROMPT, turn.user.text, self.history[:end], memories, summary)
+            aged = self.history[:cut]
+            del self.history[:cut]
+        stats = self.context.last
+        tracing.mark("llm.context", tokens=stats.used, memories=stats.memories, history=stats.history_turns)
+        if aged and self.summarizer is not None:
+            self.summarizer.submit(aged)
+        return messages
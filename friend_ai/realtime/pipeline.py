@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Generic, List, Optional, TypeVar
+
+from friend_ai import tracing
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class TurnCancelled(Exception):
+    pass
+
+
+class CancelToken:
+    """Shared by every stage working on one turn; set on barge-in."""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def check(self) -> None:
+        if self._event.is_set():
+            raise TurnCancelled()
+
+
+@dataclass
+class StageStats:
+    name: str
+    items: int = 0
+    cancelled: int = 0
+    errors: int = 0
+    busy_s: float = 0.0
+    blocked_s: float = 0.0  # time spent waiting on a full downstream queue
+    queue_depth: int = 0
+    max_queue_depth: int = 0
+    latencies_s: Deque[float] = field(default_factory=lambda: deque(maxlen=512))
+
+    def percentile_ms(self, pct: float) -> Optional[float]:
+        value = tracing.percentile(self.latencies_s, pct)
+        return None if value is None else round(value * 1000.0, 1)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "items": self.items,
+            "cancelled": self.cancelled,
+            "errors": self.errors,
+            "p50_ms": self.percentile_ms(50),
+            "p95_ms": self.percentile_ms(95),
+            "busy_s": round(self.busy_s, 3),
+            "blocked_s": round(self.blocked_s, 3),
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+        }
+
+
+@dataclass
+class Job(Generic[T]):
+    token: CancelToken
+    payload: T
+    turn_id: Optional[int] = None  # trace tag for everything the handler records
+
+
+class Stage:
+    """One worker thread consuming a bounded queue of Jobs.
+
+    Jobs whose token is already cancelled are dropped unprocessed; a handler
+    may raise TurnCancelled to abandon the job part way through. Either way
+    `on_cancel(job)` is called.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[Job], None],
+        maxsize: int,
+        stop: threading.Event,
+        on_cancel: Optional[Callable[[Job], None]] = None,
+    ):
+        self.name = name
+        self.handler = handler
+        self.on_cancel = on_cancel
+        self.inbox: "queue.Queue[Job]" = queue.Queue(maxsize=maxsize)
+        self.stats = StageStats(name=name)
+        self._outstanding = 0  # jobs queued or being processed
+        self._count_lock = threading.Lock()
+        self._stop = stop
+        self._thread = threading.Thread(target=self._run, name=f"stage-{name}", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        if self._thread.is_alive():
+            self._thread.join(timeout=timeout)
+
+    def put(self, job: Job, upstream: Optional[StageStats] = None) -> bool:
+        """Blocks while the inbox is full; False if the turn or pipeline stopped first.
+
+        Waiting time is charged to `upstream` as backpressure.
+        """
+        t0 = time.perf_counter()
+        # Counted before it becomes visible in the inbox so busy() has no gap.
+        self._count(1)
+        try:
+            while not (job.token.cancelled or self._stop.is_set()):
+                try:
+                    self.inbox.put(job, timeout=0.05)
+                except queue.Full:
+                    continue
+                depth = self.inbox.qsize()
+                self.stats.queue_depth = depth
+                self.stats.max_queue_depth = max(self.stats.max_queue_depth, depth)
+                return True
+            self._count(-1)
+            return False
+        finally:
+            if upstream is not None:
+                upstream.blocked_s += time.perf_counter() - t0
+
+    def _count(self, delta: int) -> None:
+        with self._count_lock:
+            self._outstanding += delta
+
+    @property
+    def busy(self) -> bool:
+        return self._outstanding > 0
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                job = self.inbox.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            try:
+                self._process(job)
+            finally:
+                self._count(-1)
+
+    def _process(self, job: Job) -> None:
+        self.stats.queue_depth = self.inbox.qsize()
+        if job.token.cancelled:
+            self._cancelled(job)
+            return
+        t0 = time.perf_counter()
+        try:
+            with tracing.turn(job.turn_id), tracing.span(f"stage.{self.name}"):
+                self.handler(job)
+        except TurnCancelled:
+            self._cancelled(job)
+        except Exception:
+            self.stats.errors += 1
+            logger.exception("stage %s failed", self.name)
+        finally:
+            elapsed = time.perf_counter() - t0
+            self.stats.items += 1
+            self.stats.busy_s += elapsed
+            self.stats.latencies_s.append(elapsed)
+
+    def _cancelled(self, job: Job) -> None:
+        self.stats.cancelled += 1
+        if self.on_cancel is not None:
+            self.on_cancel(job)
+
+
+class Pipeline:
+    """Linear chain of Stages sharing one stop event."""
+
+    def __init__(self):
+        self.stop_event = threading.Event()
+        self.stages: Dict[str, Stage] = {}
+
+    def add(
+        self,
+        name: str,
+        handler: Callable[[Job], None],
+        maxsize: int,
+        on_cancel: Optional[Callable[[Job], None]] = None,
+    ) -> Stage:
+        stage = Stage(name, handler, maxsize=maxsize, stop=self.stop_event, on_cancel=on_cancel)
+        self.stages[name] = stage
+        return stage
+
+    def __getitem__(self, name: str) -> Stage:
+        return self.stages[name]
+
+    def start(self) -> None:
+        self.stop_event.clear()
+        for stage in self.stages.values():
+            stage.start()
+
+    def stop(self, timeout: float = 1.0) -> None:
+        self.stop_event.set()
+        for stage in self.stages.values():
+            stage.join(timeout=timeout)
+
+    def idle(self) -> bool:
+        return not any(stage.busy for stage in self.stages.values())
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        return {name: stage.stats.summary() for name, stage in self.stages.items()}
+
+    def metrics_lines(self) -> List[str]:
+        lines = []
+        for name, m in self.metrics().items():
+            lines.append(
+                f"{name:<10} n={m['items']:<4} p50={m['p50_ms']}ms p95={m['p95_ms']}ms "
+                f"blocked={m['blocked_s']}s max_q={m['max_queue_depth']} cancelled={m['cancelled']} errors={m['errors']}"
+            )
+        return lines
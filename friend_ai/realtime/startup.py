@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+
+@dataclass
+class PhaseTiming:
+    name: str
+    start_s: float  # seconds since the warmup began
+    end_s: Optional[float] = None
+    error: Optional[str] = None
+
+    @property
+    def duration_s(self) -> Optional[float]:
+        return None if self.end_s is None else self.end_s - self.start_s
+
+
+class Warmup:
+    """Builds components concurrently and records when each one was ready.
+
+    Model loading is dominated by native code (torch, llama.cpp, CTranslate2)
+    that releases the GIL, so a thread pool overlaps most of it.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self.t0 = time.perf_counter()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="warmup")
+        self._futures: Dict[str, Future] = {}
+        self._phases: Dict[str, PhaseTiming] = {}
+        self._lock = threading.Lock()
+
+    def _now(self) -> float:
+        return time.perf_counter() - self.t0
+
+    def submit(self, name: str, fn: Callable[[], Any]) -> Future:
+        def run():
+            phase = PhaseTiming(name=name, start_s=self._now())
+            with self._lock:
+                self._phases[name] = phase
+            try:
+                return fn()
+            except BaseException as exc:
+                phase.error = f"{type(exc).__name__}: {exc}"
+                raise
+            finally:
+                phase.end_s = self._now()
+
+        fut = self._pool.submit(run)
+        self._futures[name] = fut
+        return fut
+
+    def mark(self, name: str) -> None:
+        now = self._now()
+        with self._lock:
+            self._phases[name] = PhaseTiming(name=name, start_s=now, end_s=now)
+
+    def get(self, name: str, timeout: Optional[float] = None) -> Any:
+        return self._futures[name].result(timeout=timeout)
+
+    def done(self, name: str) -> bool:
+        return self._futures[name].done()
+
+    def wait_all(self, timeout: Optional[float] = None) -> None:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for fut in list(self._futures.values()):
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                fut.result(timeout=remaining)
+            except Exception:
+                pass
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def report(self) -> List[PhaseTiming]:
+        with self._lock:
+            return sorted(self._phases.values(), key=lambda p: p.start_s)
+
+    def report_lines(self) -> List[str]:
+        lines = []
+        for p in self.report():
+            if p.end_s is None:
+                lines.append(f"{p.name:<12} started {p.start_s:6.2f}s  (still running)")
+            elif p.duration_s == 0:
+                lines.append(f"{p.name:<12} at      {p.start_s:6.2f}s")
+            else:
+                status = f"  FAILED {p.error}" if p.error else ""
+                lines.append(f"{p.name:<12} {p.start_s:6.2f}s -> {p.end_s:6.2f}s  ({p.duration_s:.2f}s){status}")
+        return lines
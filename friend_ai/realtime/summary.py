@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, List, Optional, Sequence
+
+from friend_ai.llm import Message
+
+SUMMARY_PROMPT = (
+    "You keep a running summary of a spoken conversation between a user and their AI friend. "
+    "Merge the new dialogue into the summary. Keep facts about the user, their plans, feelings "
+    "and anything promised; drop small talk. Write plain sentences, no lists."
+)
+
+
+class RollingSummarizer:
+    """Folds turns that left the prompt window into a running summary.
+
+    Runs on its own thread and only starts while `can_run()` holds (the call
+    is idle). It checks between tokens and abandons the attempt as soon as a
+    new turn starts, retrying once the call is idle again; after
+    `max_deferrals` abandoned attempts it finishes the next one regardless,
+    so a busy call still gets its summary (one reply may then wait for it).
+    `lock` must be the lock reply generation holds, since the summary uses
+    the same model. Each finished summary replaces the previous one, in
+    memory too: it is stored with from=summary under the fixed `item_id`,
+    so only the latest one is ever recalled.
+    """
+
+    def __init__(
+        self,
+        llm: Callable[[], object],
+        memory: Callable[[], object],
+        lock: threading.Lock,
+        can_run: Callable[[], bool],
+        max_tokens: int = 160,
+        max_deferrals: int = 3,
+        idle_poll_s: float = 0.2,
+        item_id: str = "summary",
+    ):
+        self._llm = llm
+        self._memory = memory
+        self._llm_lock = lock
+        self.can_run = can_run
+        self.max_tokens = max_tokens
+        self.max_deferrals = max_deferrals
+        self.idle_poll_s = idle_poll_s
+        self.item_id = item_id
+        self.summary = ""
+        self.updates = 0
+        self.abandoned = 0
+        self._deferred = 0  # abandoned attempts since the last finished summary
+        self._pending: List = []  # DialogueTurn-like (role, text), oldest first
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="summarizer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+
+    def submit(self, turns: Sequence) -> None:
+        if not turns:
+            return
+        with self._cond:
+            self._pending.extend(turns)
+            self._cond.notify_all()
+
+    def _messages(self, turns: Sequence) -> List[Message]:
+        dialogue = "\n".join(f"{'User' if t.role == 'user' else 'Friend'}: {t.text}" for t in turns)
+        prior = self.summary or "(nothing yet)"
+        return [
+            Message(role="system", content=SUMMARY_PROMPT),
+            Message(role="user", content=f"Summary so far:\n{prior}\n\nNew dialogue:\n{dialogue}\n\nUpdated summary:"),
+        ]
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            with self._cond:
+                while not self._pending and not self._stop.is_set():
+                    self._cond.wait()
+                turns = list(self._pending)
+            if self._stop.is_set():
+                return
+            if not self.can_run():
+                self._stop.wait(self.idle_poll_s)
+                continue
+            text = self._generate(turns, preemptible=self._deferred < self.max_deferrals)
+            if text is None:
+                self.abandoned += 1
+                self._deferred += 1
+                continue
+            self._deferred = 0
+            with self._cond:
+                del self._pending[: len(turns)]
+            if text:
+                self.summary = text
+                self.updates += 1
+                self._memory().add(text, metadata={"from": "summary", "ts": time.time()}, item_id=self.item_id)
+
+    def _generate(self, turns: Sequence, preemptible: bool = True) -> Optional[str]:
+        """The new summary, or None if preempted by a turn."""
+        parts: List[str] = []
+        with self._llm_lock:
+            if not self.can_run():
+                return None
+            gen = self._llm().generate_stream(self._messages(turns))
+            try:
+                for tok in gen:
+                    parts.append(tok)
+                    if self._stop.is_set() or (preemptible and not self.can_run()):
+                        return None
+                    if len(parts) >= self.max_tokens:
+                        break
+            finally:
+                gen.close()
+        text = "".join(parts).strip()
+        if len(parts) >= self.max_tokens and "." in text:
+            text = text[: text.rfind(".") + 1]  # drop the unfinished sentence
+        return text
@@ -0,0 +1,66 @@
+import argparse
+import glob
+import json
+import os
+
+from rich import print
+from rich.table import Table
+
+from friend_ai.bench import ReplaySession, run_replay
+from friend_ai.bench.replay import STUBBABLE
+
+
+def _fmt(value) -> str:
+    if value is None:
+        return "-"
+    return f"{value:.3f}" if isinstance(value, float) else str(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded WAV utterances through the full call pipeline, headless")
+    parser.add_argument("inputs", nargs="+", help="WAV files or directories of WAV files (played in sorted order)")
+    parser.add_argument(
+        "--stub", nargs="*", choices=STUBBABLE, default=[], help="Replace these models with deterministic stubs"
+    )
+    parser.add_argument("--speed", type=float, default=1.0, help="Audio feed rate relative to real time")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Max seconds to wait for each reply")
+    parser.add_argument("--json", type=str, default=None, help="Also write the full report as JSON")
+    parser.add_argument("--trace", type=str, default=None, help="Write a Chrome-trace JSON of the run")
+    args = parser.parse_args()
+
+    wavs = []
+    for item in args.inputs:
+        wavs.extend(sorted(glob.glob(os.path.join(item, "*.wav"))) if os.path.isdir(item) else [item])
+    if not wavs:
+        parser.error("no WAV files found")
+
+    session = ReplaySession(stubs=args.stub)
+    report = run_replay(session, wavs, speed=args.speed, turn_timeout_s=args.timeout)
+
+    summary = Table(title=f"replay: {report.files} files, {report.turns} turns, stubs={args.stub or 'none'}")
+    summary.add_column("metric")
+    summary.add_column("value")
+    for key in ("wall_s", "speech_s", "tts_audio_s", "stt_rtf", "tts_rtf", "cpu_s", "cpu_util", "rss_mb", "peak_rss_mb"):
+        summary.add_row(key, _fmt(getattr(report, key)))
+    summary.add_row("interrupted / timeouts", f"{report.interrupted} / {report.timeouts}")
+    print(summary)
+
+    for section, rows in report.latency.items():
+        table = Table(title=section)
+        for col in ("span", "n", "p50 ms", "p95 ms", "p99 ms"):
+            table.add_column(col)
+        for name, h in rows.items():
+            table.add_row(name, str(h["count"]), _fmt(h["p50_ms"]), _fmt(h["p95_ms"]), _fmt(h["p99_ms"]))
+        print(table)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report.as_dict(), f, indent=2)
+    if args.trace:
+        from friend_ai import tracing
+
+        tracing.get_tracer().export_chrome(args.trace)
+
+
+if __name__ == "__main__":
+    main()
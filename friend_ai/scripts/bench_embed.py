@@ -0,0 +1,158 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+from rich import print
+from rich.table import Table
+
+from friend_ai.config import Config
+from friend_ai.memory.embeddings import ENGINES, MicroBatcher, create_embedder
+
+WORDS = (
+    "i you we my sister dog job work dinner friday yesterday tomorrow remember told about the a new old "
+    "really think feel tired happy going to went meeting doctor trip weekend music book movie coffee "
+    "night shift morning call back later kids school garden rain weather plan"
+).split()
+
+
+def _texts(n: int, seed: int) -> list:
+    rng = np.random.default_rng(seed)
+    return [" ".join(rng.choice(WORDS, size=int(rng.integers(3, 30)))) for _ in range(n)]
+
+
+def _probe(engine: str, model: str, onnx_dir: str, args) -> dict:
+    # Runs in a fresh interpreter so load time, RSS and the torch check only see this engine.
+    t0 = time.perf_counter()
+    embed = create_embedder(engine, model, onnx_dir)
+    embed(["warmup"])
+    load_s = time.perf_counter() - t0
+
+    lat = []
+    for text in _texts(args.queries, seed=1):
+        t = time.perf_counter()
+        embed([text])
+        lat.append(time.perf_counter() - t)
+    lat_ms = np.array(lat) * 1000.0
+
+    bulk = _texts(args.bulk, seed=2)
+    t = time.perf_counter()
+    for start in range(0, len(bulk), args.batch):
+        embed(bulk[start : start + args.batch])
+    bulk_per_s = len(bulk) / (time.perf_counter() - t)
+
+    # Many callers with one text each, as retrieval and the writer issue them.
+    per_client = _texts(args.clients * args.per_client, seed=3)
+    results = {}
+    for name, fn in (("direct", embed), ("batched", MicroBatcher(embed, max_batch=args.batch, max_wait_ms=args.wait_ms))):
+        lock = threading.Lock()
+
+        def client(i: int) -> None:
+            for text in per_client[i :: args.clients]:
+                if fn is embed:
+                    with lock:  # the model is not shared between threads without a batcher
+                        fn([text])
+                else:
+                    fn([text])
+
+        threads = [threading.Thread(target=client, args=(i,)) for i in range(args.clients)]
+        t = time.perf_counter()
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+        results[name] = len(per_client) / (time.perf_counter() - t)
+        if fn is not embed:
+            results["avg_batch"] = fn.requests / max(1, fn.batches)
+
+    from friend_ai.memory.onnx_embedder import CHECK_TEXTS
+
+    return {
+        "load_s": load_s,
+        "p50_ms": float(np.percentile(lat_ms, 50)),
+        "p95_ms": float(np.percentile(lat_ms, 95)),
+        "bulk_per_s": bulk_per_s,
+        "concurrent_direct_per_s": results["direct"],
+        "concurrent_batched_per_s": results["batched"],
+        "avg_batch": results["avg_batch"],
+        "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,
+        "torch_loaded": "torch" in sys.modules,
+        "vectors": np.asarray(embed(list(CHECK_TEXTS) + _texts(50, seed=4))).tolist(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare embedding engines: latency, throughput, RSS, agreement")
+    parser.add_argument("--config", default="config.yaml")
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=ENGINES)
+    parser.add_argument("--queries", type=int, default=200, help="Single-text calls for the latency percentiles")
+    parser.add_argument("--bulk", type=int, default=2048, help="Texts embedded for the bulk throughput")
+    parser.add_argument("--batch", type=int, default=64)
+    parser.add_argument("--clients", type=int, default=8, help="Threads issuing single-text calls concurrently")
+    parser.add_argument("--per_client", type=int, default=50)
+    parser.add_argument("--wait_ms", type=float, default=2.0, help="Micro-batcher wait in the concurrent test")
+    parser.add_argument("--_probe", metavar="ENGINE", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    cfg = Config.load(args.config)
+    model = cfg.memory.embedding_model
+    onnx_dir = os.path.join(cfg.app.cache_dir, "onnx")
+    if args._probe:
+        sys.stdout.write(json.dumps(_probe(args._probe, model, onnx_dir, args)) + "\n")
+        return
+
+    if any(e != "torch" for e in args.engines):
+        # Export (needs torch) here, so the probes time loading an existing export.
+        from friend_ai.memory.onnx_embedder import META_FILE, export_onnx, model_dir
+
+        path = model_dir(onnx_dir, model)
+        if not os.path.exists(os.path.join(path, META_FILE)):
+            print(f"[bold]exporting[/bold] {model} -> {path}")
+            export_onnx(model, path)
+
+    reports = {}
+    for engine in args.engines:
+        cmd = [
+            sys.executable, "-m", "friend_ai.scripts.bench_embed", "--config", args.config,
+            "--queries", str(args.queries), "--bulk", str(args.bulk), "--batch", str(args.batch),
+            "--clients", str(args.clients), "--per_client", str(args.per_client), "--wait_ms", str(args.wait_ms),
+            "--_probe", engine,
+        ]
+        out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+        reports[engine] = json.loads(out.strip().splitlines()[-1])
+
+    table = Table(title=f"embedding engines, {model}")
+    for col in (
+        "engine", "load s", "single p50 ms", "single p95 ms", f"bulk texts/s (batch {args.batch})",
+        f"{args.clients} clients texts/s", "… micro-batched", "RSS MB", "torch loaded", "min cos vs torch",
+    ):
+        table.add_column(col)
+    ref = np.asarray(reports["torch"]["vectors"]) if "torch" in reports else None
+    for engine, r in reports.items():
+        cos = "-"
+        if ref is not None:
+            vec = np.asarray(r["vectors"])
+            sims = np.sum(ref * vec, axis=1) / (np.linalg.norm(ref, axis=1) * np.linalg.norm(vec, axis=1))
+            cos = f"{sims.min():.4f}"
+        table.add_row(
+            engine,
+            f"{r['load_s']:.2f}",
+            f"{r['p50_ms']:.2f}",
+            f"{r['p95_ms']:.2f}",
+            f"{r['bulk_per_s']:.0f}",
+            f"{r['concurrent_direct_per_s']:.0f}",
+            f"{r['concurrent_batched_per_s']:.0f} (avg batch {r['avg_batch']:.1f})",
+            f"{r['rss_mb']:.0f}",
+            "yes" if r["torch_loaded"] else "no",
+            cos,
+        )
+    print(table)
+
+
+if __name__ == "__main__":
+    main()
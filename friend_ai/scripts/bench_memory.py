@@ -0,0 +1,115 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+from rich import print
+from rich.table import Table
+
+from friend_ai.memory.backends import create_backend
+
+COLLECTION = "bench"
+
+
+def _synthetic(n: int, dim: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return rng.standard_normal((n, dim)).astype(np.float32)
+
+
+def _build(backend: str, path: str, vectors: np.ndarray, dtype: str, batch: int) -> float:
+    t0 = time.perf_counter()
+    store = create_backend(backend, persist_dir=path, collection_name=COLLECTION, vector_dtype=dtype)
+    for start in range(0, len(vectors), batch):
+        chunk = vectors[start : start + batch]
+        ids = [f"m{start + i}" for i in range(len(chunk))]
+        texts = [f"memory {start + i}" for i in range(len(chunk))]
+        store.add(ids, texts, chunk.tolist(), [{"i": start + i} for i in range(len(chunk))])
+    return time.perf_counter() - t0
+
+
+def _probe(backend: str, path: str, dtype: str, dim: int, queries: int, top_k: int) -> dict:
+    # Runs in a fresh interpreter so load time and RSS are not polluted by the build.
+    t0 = time.perf_counter()
+    store = create_backend(backend, persist_dir=path, collection_name=COLLECTION, vector_dtype=dtype)
+    count = store.count()
+    load_s = time.perf_counter() - t0
+    qs = _synthetic(queries, dim, seed=1)
+    lat = []
+    results = []
+    for q in qs:
+        t = time.perf_counter()
+        hits = store.query(q.tolist(), top_k)
+        lat.append(time.perf_counter() - t)
+        results.append([h.id for h in hits])
+    lat_ms = np.array(lat) * 1000.0
+    return {
+        "count": count,
+        "load_s": load_s,
+        "p50_ms": float(np.percentile(lat_ms, 50)),
+        "p95_ms": float(np.percentile(lat_ms, 95)),
+        "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare memory backends: load time, query latency, RSS")
+    parser.add_argument("--n", type=int, default=20000, help="Number of stored vectors")
+    parser.add_argument("--dim", type=int, default=384, help="Embedding dimension (all-MiniLM-L6-v2 = 384)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top_k", type=int, default=5)
+    parser.add_argument("--batch", type=int, default=1000, help="Vectors per add() call while building")
+    parser.add_argument("--backends", nargs="+", default=["chroma", "numpy"])
+    parser.add_argument("--dtype", default="float32", help="Vector dtype for the numpy backend")
+    parser.add_argument("--dir", default=None, help="Work directory (default: a temp dir)")
+    parser.add_argument("--_probe", nargs=2, metavar=("BACKEND", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args._probe:
+        backend, path = args._probe
+        sys.stdout.write(json.dumps(_probe(backend, path, args.dtype, args.dim, args.queries, args.top_k)) + "\n")
+        return
+
+    workdir = args.dir or tempfile.mkdtemp(prefix="friend-ai-bench-")
+    vectors = _synthetic(args.n, args.dim, seed=0)
+    table = Table(title=f"memory backends, n={args.n} dim={args.dim} top_k={args.top_k}")
+    for col in ("backend", "build s", "load s", "query p50 ms", "query p95 ms", "RSS MB", "recall@k vs numpy"):
+        table.add_column(col)
+    reports = {}
+    for backend in args.backends:
+        path = os.path.join(workdir, backend)
+        build_s = _build(backend, path, vectors, args.dtype, args.batch)
+        cmd = [
+            sys.executable, "-m", "friend_ai.scripts.bench_memory",
+            "--dim", str(args.dim), "--queries", str(args.queries), "--top_k", str(args.top_k),
+            "--dtype", args.dtype, "--_probe", backend, path,
+        ]
+        out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+        report = json.loads(out.strip().splitlines()[-1])
+        report["build_s"] = build_s
+        reports[backend] = report
+    exact = reports.get("numpy", {}).get("results")
+    for backend, r in reports.items():
+        recall = "-"
+        if exact is not None:
+            hits = sum(len(set(a) & set(b)) for a, b in zip(r["results"], exact))
+            recall = f"{hits / max(1, sum(len(b) for b in exact)):.3f}"
+        table.add_row(
+            backend,
+            f"{r['build_s']:.2f}",
+            f"{r['load_s']:.3f}",
+            f"{r['p50_ms']:.2f}",
+            f"{r['p95_ms']:.2f}",
+            f"{r['rss_mb']:.0f}",
+            recall,
+        )
+    print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,15 +2,31 @@ import argparse
 import time
 from rich import print
 
+from friend_ai import tracing
+from friend_ai.config import ConfigLoader
 from friend_ai.realtime import CallSession
+from friend_ai.server import ModelClient
 
 
 def main():
     parser = argparse.ArgumentParser(description="Start a full-duplex voice call with your AI friend")
     parser.add_argument("--duration", type=int, default=0, help="Optional max duration in seconds (0 = until Ctrl+C)")
+    parser.add_argument("--timings", action="store_true", help="Print startup phases and per-turn stage timings when the call ends")
+    parser.add_argument("--trace", type=str, default=None, help="Write a Chrome-trace JSON of every span to this path")
+    parser.add_argument(
+        "--session", type=str, default=None, help="Session name: own memory namespace, fair share of a shared daemon"
+    )
+    parser.add_argument("--local", action="store_true", help="Load models in-process even if the daemon is running")
     args = parser.parse_args()
+    if args.timings or args.trace:
+        tracing.enable()
 
-    session = CallSession()
+    client = None if args.local else ModelClient(ConfigLoader.load().app.socket_path, session=args.session)
+    if client is not None and client.available():
+        print("[dim]Using models from the running daemon.[/dim]")
+    else:
+        client = None
+    session = CallSession(remote=client, session=args.session)
     print("[bold green]Starting call. Speak any time. Press Ctrl+C to end.[/bold green]")
     session.start()
     try:
@@ -24,6 +40,24 @@ def main():
     finally:
         session.stop()
         print("[bold yellow]Call ended.[/bold yellow]")
+        if args.timings:
+            print("[bold]Startup[/bold]")
+            for line in session.warmup.report_lines():
+                print(f"  {line}")
+            for idx, t in enumerate(session.timings, start=1):
+                stats = t.llm_stats
+                cache = f" prompt={stats.prompt_tokens} cached={stats.cached_tokens}" if stats else ""
+                flag = " (interrupted)" if t.cancelled else ""
+                print(f"turn {idx}: {t.as_ms()}{cache}{flag}")
+            print("[bold]Pipeline stages[/bold]")
+            for line in session.pipeline.metrics_lines():
+                print(f"  {line}")
+            print("[bold]Latency (trace)[/bold]")
+            for line in tracing.get_tracer().summary_lines():
+                print(f"  {line}")
+        if args.trace:
+            tracing.get_tracer().export_chrome(args.trace)
+            print(f"Trace written to {args.trace} (open in chrome://tracing or ui.perfetto.dev)")
 
 
 if __name__ == "__main__":
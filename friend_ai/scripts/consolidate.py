@@ -0,0 +1,40 @@
+import argparse
+
+from rich import print
+
+from friend_ai import components
+from friend_ai.config import ConfigLoader
+from friend_ai.memory.consolidate import ConsolidationReport
+from friend_ai.server import ModelClient, RemoteMemoryStore
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Consolidate the memory store: merge near-duplicates, expire fillers, compact the index"
+    )
+    parser.add_argument("--dry_run", action="store_true", help="Report what would change without writing")
+    parser.add_argument("--examples", action="store_true", help="Show a few merged clusters")
+    parser.add_argument("--local", action="store_true", help="Open the store in-process even if the daemon is running")
+    args = parser.parse_args()
+
+    cfg = ConfigLoader.load()
+    client = None if args.local else ModelClient(cfg.app.socket_path)
+    if client is not None and client.available():
+        # The daemon owns the store while it runs; let it do the work.
+        report = ConsolidationReport(**RemoteMemoryStore(client).consolidate(dry_run=args.dry_run))
+    else:
+        store = components.build_memory_store(cfg)
+        report = components.build_consolidator(cfg, store).run(dry_run=args.dry_run)
+
+    print(f"[green]{report.line()}[/green]")
+    if args.examples:
+        for ex in report.examples:
+            print(f"  [bold]{ex['canonical']}[/bold]")
+            for member in ex["members"]:
+                print(f"    - {member}")
+    if args.dry_run:
+        print("[dim]dry run: nothing was written[/dim]")
+
+
+if __name__ == "__main__":
+    main()
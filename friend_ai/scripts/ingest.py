@@ -0,0 +1,63 @@
+import argparse
+import os
+
+from rich import print
+
+from friend_ai import components
+from friend_ai.config import ConfigLoader
+from friend_ai.memory import MemoryNamespace
+from friend_ai.memory.ingest import Ingestor, Manifest, iter_documents
+from friend_ai.server import ModelClient, RemoteMemoryStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load chat logs, notes and journals into the memory store")
+    parser.add_argument("paths", nargs="+", help=".jsonl, .md or .txt files, or directories of them")
+    parser.add_argument("--batch", type=int, default=256, help="Chunks per embedding batch / write")
+    parser.add_argument("--workers", type=int, default=2, help="Embedding threads")
+    parser.add_argument("--chunk_chars", type=int, default=800, help="Maximum characters per stored chunk")
+    parser.add_argument("--tag", default="ingest", help="Value of the 'from' metadata field")
+    parser.add_argument("--namespace", default=None, help="Session memory namespace to load into (default: shared)")
+    parser.add_argument("--restart", action="store_true", help="Forget which chunks were already ingested")
+    parser.add_argument("--local", action="store_true", help="Load models in-process even if the daemon is running")
+    args = parser.parse_args()
+
+    cfg = ConfigLoader.load()
+    client = None if args.local else ModelClient(cfg.app.socket_path)
+    if client is not None and client.available():
+        store = RemoteMemoryStore(client, namespace=args.namespace)
+        embed_fn = store.embed
+        print("[dim]using the model daemon[/dim]")
+    else:
+        store = components.build_memory_store(cfg)
+        embed_fn = store.embedding_function
+        if args.namespace:
+            store = MemoryNamespace(store, args.namespace)
+
+    scope = f"{cfg.memory.collection_name}-{args.namespace}" if args.namespace else cfg.memory.collection_name
+    manifest_path = os.path.join(cfg.app.db_dir, f"ingest-{scope}.manifest")
+    if args.restart and os.path.exists(manifest_path):
+        os.remove(manifest_path)
+    manifest = Manifest(manifest_path)
+    if manifest.hashes:
+        print(f"resuming: {len(manifest.hashes)} chunks already ingested")
+    ingestor = Ingestor(
+        store,
+        manifest=manifest,
+        embed_fn=embed_fn,
+        batch_size=args.batch,
+        workers=args.workers,
+        chunk_chars=args.chunk_chars,
+        source_tag=args.tag,
+        id_prefix=f"ingest-{args.namespace}" if args.namespace else "ingest",
+    )
+    try:
+        report = ingestor.ingest(iter_documents(args.paths), progress=lambda r: print(f"[dim]{r.line()}[/dim]"))
+    finally:
+        manifest.close()
+    print(f"[green]{report.line()}[/green]")
+    print(f"collection now holds {store.count()} memories")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+import argparse
+import glob
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from rich import print
+from rich.table import Table
+
+from friend_ai.bench import ReplaySession, run_replay
+from friend_ai.bench.replay import STUBBABLE
+from friend_ai.config import ConfigLoader
+from friend_ai.server import ModelClient
+from friend_ai.tracing import percentile
+
+
+def _fmt(value) -> str:
+    if value is None:
+        return "-"
+    return f"{value:.1f}" if isinstance(value, float) else str(value)
+
+
+def _jain(values) -> float:
+    """Jain's fairness index: 1.0 when every client sees the same latency, 1/n at worst."""
+    values = [v for v in values if v is not None]
+    if not values:
+        return 0.0
+    return sum(values) ** 2 / (len(values) * sum(v * v for v in values))
+
+
+def _spawn_daemon(path: str, db_dir: str, timeout_s: float) -> subprocess.Popen:
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "friend_ai.scripts.serve", "--socket", path, "--db_dir", db_dir],
+        stdout=subprocess.DEVNULL,
+    )
+    client = ModelClient(path)
+    deadline = time.perf_counter() + timeout_s
+    while time.perf_counter() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("model daemon exited during startup")
+        try:
+            if all(client.call("ping", _timeout=1.0)["models"].values()):
+                return proc
+        except OSError:
+            pass
+        time.sleep(0.5)
+    proc.terminate()
+    raise RuntimeError(f"model daemon not ready after {timeout_s:.0f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load-test one model daemon with several simulated callers replaying WAV files"
+    )
+    parser.add_argument("inputs", nargs="+", help="WAV files or directories of WAV files")
+    parser.add_argument("--clients", type=int, default=4, help="Concurrent simulated sessions")
+    parser.add_argument("--stagger", type=float, default=0.5, help="Seconds between client start times")
+    parser.add_argument(
+        "--stub", nargs="*", choices=STUBBABLE, default=[], help="Replace these models with stubs in the clients"
+    )
+    parser.add_argument("--speed", type=float, default=1.0, help="Audio feed rate relative to real time")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Max seconds to wait for each reply")
+    parser.add_argument(
+        "--socket", type=str, default=None,
+        help="Use the daemon already listening here (its store gets the load-* namespaces) instead of starting one",
+    )
+    parser.add_argument("--startup_timeout", type=float, default=600.0)
+    parser.add_argument("--json", type=str, default=None, help="Also write per-client reports and server stats")
+    args = parser.parse_args()
+
+    wavs = []
+    for item in args.inputs:
+        wavs.extend(sorted(glob.glob(os.path.join(item, "*.wav"))) if os.path.isdir(item) else [item])
+    if not wavs:
+        parser.error("no WAV files found")
+
+    cfg = ConfigLoader.load()
+    workdir = tempfile.TemporaryDirectory(prefix="friend_ai_load_")
+    proc = None
+    path = args.socket
+    if path is None:
+        # Own daemon with a throwaway memory store, so the run leaves no trace.
+        path = os.path.join(workdir.name, "daemon.sock")
+        print(f"[dim]starting a model daemon on {path}[/dim]")
+        proc = _spawn_daemon(path, os.path.join(workdir.name, "db"), args.startup_timeout)
+    elif not ModelClient(path).available():
+        parser.error(f"no daemon listening on {path}")
+
+    run = f"load-{os.getpid()}"
+    names = [f"{run}-{i}" for i in range(args.clients)]
+    reports = {}
+
+    def client(i: int) -> None:
+        time.sleep(i * args.stagger)
+        remote = ModelClient(path, session=names[i])
+        session = ReplaySession(cfg=cfg, stubs=args.stub, remote=remote, session=names[i])
+        # Rotated so the clients are not saying the same thing at the same time.
+        order = wavs[i % len(wavs) :] + wavs[: i % len(wavs)]
+        reports[names[i]] = run_replay(session, order, speed=args.speed, turn_timeout_s=args.timeout)
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(args.clients)]
+    try:
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+        wall_s = time.perf_counter() - t0
+        stats = ModelClient(path).stats()
+    finally:
+        if proc is not None:
+            proc.send_signal(signal.SIGINT)
+            try:
+                proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        workdir.cleanup()
+
+    table = Table(title=f"{args.clients} clients x {len(wavs)} files, {wall_s:.1f}s, stubs={args.stub or 'none'}")
+    for col in ("session", "turns", "timeouts", "first token p50 ms", "first audio p50 ms", "first audio p95 ms"):
+        table.add_column(col)
+    means, all_ttfa = [], []
+    for name in names:
+        r = reports.get(name)
+        if r is None:
+            table.add_row(name, "failed", "-", "-", "-", "-")
+            continue
+        ttfa = [t["playback_start"] for t in r.turn_ms if t["playback_start"] is not None]
+        first = [t["llm_first_token"] for t in r.turn_ms if t["llm_first_token"] is not None]
+        all_ttfa.extend(ttfa)
+        means.append(sum(ttfa) / len(ttfa) if ttfa else None)
+        table.add_row(
+            name, str(r.turns), str(r.timeouts),
+            _fmt(percentile(first, 50)), _fmt(percentile(ttfa, 50)), _fmt(percentile(ttfa, 95)),
+        )
+    print(table)
+    print(
+        f"first audio over all turns: p50 {_fmt(percentile(all_ttfa, 50))} ms, p95 {_fmt(percentile(all_ttfa, 95))} ms; "
+        f"fairness (Jain, mean per client) {_jain(means):.3f}"
+    )
+
+    waits = Table(title="daemon model locks (wait per request)")
+    for col in ("model", "session", "grants", "wait p50 ms", "wait p95 ms", "held s"):
+        waits.add_column(col)
+    for model, sessions in stats["locks"].items():
+        for name, s in sorted(sessions.items()):
+            waits.add_row(
+                model, name, str(s["grants"]), _fmt(s["wait_p50_ms"]), _fmt(s["wait_p95_ms"]), _fmt(s["held_s"])
+            )
+    print(waits)
+    for name, b in stats["batches"].items():
+        print(f"{name}: {b['requests']} requests in {b['batches']} batches (avg {b['avg_batch']:.2f})")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"clients": {n: r.as_dict() for n, r in reports.items()}, "server": stats}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
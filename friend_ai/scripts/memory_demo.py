@@ -1,9 +1,11 @@
 import argparse
 import os
+import time
 from rich import print
 
+from friend_ai import components
 from friend_ai.config import ConfigLoader
-from friend_ai.memory import MemoryStore
+from friend_ai.server import ModelClient, RemoteMemoryStore
 
 
 def main():
@@ -11,25 +13,27 @@ def main():
     parser.add_argument("--text", type=str, help="Text to store as a memory")
     parser.add_argument("--query", type=str, help="Query text for semantic search")
     parser.add_argument("--top_k", type=int, default=None, help="Number of results to return")
+    parser.add_argument("--local", action="store_true", help="Load models in-process even if the daemon is running")
     args = parser.parse_args()
 
     cfg = ConfigLoader.load()
 
-    store = MemoryStore(
-        persist_dir=cfg.app.db_dir,
-        collection_name=cfg.memory.collection_name,
-        embedding_model=cfg.memory.embedding_model,
-    )
+    client = None if args.local else ModelClient(cfg.app.socket_path)
+    if client is not None and client.available():
+        store = RemoteMemoryStore(client)
+    else:
+        store = components.build_memory_store(cfg)
 
     if args.text:
-        item = store.add(args.text, metadata={"source": "user"})
+        item = store.add(args.text, metadata={"source": "user", "from": "user", "ts": time.time()})
         print({"added": item})
     if args.query:
         top_k = args.top_k or cfg.memory.top_k_default
         results = store.query(args.query, top_k=top_k)
         for idx, item in enumerate(results, start=1):
-            print(f"{idx}. {item.text}  [id={item.id}]")
+            score = f" score={item.score:.3f}" if item.score is not None else ""
+            print(f"{idx}. {item.text}  [id={item.id}{score}]")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,32 @@
+import argparse
+import dataclasses
+
+from rich import print
+
+from friend_ai.config import ConfigLoader
+from friend_ai.server.daemon import ALL_MODELS, serve
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep models resident and serve them to the CLI scripts over a Unix socket")
+    parser.add_argument("--socket", type=str, default=None, help="Socket path (default: app.socket_path)")
+    parser.add_argument(
+        "--models", nargs="+", choices=ALL_MODELS, default=list(ALL_MODELS), help="Models to load and serve"
+    )
+    parser.add_argument("--db_dir", type=str, default=None, help="Memory store directory (default: app.db_dir)")
+    args = parser.parse_args()
+
+    cfg = ConfigLoader.load()
+    if args.db_dir:
+        cfg = dataclasses.replace(cfg, app=dataclasses.replace(cfg.app, db_dir=args.db_dir))
+    path = args.socket or cfg.app.socket_path
+    print(f"[bold green]Serving {', '.join(args.models)} on {path}. Press Ctrl+C to stop.[/bold green]")
+    try:
+        serve(cfg, socket_path=path, models=args.models)
+    except KeyboardInterrupt:
+        pass
+    print("[bold yellow]Daemon stopped.[/bold yellow]")
+
+
+if __name__ == "__main__":
+    main()
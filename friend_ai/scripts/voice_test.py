@@ -3,23 +3,25 @@ import os
 import time
 from rich import print
 
+from friend_ai import components
 from friend_ai.config import ConfigLoader
-from friend_ai.tts import CoquiXTTS
+from friend_ai.server import ModelClient, RemoteTTS
 
 
 def main():
     parser = argparse.ArgumentParser(description="Generate TTS audio using a cloned voice sample")
     parser.add_argument("--text", type=str, required=True, help="Text to synthesize")
     parser.add_argument("--out", type=str, default=None, help="Output wav path")
+    parser.add_argument("--local", action="store_true", help="Load models in-process even if the daemon is running")
     args = parser.parse_args()
 
     cfg = ConfigLoader.load()
 
-    tts = CoquiXTTS(
-        model_name=cfg.tts.model_name,
-        device=cfg.app.device,
-        default_sample_rate=cfg.tts.sample_rate,
-    )
+    client = None if args.local else ModelClient(cfg.app.socket_path)
+    if client is not None and client.available():
+        tts = RemoteTTS(client)
+    else:
+        tts = components.build_tts(cfg, save_audio=False)
 
     out_path = args.out or os.path.join(
         cfg.app.audio_out_dir, f"tts-{time.strftime('%Y%m%d-%H%M%S')}.wav"
@@ -30,7 +32,6 @@ def main():
         speaker_ref_wav=cfg.tts.speaker_ref_wav,
         language=cfg.tts.voice_clone_language,
         output_path=out_path,
-        sample_rate=cfg.tts.sample_rate,
     )
 
     print({"audio_path": result.audio_path, "duration_s": round(result.duration_s, 2)})
@@ -0,0 +1,3 @@
+from .client import DaemonError, ModelClient, RemoteLLM, RemoteMemoryStore, RemoteTTS, RemoteWhisper
+
+__all__ = ["DaemonError", "ModelClient", "RemoteLLM", "RemoteMemoryStore", "RemoteTTS", "RemoteWhisper"]
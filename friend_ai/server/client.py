@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import os
+import socket
+from typing import Any, Dict, Generator, Iterator, List, Optional
+
+import numpy as np
+
+from friend_ai.llm import GenerationStats, Message
+from friend_ai.memory import MemoryItem
+from friend_ai.stt import Word
+
+from .protocol import decode_array, dumps, encode_array, read_messages
+
+
+class DaemonError(RuntimeError):
+    pass
+
+
+class ModelClient:
+    """Talks to a running `friend_ai.scripts.serve` daemon.
+
+    Every request uses its own connection, so one client can be shared by
+    several threads (STT worker, memory writer, response loop). `session`
+    names the conversation the requests belong to; the daemon schedules its
+    models fairly across sessions.
+    """
+
+    def __init__(self, socket_path: str, timeout: Optional[float] = None, session: Optional[str] = None):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.session = session
+
+    def available(self) -> bool:
+        try:
+            self.call("ping", _timeout=1.0)
+            return True
+        except (OSError, DaemonError):
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-session scheduling and batching counters of the daemon."""
+        return self.call("server.stats")
+
+    def _request(self, op: str, args: Dict[str, Any], timeout: Optional[float]) -> Iterator[Dict[str, Any]]:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout if timeout is not None else self.timeout)
+            sock.connect(self.socket_path)
+            request: Dict[str, Any] = {"op": op, "args": args}
+            if self.session:
+                request["session"] = self.session
+            sock.sendall(dumps(request))
+            with sock.makefile("rb") as rfile:
+                yield from read_messages(rfile)
+
+    def call(self, op: str, _timeout: Optional[float] = None, **args) -> Any:
+        for msg in self._request(op, args, _timeout):
+            if "chunk" in msg:
+                continue
+            if not msg.get("ok"):
+                raise DaemonError(msg.get("error", "unknown error"))
+            return msg.get("result")
+        raise DaemonError(f"daemon closed the connection during '{op}'")
+
+    def stream(self, op: str, **args) -> Generator[Any, None, Any]:
+        """Yields chunks; the final result is the generator's return value."""
+        for msg in self._request(op, args, None):
+            if "chunk" in msg:
+                yield msg["chunk"]
+                continue
+            if not msg.get("ok"):
+                raise DaemonError(msg.get("error", "unknown error"))
+            return msg.get("result")
+        raise DaemonError(f"daemon closed the connection during '{op}'")
+
+
+# Proxies with the same surface CallSession and the scripts use on the local classes.
+
+
+class RemoteMemoryStore:
+    def __init__(self, client: ModelClient, namespace: Optional[str] = None):
+        # With a namespace this behaves like MemoryNamespace on the daemon's store.
+        self.client = client
+        self.namespace = namespace
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        return self.client.call("memory.embed", texts=list(texts))
+
+    def add_many(self, texts, metadatas=None, ids=None, embeddings=None) -> List[MemoryItem]:
+        ids = self.client.call(
+            "memory.add_many",
+            texts=list(texts),
+            metadatas=metadatas,
+            ids=ids,
+            embeddings=embeddings,
+            namespace=self.namespace,
+        )
+        metadatas = metadatas or [None] * len(texts)
+        return [MemoryItem(id=i, text=t, metadata=m) for i, t, m in zip(ids, texts, metadatas)]
+
+    def add(self, text: str, metadata=None, item_id=None, embedding=None) -> MemoryItem:
+        return self.add_many([text], [metadata], [item_id] if item_id else None, [embedding])[0]
+
+    def query(self, query_text: str, top_k: int = 5, embedding=None, where=None) -> List[MemoryItem]:
+        rows = self.client.call(
+            "memory.query",
+            query_text=query_text,
+            top_k=top_k,
+            embedding=embedding,
+            where=where,
+            namespace=self.namespace,
+        )
+        return [MemoryItem(**row) for row in rows]
+
+    def count(self) -> int:
+        return self.client.call("memory.count")
+
+    def consolidate(self, dry_run: bool = False) -> Dict[str, Any]:
+        return self.client.call("memory.consolidate", dry_run=dry_run)
+
+
+class RemoteLLM:
+    def __init__(self, client: ModelClient):
+        self.client = client
+        self.last_stats = GenerationStats()
+
+    def count_tokens(self, text: str) -> int:
+        return self.client.call("llm.count_tokens", text=text)
+
+    def generate(self, messages: List[Message]) -> str:
+        out = self.client.call("llm.generate", messages=[m.__dict__ for m in messages])
+        self.last_stats = GenerationStats(**out["stats"])
+        return out["text"]
+
+    def generate_stream(self, messages: List[Message]) -> Iterator[str]:
+        result = yield from self.client.stream("llm.generate_stream", messages=[m.__dict__ for m in messages])
+        if result:
+            self.last_stats = GenerationStats(**result["stats"])
+
+
+class RemoteTTS:
+    sink = None
+
+    def __init__(self, client: ModelClient, default_sample_rate: int = 24000):
+        self.client = client
+        self.sample_rate = default_sample_rate
+
+    def warm_voice(self, speaker_ref_wav: str) -> None:
+        pass
+
+    def synthesize_stream(self, text: str, speaker_ref_wav: str, language: str = "en") -> Iterator[np.ndarray]:
+        for chunk in self.client.stream(
+            "tts.synthesize_stream", text=text, speaker_ref_wav=os.path.abspath(speaker_ref_wav), language=language
+        ):
+            self.sample_rate = chunk["sample_rate"]
+            yield decode_array(chunk["audio"])
+
+    def synthesize(self, text: str, speaker_ref_wav: str, language: str = "en") -> np.ndarray:
+        parts = list(self.synthesize_stream(text, speaker_ref_wav, language))
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.float32)
+
+    def synthesize_to_file(self, text, speaker_ref_wav, language="en", output_path=None, sample_rate=None):
+        from friend_ai.tts.coqui_xtts import TTSResult
+
+        res = self.client.call(
+            "tts.synthesize_to_file",
+            text=text,
+            speaker_ref_wav=os.path.abspath(speaker_ref_wav),
+            language=language,
+            # Paths are resolved here because the daemon may run from another directory.
+            output_path=os.path.abspath(output_path) if output_path else None,
+        )
+        return TTSResult(**res)
+
+
+class RemoteWhisper:
+    def __init__(self, client: ModelClient):
+        self.client = client
+
+    def decode_words(self, audio_np: np.ndarray) -> List[Word]:
+        rows = self.client.call("stt.decode_words", audio=encode_array(audio_np))
+        return [Word(**row) for row in rows]
@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import dataclasses
+import os
+import socketserver
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+from friend_ai import components
+from friend_ai.config import Config
+from friend_ai.llm import Message
+from friend_ai.memory import MemoryNamespace
+from friend_ai.memory.embeddings import MicroBatcher
+from friend_ai.realtime.startup import Warmup
+
+from .protocol import decode_array, dumps, encode_array, read_messages
+from .scheduler import ANONYMOUS, FairLock
+
+ALL_MODELS = ("memory", "llm", "tts", "stt")
+# Scheduled consolidation waits until no request has arrived for this long.
+CONSOLIDATE_IDLE_S = 120.0
+
+
+class ModelServer:
+    """Keeps MemoryStore, LocalLLM, CoquiXTTS and Whisper resident for CLI clients.
+
+    Models load in parallel at startup (see Warmup); a request for a model
+    that is still loading simply waits for it. llama.cpp, XTTS and Whisper
+    are not safe to call concurrently, so each has its own lock.
+
+    Any number of sessions (CallSessions in other processes, each with its
+    own history) can share these single instances. Requests name their
+    session; the model locks are granted round-robin across sessions (see
+    FairLock), concurrent Whisper decodes and embeddings are batched, and
+    memory requests with a namespace only see that session's memories.
+    """
+
+    def __init__(self, cfg: Config, models: Iterable[str] = ALL_MODELS):
+        self.cfg = cfg
+        self.models = tuple(models)
+        self.warmup = Warmup(max_workers=len(ALL_MODELS))
+        builders: Dict[str, Callable[[], Any]] = {
+            "memory": lambda: components.build_memory_store(cfg, warm=True),
+            "llm": lambda: components.build_llm(cfg),
+            "tts": lambda: components.build_tts(cfg, save_audio=False, warm=True),
+            "stt": lambda: components.build_whisper(cfg),
+        }
+        for name in self.models:
+            self.warmup.submit(name, builders[name])
+        self._locks = {name: FairLock(name) for name in ("llm", "tts", "stt")}
+        self._consolidate_lock = threading.Lock()
+        self._stt_batcher: Optional[MicroBatcher] = None
+        if "stt" in self.models and cfg.stt.batch_max > 1:
+            self._stt_batcher = MicroBatcher(
+                lambda audios: self._model("stt").decode_words_batch(audios),
+                max_batch=cfg.stt.batch_max,
+                max_wait_ms=cfg.stt.batch_wait_ms,
+            )
+        self._sessions: Dict[str, float] = {}  # session -> last request (monotonic)
+        self._last_request = time.monotonic()
+        self._closed = threading.Event()
+        self._ops: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+            "ping": lambda args: {"models": {m: self.warmup.done(m) for m in self.models}},
+            "memory.embed": self._memory_embed,
+            "memory.add_many": self._memory_add_many,
+            "memory.query": self._memory_query,
+            "memory.count": lambda args: self._model("memory").count(),
+            "memory.consolidate": self._memory_consolidate,
+            "server.stats": self._server_stats,
+            "llm.count_tokens": lambda args: self._model("llm").count_tokens(args["text"]),
+            "llm.generate": self._llm_generate,
+            "tts.synthesize_to_file": self._tts_synthesize_to_file,
+            "stt.decode_words": self._stt_decode_words,
+        }
+        self._streams: Dict[str, Callable[[Dict[str, Any]], Iterator[Any]]] = {
+            "llm.generate_stream": self._llm_generate_stream,
+            "tts.synthesize_stream": self._tts_synthesize_stream,
+        }
+        if "memory" in self.models and cfg.memory.consolidate_interval_h > 0:
+            threading.Thread(target=self._consolidate_loop, name="consolidate", daemon=True).start()
+
+    def close(self) -> None:
+        self._closed.set()
+        # ProcessWhisper owns a worker process and a shared-memory segment.
+        if "stt" in self.models and self.warmup.done("stt"):
+            try:
+                whisper = self.warmup.get("stt")
+            except Exception:
+                return
+            if hasattr(whisper, "close"):
+                whisper.close()
+
+    def _model(self, name: str):
+        if name not in self.models:
+            raise RuntimeError(f"model '{name}' is not served by this daemon")
+        return self.warmup.get(name)
+
+    # --- handlers -------------------------------------------------------
+
+    def _memory(self, args):
+        store = self._model("memory")
+        return MemoryNamespace(store, args["namespace"]) if args.get("namespace") else store
+
+    def _memory_embed(self, args):
+        return self._model("memory").embed(args["texts"])
+
+    def _memory_add_many(self, args):
+        items = self._memory(args).add_many(
+            args["texts"],
+            metadatas=args.get("metadatas"),
+            ids=args.get("ids"),
+            embeddings=args.get("embeddings"),
+        )
+        return [item.id for item in items]
+
+    def _memory_query(self, args):
+        items = self._memory(args).query(
+            args["query_text"],
+            top_k=args.get("top_k", self.cfg.memory.top_k_default),
+            embedding=args.get("embedding"),
+            where=args.get("where"),
+        )
+        return [item.__dict__ for item in items]
+
+    def _memory_consolidate(self, args):
+        store = self._model("memory")
+        with self._consolidate_lock:
+            report = components.build_consolidator(self.cfg, store).run(dry_run=bool(args.get("dry_run")))
+        return dataclasses.asdict(report)
+
+    def _consolidate_loop(self) -> None:
+        interval_s = self.cfg.memory.consolidate_interval_h * 3600.0
+        while not self._closed.wait(interval_s):
+            while time.monotonic() - self._last_request < CONSOLIDATE_IDLE_S:
+                if self._closed.wait(CONSOLIDATE_IDLE_S):
+                    return
+            try:
+                self._memory_consolidate({})
+            except Exception:
+                pass  # retried at the next interval
+
+    def _server_stats(self, args):
+        now = time.monotonic()
+        store = self._model("memory") if "memory" in self.models and self.warmup.done("memory") else None
+        batchers = {"stt": self._stt_batcher, "embed": getattr(store, "batcher", None)}
+        # Copied in one step: handler threads add sessions while this runs, and
+        # iterating the live dict would raise "changed size during iteration".
+        sessions = dict(self._sessions)
+        return {
+            "sessions": {s: round(now - t, 1) for s, t in sessions.items()},  # seconds since last request
+            "locks": {name: lock.stats() for name, lock in self._locks.items()},
+            "batches": {
+                name: {"requests": b.requests, "batches": b.batches, "avg_batch": b.requests / max(1, b.batches)}
+                for name, b in batchers.items()
+                if b is not None
+            },
+        }
+
+    def _llm_generate(self, args):
+        llm = self._model("llm")
+        messages = [Message(**m) for m in args["messages"]]
+        with self._locks["llm"].hold(args["session"]):
+            reply = llm.generate(messages)
+            return {"text": reply, "stats": llm.last_stats.__dict__}
+
+    def _llm_generate_stream(self, args):
+        llm = self._model("llm")
+        messages = [Message(**m) for m in args["messages"]]
+        with self._locks["llm"].hold(args["session"]):
+            for token in llm.generate_stream(messages):
+                yield token
+            return {"stats": llm.last_stats.__dict__}
+
+    def _tts_args(self, args):
+        return (
+            args["text"],
+            args.get("speaker_ref_wav") or self.cfg.tts.speaker_ref_wav,
+            args.get("language") or self.cfg.tts.voice_clone_language,
+        )
+
+    def _tts_synthesize_to_file(self, args):
+        tts = self._model("tts")
+        text, ref, language = self._tts_args(args)
+        with self._locks["tts"].hold(args["session"]):
+            res = tts.synthesize_to_file(text, ref, language=language, output_path=args["output_path"])
+        return res.__dict__
+
+    def _tts_synthesize_stream(self, args):
+        tts = self._model("tts")
+        text, ref, language = self._tts_args(args)
+        with self._locks["tts"].hold(args["session"]):
+            for chunk in tts.synthesize_stream(text, ref, language=language):
+                yield {"audio": encode_array(chunk), "sample_rate": tts.sample_rate}
+
+    def _stt_decode_words(self, args):
+        whisper = self._model("stt")
+        audio = decode_array(args["audio"])
+        if self._stt_batcher is not None and hasattr(whisper, "decode_words_batch"):
+            # Each session's transcriber has at most one decode in flight, so
+            # first-come batches are also fair.
+            words = self._stt_batcher([audio])[0]
+        else:
+            with self._locks["stt"].hold(args["session"]):
+                words = whisper.decode_words(audio)
+        return [w.__dict__ for w in words]
+
+    # --- dispatch -------------------------------------------------------
+
+    def handle(self, msg: Dict[str, Any], send: Callable[[Dict[str, Any]], None]) -> None:
+        op = msg.get("op", "")
+        args = msg.get("args") or {}
+        args["session"] = msg.get("session") or ANONYMOUS
+        if op != "ping":
+            self._last_request = time.monotonic()
+            self._sessions[args["session"]] = self._last_request
+        try:
+            if op in self._streams:
+                gen = self._streams[op](args)
+                try:
+                    while True:
+                        try:
+                            chunk = next(gen)
+                        except StopIteration as done:
+                            send({"ok": True, "result": done.value})
+                            break
+                        send({"chunk": chunk})
+                finally:
+                    # Releases the model lock if the client went away mid-stream.
+                    gen.close()
+            elif op in self._ops:
+                send({"ok": True, "result": self._ops[op](args)})
+            else:
+                send({"ok": False, "error": f"unknown op: {op}"})
+        except (BrokenPipeError, ConnectionResetError):
+            raise
+        except Exception as exc:
+            send({"ok": False, "error": f"{type(exc).__name__}: {exc}"})
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "_UnixServer"
+
+    def handle(self):
+        def send(reply: Dict[str, Any]) -> None:
+            self.wfile.write(dumps(reply))
+            self.wfile.flush()
+
+        try:
+            for msg in read_messages(self.rfile):
+                self.server.model_server.handle(msg, send)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, model_server: ModelServer):
+        self.model_server = model_server
+        super().__init__(path, _Handler)
+
+
+def serve(cfg: Config, socket_path: Optional[str] = None, models: Iterable[str] = ALL_MODELS) -> None:
+    path = socket_path or cfg.app.socket_path
+    if os.path.exists(path):
+        from .client import ModelClient
+
+        if ModelClient(path).available():
+            raise RuntimeError(f"A model daemon is already listening on {path}")
+        os.remove(path)  # stale socket from a crashed daemon
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    model_server = ModelServer(cfg, models=models)
+    with _UnixServer(path, model_server) as server:
+        os.chmod(path, 0o600)
+        try:
+            server.serve_forever()
+        finally:
+            model_server.warmup.shutdown()
+            model_server.close()
+            if os.path.exists(path):
+                os.remove(path)
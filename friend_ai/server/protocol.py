@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import base64
+import json
+from typing import Any, Dict, Iterator
+
+import numpy as np
+
+# Newline-delimited JSON over a Unix stream socket, one request per connection.
+#   request:  {"op": "memory.query", "args": {...}, "session": "kitchen"}  (session optional)
+#   reply:    {"ok": true, "result": ...}
+#          or {"ok": false, "error": "..."}
+#   streams:  zero or more {"chunk": ...} lines, then a final reply line
+
+
+def encode_array(arr: np.ndarray) -> Dict[str, Any]:
+    arr = np.ascontiguousarray(arr, dtype=np.float32)
+    return {"dtype": "float32", "b64": base64.b64encode(arr.tobytes()).decode("ascii")}
+
+
+def decode_array(obj: Dict[str, Any]) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(obj["b64"]), dtype=obj.get("dtype", "float32"))
+
+
+def dumps(msg: Dict[str, Any]) -> bytes:
+    return (json.dumps(msg, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def read_messages(rfile) -> Iterator[Dict[str, Any]]:
+    for line in rfile:
+        if line.strip():
+            yield json.loads(line)
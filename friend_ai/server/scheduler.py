@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List
+
+from friend_ai.tracing import percentile
+
+ANONYMOUS = "anonymous"
+
+
+class FairLock:
+    """A model lock granted round-robin across sessions.
+
+    A plain Lock lets whichever thread wakes first win, so a session that
+    keeps the model busy (long replies, many TTS segments) can starve the
+    others. Here waiters queue per session, and on release the lock goes to
+    the next session in the ring that has a waiter; within a session,
+    requests keep their order. Wait and hold times are kept per session.
+    """
+
+    def __init__(self, name: str, window: int = 512):
+        self.name = name
+        self.window = window
+        self._cond = threading.Condition()
+        self._held = False
+        self._waiting: Dict[str, Deque[object]] = {}
+        self._ring: Deque[str] = deque()  # sessions with waiters, next to be served first
+        self._waits: Dict[str, Deque[float]] = {}
+        self._held_s: Dict[str, float] = {}
+        self._grants: Dict[str, int] = {}
+
+    def _next(self, session: str, ticket: object) -> bool:
+        return not self._held and self._ring[0] == session and self._waiting[session][0] is ticket
+
+    @contextmanager
+    def hold(self, session: str = ANONYMOUS) -> Iterator[None]:
+        ticket = object()
+        t0 = time.perf_counter()
+        with self._cond:
+            queue = self._waiting.setdefault(session, deque())
+            queue.append(ticket)
+            if len(queue) == 1:
+                self._ring.append(session)
+            while not self._next(session, ticket):
+                self._cond.wait()
+            queue.popleft()
+            self._ring.popleft()
+            if queue:
+                self._ring.append(session)  # its next request waits for a full round
+            self._held = True
+            granted = time.perf_counter()
+            self._waits.setdefault(session, deque(maxlen=self.window)).append(granted - t0)
+            self._grants[session] = self._grants.get(session, 0) + 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._held = False
+                self._held_s[session] = self._held_s.get(session, 0.0) + time.perf_counter() - granted
+                self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._cond:
+            out: Dict[str, Dict[str, Any]] = {}
+            for session, waits in self._waits.items():
+                ms: List[float] = [w * 1000.0 for w in waits]
+                out[session] = {
+                    "grants": self._grants.get(session, 0),
+                    "wait_p50_ms": percentile(ms, 50),
+                    "wait_p95_ms": percentile(ms, 95),
+                    "held_s": round(self._held_s.get(session, 0.0), 3),
+                }
+            return out
@@ -1,3 +1,5 @@
-from .realtime_whisper import RealtimeTranscriber, TranscriptionEvent
+from .process import ProcessWhisper
+from .realtime_whisper import LocalWhisper, RealtimeTranscriber, TranscriptionEvent
+from .streaming import Word
 
-__all__ = ["RealtimeTranscriber", "TranscriptionEvent"]
\ No newline at end of file
+__all__ = ["LocalWhisper", "ProcessWhisper", "RealtimeTranscriber", "TranscriptionEvent", "Word"]
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+import threading
+from contextlib import contextmanager
+from multiprocessing.connection import Connection
+from multiprocessing.shared_memory import SharedMemory
+from typing import Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from .streaming import Word
+
+# Env vars read by the BLAS/OpenMP runtimes under numpy, torch and CTranslate2
+# when they load. The spawned worker imports numpy just to unpickle its target,
+# so they have to be in the environment it starts with, not set inside it.
+_THREAD_ENV = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+_env_lock = threading.Lock()
+
+
+@contextmanager
+def _thread_env(threads: int) -> Iterator[None]:
+    """Sets the thread caps in this process's environment while a child is
+    started (this process's runtimes are already loaded and ignore them)."""
+    if threads <= 0:
+        yield
+        return
+    with _env_lock:
+        saved = {var: os.environ.get(var) for var in _THREAD_ENV}
+        os.environ.update({var: str(threads) for var in _THREAD_ENV})
+        try:
+            yield
+        finally:
+            for var, value in saved.items():
+                if value is None:
+                    os.environ.pop(var, None)
+                else:
+                    os.environ[var] = value
+
+
+def _worker_main(
+    conn: Connection,
+    shm_name: str,
+    model_size: str,
+    language: str,
+    threads: int,
+    cpus: Sequence[int],
+) -> None:
+    if cpus:
+        os.sched_setaffinity(0, cpus)
+    from .realtime_whisper import LocalWhisper
+
+    try:
+        whisper = LocalWhisper(model_size, language, threads=threads)
+    except Exception as exc:
+        conn.send(("error", f"{type(exc).__name__}: {exc}"))
+        return
+    # Spawned children share the parent's resource tracker, so attaching here
+    # does not make this process an owner of the segment; the parent unlinks it.
+    shm = SharedMemory(name=shm_name)
+    conn.send(("ready", None))
+    while True:
+        try:
+            msg = conn.recv()
+        except EOFError:
+            break
+        if msg is None:
+            break
+        op, arg = msg
+        if op == "resize":
+            shm.close()
+            shm = SharedMemory(name=arg)
+            continue
+        # "decode" carries one sample count, "decode_batch" the counts of
+        # utterances laid end to end in the segment.
+        lengths = [arg] if op == "decode" else list(arg)
+        audio = np.ndarray((sum(lengths),), dtype=np.float32, buffer=shm.buf)
+        bounds = np.cumsum([0] + lengths)
+        audios = [audio[s:e] for s, e in zip(bounds[:-1], bounds[1:])]
+        try:
+            if op == "decode":
+                words = whisper.decode_words(audios[0])
+                conn.send(("ok", [(w.start, w.end, w.text) for w in words]))
+            else:
+                batch = whisper.decode_words_batch(audios)
+                conn.send(("ok", [[(w.start, w.end, w.text) for w in words] for words in batch]))
+        except Exception as exc:
+            conn.send(("error", f"{type(exc).__name__}: {exc}"))
+        finally:
+            del audio, audios  # release the buffer exports so the segment can be closed
+    shm.close()
+
+
+class ProcessWhisper:
+    """Whisper in a separate worker process, same decode_words() as LocalWhisper.
+
+    Decoding then never holds this process's GIL or competes with llama.cpp
+    and XTTS for its threads. Audio goes through a shared-memory segment
+    (one copy in, no pickling); only the sample count and the resulting words
+    cross the pipe. `threads` caps the worker's math threads and `cpus` pins
+    it to those cores.
+    """
+
+    def __init__(
+        self,
+        model_size: str = "small",
+        language: str = "en",
+        threads: int = 0,
+        cpus: Optional[Sequence[int]] = None,
+        max_seconds: float = 30.0,
+        sample_rate: int = 16000,
+    ):
+        self.model_size = model_size
+        self.language = language
+        self.threads = threads
+        self.cpus = list(cpus or [])
+        self._capacity = int(max_seconds * sample_rate)
+        self._lock = threading.Lock()
+        self._ctx = mp.get_context("spawn")
+        self._shm = SharedMemory(create=True, size=self._capacity * 4)
+        self._proc: Optional[mp.process.BaseProcess] = None
+        self._conn: Optional[Connection] = None
+        self._start()
+
+    def _start(self) -> None:
+        parent, child = self._ctx.Pipe()
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(child, self._shm.name, self.model_size, self.language, self.threads, self.cpus),
+            name="whisper-worker",
+            daemon=True,
+        )
+        with _thread_env(self.threads):
+            proc.start()
+        child.close()
+        status, detail = parent.recv()  # blocks while the model loads
+        if status != "ready":
+            proc.join(timeout=1.0)
+            raise RuntimeError(f"Whisper worker failed to start: {detail}")
+        self._proc, self._conn = proc, parent
+
+    def _grow(self, n_samples: int) -> None:
+        old = self._shm
+        self._capacity = max(n_samples, 2 * self._capacity)
+        self._shm = SharedMemory(create=True, size=self._capacity * 4)
+        self._conn.send(("resize", self._shm.name))
+        old.close()
+        old.unlink()
+
+    def _call(self, audios: Sequence[np.ndarray], op: str, arg):
+        with self._lock:
+            if self._proc is None or not self._proc.is_alive():
+                self._start()
+            n = sum(len(a) for a in audios)
+            if n > self._capacity:
+                self._grow(n)
+            buf = np.ndarray((n,), dtype=np.float32, buffer=self._shm.buf)
+            start = 0
+            for a in audios:
+                buf[start : start + len(a)] = a
+                start += len(a)
+            del buf
+            self._conn.send((op, arg))
+            try:
+                status, payload = self._conn.recv()
+            except EOFError:
+                self._proc = None
+                raise RuntimeError("Whisper worker exited during decode")
+        if status != "ok":
+            raise RuntimeError(f"Whisper worker: {payload}")
+        return payload
+
+    def decode_words(self, audio_np: np.ndarray) -> List[Word]:
+        payload = self._call([audio_np], "decode", len(audio_np))
+        return [Word(start=s, end=e, text=t) for s, e, t in payload]
+
+    def decode_words_batch(self, audios: Sequence[np.ndarray]) -> List[List[Word]]:
+        payload = self._call(audios, "decode_batch", [len(a) for a in audios])
+        return [[Word(start=s, end=e, text=t) for s, e, t in words] for words in payload]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    self._conn.send(None)
+                except (BrokenPipeError, OSError):
+                    pass
+                self._conn.close()
+                self._conn = None
+            if self._proc is not None:
+                self._proc.join(timeout=2.0)
+                if self._proc.is_alive():
+                    self._proc.terminate()
+                self._proc = None
+            self._shm.close()
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
@@ -4,56 +4,207 @@ import queue
 import threading
 import time
 from dataclasses import dataclass
-from typing import Optional
+from typing import TYPE_CHECKING, Any, Callable, List, Optional, Sequence, Tuple
 
 import numpy as np
-import sounddevice as sd
-import webrtcvad
 
-try:
-    from faster_whisper import WhisperModel  # type: ignore
-    _USE_FASTER = True
-except Exception:
-    import whisper  # type: ignore
-    _USE_FASTER = False
+from friend_ai import tracing
+from friend_ai.audio.echo import EchoGate
+from friend_ai.audio.ringbuffer import FrameRingBuffer
+
+from .streaming import StreamingDecoder, Word
+from .vad import BatchVAD, Endpointer, PreRoll
+
+if TYPE_CHECKING:
+    import sounddevice as sd
+
+
+def load_whisper(model_size: str, threads: int = 0) -> Tuple[Any, bool]:
+    """Returns (model, is_faster_whisper). Imported here, not at module import,
+    so importing the package stays cheap. threads=0 keeps the library default."""
+    try:
+        from faster_whisper import WhisperModel  # type: ignore
+    except Exception:
+        import torch
+        import whisper  # type: ignore
+
+        if threads > 0:
+            torch.set_num_threads(threads)
+        return whisper.load_model(model_size), False
+    return WhisperModel(model_size, device="auto", cpu_threads=threads), True
+
+
+class LocalWhisper:
+    """In-process Whisper model that returns word-level timestamps."""
+
+    def __init__(self, model_size: str = "small", language: str = "en", threads: int = 0):
+        self.model_size = model_size
+        self.language = language
+        self.model, self.faster = load_whisper(model_size, threads)
+        self._batched = None
+
+    def decode_words(self, audio_np: np.ndarray) -> List[Word]:
+        words: List[Word] = []
+        if self.faster:
+            segments, _ = self.model.transcribe(audio_np, language=self.language, word_timestamps=True)
+            for seg in segments:
+                for w in seg.words or []:
+                    words.append(Word(start=w.start, end=w.end, text=w.word))
+        else:
+            # whisper expects 16k float32 mono
+            import torch
+            with torch.no_grad():
+                result = self.model.transcribe(audio_np, language=self.language, word_timestamps=True)
+            for seg in result.get("segments", []):
+                for w in seg.get("words", []):
+                    words.append(Word(start=w["start"], end=w["end"], text=w["word"]))
+        return words
+
+    def decode_words_batch(self, audios: Sequence[np.ndarray], sample_rate: int = 16000) -> List[List[Word]]:
+        """decode_words for several utterances (e.g. from different sessions).
+
+        With faster-whisper, the utterances are laid end to end and given as
+        clip timestamps to its BatchedInferencePipeline, which packs them
+        into 30 s windows and decodes the windows as one batch; words are
+        mapped back by time. Otherwise, or for an utterance over 30 s, they
+        are decoded one by one.
+        """
+        if len(audios) < 2 or not self.faster or any(len(a) > 30 * sample_rate for a in audios):
+            return [self.decode_words(a) for a in audios]
+        if self._batched is None:
+            try:
+                from faster_whisper import BatchedInferencePipeline  # type: ignore
+            except ImportError:
+                self._batched = False
+            else:
+                self._batched = BatchedInferencePipeline(model=self.model)
+        if self._batched is False:
+            return [self.decode_words(a) for a in audios]
+        offsets = np.cumsum([0] + [len(a) for a in audios])
+        clips = [{"start": int(s), "end": int(e)} for s, e in zip(offsets[:-1], offsets[1:]) if e > s]
+        segments, _ = self._batched.transcribe(
+            np.concatenate(audios).astype(np.float32),
+            language=self.language,
+            vad_filter=False,
+            clip_timestamps=clips,
+            batch_size=len(audios),
+            word_timestamps=True,
+        )
+        starts = offsets[:-1] / float(sample_rate)
+        out: List[List[Word]] = [[] for _ in audios]
+        for seg in segments:
+            for w in seg.words or []:
+                idx = int(np.searchsorted(starts, (w.start + w.end) / 2.0, side="right")) - 1
+                idx = min(max(idx, 0), len(audios) - 1)
+                offset = starts[idx]
+                out[idx].append(Word(start=float(w.start - offset), end=float(w.end - offset), text=w.word))
+        return out
+
+
+class UtteranceBuffer:
+    """Growable float32 buffer of voiced audio handed to Whisper as a view."""
+
+    def __init__(self, capacity: int):
+        self._buf = np.empty(capacity, dtype=np.float32)
+        self._n = 0
+
+    def __len__(self) -> int:
+        return self._n
+
+    def append(self, frame: np.ndarray) -> None:
+        end = self._n + len(frame)
+        if end > len(self._buf):
+            grown = np.empty(max(end, 2 * len(self._buf)), dtype=np.float32)
+            grown[: self._n] = self._buf[: self._n]
+            self._buf = grown
+        np.multiply(frame, 1.0 / 32768.0, out=self._buf[self._n : end], casting="unsafe")
+        self._n = end
+
+    def view(self) -> np.ndarray:
+        return self._buf[: self._n]
+
+    def truncate(self, n_samples: int) -> None:
+        self._n = max(0, min(self._n, n_samples))
+
+    def clear(self) -> None:
+        self._n = 0
 
 
 @dataclass
 class TranscriptionEvent:
     text: str
     is_final: bool
+    # Prefix that later hypotheses will not change (local agreement); equals text when final.
+    stable_text: str = ""
+    # Set on final events; tags every trace span of the reply to this utterance.
+    turn_id: Optional[int] = None
 
 
 class RealtimeTranscriber:
-    def __init__(self, model_size: str = "small", vad_aggressiveness: int = 2, sample_rate: int = 16000):
+    def __init__(
+        self,
+        model_size: str = "small",
+        vad_aggressiveness: int = 2,
+        sample_rate: int = 16000,
+        partial_interval_s: float = 1.0,
+        max_window_s: float = 15.0,
+        whisper=None,
+        echo_gate: Optional[EchoGate] = None,
+        on_barge_in: Optional[Callable[[], None]] = None,
+        barge_in_frames: int = 3,
+        silence_ms: float = 700.0,
+        silence_min_ms: float = 300.0,
+        silence_max_ms: float = 1000.0,
+        adaptive_endpoint: bool = True,
+        preroll_ms: float = 300.0,
+    ):
         self.sample_rate = sample_rate
-        self.vad = webrtcvad.Vad(vad_aggressiveness)
+        self.vad = BatchVAD(vad_aggressiveness, sample_rate)
         self.frame_ms = 30
-        self.frame_bytes = int(self.sample_rate * self.frame_ms / 1000)
-        self.buffer = bytearray()
-        self.audio_q: "queue.Queue[bytes]" = queue.Queue(maxsize=50)
+        self.frame_samples = int(self.sample_rate * self.frame_ms / 1000)
+        self.endpointer = Endpointer(
+            frame_ms=self.frame_ms,
+            silence_ms=silence_ms,
+            min_ms=silence_min_ms,
+            max_ms=silence_max_ms,
+            adaptive=adaptive_endpoint,
+        )
+        self.preroll = PreRoll(self.frame_samples, int(round(preroll_ms / self.frame_ms)))
+        # ~7.7 s of capture headroom at 16 kHz / 30 ms frames
+        self.ring = FrameRingBuffer(self.frame_samples, n_frames=256)
+        self.utterance = UtteranceBuffer(capacity=self.sample_rate * 30)
         self.events_q: "queue.Queue[TranscriptionEvent]" = queue.Queue()
         self._stop = threading.Event()
         self._listening = threading.Event()
-        if _USE_FASTER:
-            self.model = WhisperModel(model_size, device="auto")
-        else:
-            self.model = whisper.load_model(model_size)
+        # Anything with decode_words(audio) -> List[Word]; e.g. a model served by the daemon.
+        self.whisper = whisper if whisper is not None else LocalWhisper(model_size)
+        self.partial_interval_s = partial_interval_s
+        self.partial_interval_frames = int(round(partial_interval_s * 1000.0 / self.frame_ms))
+        self.decoder = StreamingDecoder(self.whisper.decode_words, sample_rate=sample_rate, max_window_s=max_window_s)
+        # VAD-positive frames are checked against what the speaker is playing,
+        # so our own TTS neither reaches Whisper nor triggers barge-in.
+        self.echo_gate = echo_gate
+        self.on_barge_in = on_barge_in
+        self.barge_in_frames = barge_in_frames
+        self._last_write = (0, time.perf_counter())  # (ring write position, when)
         self._in_stream: Optional[sd.InputStream] = None
         self._worker_thread = threading.Thread(target=self._worker_loop, daemon=True)
 
-    def start(self):
+    def start(self, open_mic: bool = True):
         if self._worker_thread.is_alive():
             return
         self._stop.clear()
         self._listening.set()
-        self._in_stream = sd.InputStream(
-            samplerate=self.sample_rate,
-            channels=1,
-            dtype="int16",
-            callback=self._on_audio,
-        )
-        self._in_stream.start()
+        if open_mic:
+            import sounddevice as sd
+
+            self._in_stream = sd.InputStream(
+                samplerate=self.sample_rate,
+                channels=1,
+                dtype="int16",
+                callback=self._on_audio,
+            )
+            self._in_stream.start()
         self._worker_thread.start()
 
     def stop(self):
@@ -65,65 +216,109 @@ class RealtimeTranscriber:
                 self._in_stream.close()
         finally:
             self._in_stream = None
+            close = getattr(self.whisper, "close", None)
+            if close is not None:
+                close()
+
+    @property
+    def overruns(self) -> int:
+        return self.ring.overruns
 
     def _on_audio(self, indata, frames, time_info, status):
         if status:
             pass
-        if not self._listening.is_set():
-            return
-        pcm16 = indata[:, 0].astype(np.int16).tobytes()
-        self.buffer.extend(pcm16)
-        while len(self.buffer) >= self.frame_bytes * 2:
-            chunk = bytes(self.buffer[: self.frame_bytes * 2])
-            del self.buffer[: self.frame_bytes * 2]
-            self.audio_q.put(chunk)
+        self.feed(indata[:, 0])
+
+    def feed(self, samples: np.ndarray) -> None:
+        """Push int16 mono samples at `sample_rate` as if they came from the microphone."""
+        if self._listening.is_set():
+            self.ring.write(samples)
+            self._last_write = (self.ring.write_pos, time.perf_counter())
 
     def _worker_loop(self):
-        voiced = False
-        cur_chunks: list[bytes] = []
-        last_voice_time = time.time()
-        silence_timeout_s = 0.7
+        # Everything here counts frames; the clock is only read when the
+        # input stalls and no frames arrive at all.
+        ep = self.endpointer
+        keep_frames = 3  # trailing silence left on the utterance for Whisper
+        trailing = 0  # non-speech frames appended since the last speech frame
+        since_partial = 0
+        barge_frames = 0
+        last_voice_time = time.perf_counter()
         while not self._stop.is_set():
-            try:
-                chunk = self.audio_q.get(timeout=0.1)
-            except queue.Empty:
-                chunk = None
-            if chunk is not None:
-                is_speech = False
-                try:
-                    is_speech = self.vad.is_speech(chunk, self.sample_rate)
-                except Exception:
-                    is_speech = False
+            if not self.ring.wait(timeout=0.1):
+                if ep.voiced and time.perf_counter() - last_voice_time > ep.timeout_ms / 1000.0:
+                    ep.force_end()
+                    self._end_utterance(trailing - keep_frames, last_voice_time)
+                    trailing = 0
+                continue
+            block = self.ring.peek_block()
+            speech = self.vad.classify(block)
+            pos = self.ring.read_pos
+            write_pos, write_time = self._last_write
+            for frame, is_speech in zip(block, speech):
+                pos += self.frame_samples
+                # When this frame was captured, from how far behind the newest sample it is.
+                t_end = write_time - (write_pos - pos) / float(self.sample_rate)
+                echo = False
+                if is_speech and self.echo_gate is not None:
+                    is_speech = self.echo_gate.is_user_speech(frame, self.sample_rate, t_end)
+                    echo = not is_speech
+                    if is_speech and self.echo_gate.playing(t_end):
+                        barge_frames += 1
+                        if barge_frames == self.barge_in_frames and self.on_barge_in is not None:
+                            tracing.mark("vad.barge_in", ts=t_end)
+                            self.on_barge_in()
+                if not is_speech:
+                    barge_frames = 0
+                event = ep.update(bool(is_speech))
+                if event == "start":
+                    self.utterance.append(self.preroll.drain())
+                    since_partial = 0
+                    trailing = 0
                 if is_speech:
-                    cur_chunks.append(chunk)
-                    voiced = True
-                    last_voice_time = time.time()
-                elif voiced:
-                    if time.time() - last_voice_time > silence_timeout_s:
-                        audio_bytes = b"".join(cur_chunks)
-                        cur_chunks.clear()
-                        voiced = False
-                        self._transcribe_and_emit(audio_bytes)
-            else:
-                if voiced and (time.time() - last_voice_time > silence_timeout_s):
-                    audio_bytes = b"".join(cur_chunks)
-                    cur_chunks.clear()
-                    voiced = False
-                    self._transcribe_and_emit(audio_bytes)
-
-    def _transcribe_and_emit(self, audio_bytes: bytes):
-        if not audio_bytes:
+                    self.utterance.append(frame)
+                    last_voice_time = t_end
+                    trailing = 0
+                    since_partial += 1
+                elif ep.voiced:
+                    # Pauses stay in the audio (Whisper reads them as word
+                    # boundaries); our own echo does not.
+                    if not echo:
+                        self.utterance.append(frame)
+                        trailing += 1
+                    since_partial += 1
+                elif event == "end":
+                    self._end_utterance(trailing - keep_frames, last_voice_time)
+                    trailing = 0
+                elif not echo:
+                    self.preroll.push(frame)
+            self.ring.advance(len(block))
+            if ep.voiced and self.partial_interval_frames > 0 and since_partial >= self.partial_interval_frames:
+                self._emit_partial()
+                since_partial = 0
+
+    def _end_utterance(self, trim_frames: int, speech_end: float) -> None:
+        if trim_frames > 0:
+            self.utterance.truncate(len(self.utterance) - trim_frames * self.frame_samples)
+        self._transcribe_and_emit(speech_end=speech_end)
+
+    def _emit_partial(self):
+        with tracing.span("stt.partial"):
+            stable, tentative = self.decoder.update(self.utterance.view())
+        text = " ".join(p for p in (stable, tentative) if p)
+        if text:
+            self.events_q.put(TranscriptionEvent(text=text, is_final=False, stable_text=stable))
+
+    def _transcribe_and_emit(self, speech_end: Optional[float] = None):
+        if not len(self.utterance):
+            self.decoder.reset()
             return
-        audio_np = np.frombuffer(audio_bytes, dtype=np.int16).astype(np.float32) / 32768.0
-        if _USE_FASTER:
-            segments, _ = self.model.transcribe(audio_np, language="en")
-            text_parts = [seg.text for seg in segments]
-            text = " ".join(text_parts).strip()
-        else:
-            # whisper expects 16k float32 mono
-            import torch
-            with torch.no_grad():
-                result = self.model.transcribe(audio_np, language="en")
-            text = result.get("text", "").strip()
+        turn_id = tracing.new_turn()
+        if speech_end is not None:
+            tracing.mark(tracing.TURN_ANCHOR, turn_id, ts=speech_end)
+            tracing.get_tracer().record("vad.endpoint_wait", speech_end, time.perf_counter(), turn_id)
+        with tracing.turn(turn_id), tracing.span("stt.decode"):
+            text = self.decoder.finish(self.utterance.view())
+        self.utterance.clear()
         if text:
-            self.events_q.put(TranscriptionEvent(text=text, is_final=True))
\ No newline at end of file
+            self.events_q.put(TranscriptionEvent(text=text, is_final=True, stable_text=text, turn_id=turn_id))
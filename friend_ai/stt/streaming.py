@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Callable, List, Tuple
+
+import numpy as np
+
+_NORM = re.compile(r"[^\w']+")
+
+
+@dataclass
+class Word:
+    start: float  # seconds from utterance start
+    end: float
+    text: str
+
+
+def _norm(text: str) -> str:
+    return _NORM.sub("", text.lower())
+
+
+def join_words(words: List[Word]) -> str:
+    return "".join(w.text for w in words).strip()
+
+
+class LocalAgreement:
+    """LocalAgreement-2 policy: a word is committed once two consecutive
+    hypotheses agree on it (and on everything before it)."""
+
+    def __init__(self):
+        self.committed: List[Word] = []
+        self.committed_end = 0.0
+        self._prev: List[Word] = []
+
+    def reset(self) -> None:
+        self.committed = []
+        self.committed_end = 0.0
+        self._prev = []
+
+    @property
+    def tentative(self) -> List[Word]:
+        return self._prev
+
+    def insert(self, words: List[Word]) -> List[Word]:
+        words = [w for w in words if w.start >= self.committed_end - 0.1]
+        words = self._drop_overlap(words)
+        agreed: List[Word] = []
+        for prev, cur in zip(self._prev, words):
+            if _norm(prev.text) != _norm(cur.text):
+                break
+            agreed.append(cur)
+        if agreed:
+            self.committed.extend(agreed)
+            self.committed_end = agreed[-1].end
+        self._prev = words[len(agreed):]
+        return agreed
+
+    def _drop_overlap(self, words: List[Word]) -> List[Word]:
+        # The decoder may repeat the last committed words when the window
+        # starts slightly before the commit point.
+        if not self.committed or not words:
+            return words
+        for n in range(min(5, len(self.committed), len(words)), 0, -1):
+            tail = [_norm(w.text) for w in self.committed[-n:]]
+            head = [_norm(w.text) for w in words[:n]]
+            if tail == head:
+                return words[n:]
+        return words
+
+
+class StreamingDecoder:
+    """Re-decodes a growing utterance buffer and commits stable prefixes.
+
+    `decode_fn` transcribes a float32 16 kHz window and returns word-level
+    timestamps relative to the start of that window.
+    """
+
+    def __init__(
+        self,
+        decode_fn: Callable[[np.ndarray], List[Word]],
+        sample_rate: int = 16000,
+        max_window_s: float = 15.0,
+    ):
+        self.decode_fn = decode_fn
+        self.sample_rate = sample_rate
+        self.max_window_s = max_window_s
+        self.agreement = LocalAgreement()
+        self._offset = 0  # samples trimmed from the front of the window
+
+    def reset(self) -> None:
+        self.agreement.reset()
+        self._offset = 0
+
+    def update(self, audio: np.ndarray) -> Tuple[str, str]:
+        words = self._decode_from(audio, self._offset)
+        self.agreement.insert(words)
+        window_s = (len(audio) - self._offset) / float(self.sample_rate)
+        if window_s > self.max_window_s and self.agreement.committed:
+            # Keep the decode window bounded by dropping committed audio.
+            self._offset = min(len(audio), int(self.agreement.committed_end * self.sample_rate))
+        return join_words(self.agreement.committed), join_words(self.agreement.tentative)
+
+    def finish(self, audio: np.ndarray) -> str:
+        # Only the audio after the last committed word still needs decoding.
+        start = min(len(audio), int(self.agreement.committed_end * self.sample_rate))
+        tail = self.agreement._drop_overlap(self._decode_from(audio, start))
+        text = " ".join(p for p in (join_words(self.agreement.committed), join_words(tail)) if p)
+        self.reset()
+        return text
+
+    def _decode_from(self, audio: np.ndarray, start: int) -> List[Word]:
+        window = audio[start:]
+        if len(window) == 0:
+            return []
+        offset_s = start / float(self.sample_rate)
+        return [Word(w.start + offset_s, w.end + offset_s, w.text) for w in self.decode_fn(window)]
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+from typing import Optional
+
+import numpy as np
+
+
+class BatchVAD:
+    """Classifies a block of frames (rows of an int16 2-D array) per call.
+
+    Frame energies are computed for the whole block in one vectorized pass,
+    and only frames louder than the tracked noise floor by `margin_db` are
+    handed to webrtcvad. In a typical call most frames are silence or room
+    noise, so most per-frame Python -> C calls disappear.
+    """
+
+    def __init__(
+        self,
+        aggressiveness: int = 2,
+        sample_rate: int = 16000,
+        margin_db: float = 6.0,
+        min_db: float = -65.0,
+        floor_rise_db: float = 0.02,
+    ):
+        import webrtcvad
+
+        self.vad = webrtcvad.Vad(aggressiveness)
+        self.sample_rate = sample_rate
+        self.margin_db = margin_db
+        self.min_db = min_db
+        # Minimum-statistics noise floor: drops to any quieter frame at once,
+        # creeps up by floor_rise_db per frame otherwise.
+        self.floor_rise_db = floor_rise_db
+        self.noise_db = min_db
+        self.checked = 0  # frames that reached webrtcvad
+        self.skipped = 0  # frames rejected by energy alone
+
+    def energy_db(self, block: np.ndarray) -> np.ndarray:
+        x = block.astype(np.float32) * (1.0 / 32768.0)
+        power = np.einsum("ij,ij->i", x, x) / block.shape[1]
+        return 10.0 * np.log10(power + 1e-12)
+
+    def classify(self, block: np.ndarray) -> np.ndarray:
+        energy = self.energy_db(block)
+        if not len(energy):
+            return np.zeros(0, dtype=bool)
+        # floor[i] = min(previous floor + rise*(i+1), min over j<=i of energy[j] + rise*(i-j)),
+        # i.e. the minimum-statistics recurrence unrolled for the whole block.
+        ramp = self.floor_rise_db * np.arange(len(energy))
+        floor = ramp + np.minimum.accumulate(np.minimum(energy - ramp, self.noise_db + self.floor_rise_db))
+        floor = np.maximum(floor, self.min_db)
+        self.noise_db = float(floor[-1])
+        candidates = np.flatnonzero(energy > np.maximum(floor + self.margin_db, self.min_db))
+        out = np.zeros(len(block), dtype=bool)
+        for i in candidates:
+            try:
+                # read-only byte view of the ring row, no copy
+                out[i] = self.vad.is_speech(memoryview(block[i]).cast("B"), self.sample_rate)
+            except Exception:
+                out[i] = False
+        self.checked += len(candidates)
+        self.skipped += len(block) - len(candidates)
+        return out
+
+
+class PreRoll:
+    """The last few non-speech frames, prepended to an utterance when speech
+    starts so the first phoneme (which VAD tends to miss) is not clipped."""
+
+    def __init__(self, frame_samples: int, n_frames: int):
+        self._buf = np.zeros((max(1, n_frames), frame_samples), dtype=np.int16)
+        self.n_frames = n_frames
+        self._count = 0
+
+    def push(self, frame: np.ndarray) -> None:
+        if self.n_frames:
+            self._buf[self._count % self.n_frames] = frame
+            self._count += 1
+
+    def drain(self) -> np.ndarray:
+        """Buffered frames oldest first, as one flat array; empties the buffer."""
+        n = min(self._count, self.n_frames)
+        if n == 0:
+            return self._buf[:0].reshape(-1)
+        start = self._count % self.n_frames if self._count >= self.n_frames else 0
+        order = (np.arange(n) + start) % self.n_frames
+        self._count = 0
+        return self._buf[order].reshape(-1)
+
+
+class Endpointer:
+    """Decides where an utterance ends, counting frames rather than reading
+    the clock.
+
+    The silence needed to end an utterance follows the speaker: pauses inside
+    utterances are tracked (EMA), and the timeout is `pause_factor` times the
+    typical pause, clamped to [min_ms, max_ms]. Quick talkers with short
+    pauses get replies sooner; slow, hesitant speech is not cut off.
+    """
+
+    def __init__(
+        self,
+        frame_ms: int = 30,
+        silence_ms: float = 700.0,
+        min_ms: float = 300.0,
+        max_ms: float = 1000.0,
+        pause_factor: float = 2.5,
+        adaptive: bool = True,
+    ):
+        self.frame_ms = frame_ms
+        self.min_frames = max(1, int(round(min_ms / frame_ms)))
+        self.max_frames = max(self.min_frames, int(round(max_ms / frame_ms)))
+        self.pause_factor = pause_factor
+        self.adaptive = adaptive
+        self.timeout_frames = min(self.max_frames, max(self.min_frames, int(round(silence_ms / frame_ms))))
+        self._pause_ema: Optional[float] = None
+        self.voiced = False
+        self.silence_run = 0
+
+    @property
+    def timeout_ms(self) -> float:
+        return self.timeout_frames * self.frame_ms
+
+    def update(self, is_speech: bool) -> Optional[str]:
+        """Feed one frame; returns "start", "end" or None."""
+        if is_speech:
+            if not self.voiced:
+                self.voiced = True
+                self.silence_run = 0
+                return "start"
+            if self.silence_run >= 2:  # ignore one-frame VAD flicker
+                self._record_pause(self.silence_run)
+            self.silence_run = 0
+            return None
+        if not self.voiced:
+            return None
+        self.silence_run += 1
+        if self.silence_run >= self.timeout_frames:
+            self.voiced = False
+            return "end"
+        return None
+
+    def force_end(self) -> bool:
+        """Ends a voiced utterance (e.g. the input stream stalled)."""
+        was = self.voiced
+        self.voiced = False
+        self.silence_run = 0
+        return was
+
+    def _record_pause(self, frames: int) -> None:
+        if not self.adaptive:
+            return
+        self._pause_ema = frames if self._pause_ema is None else 0.8 * self._pause_ema + 0.2 * frames
+        target = int(round(self.pause_factor * self._pause_ema))
+        self.timeout_frames = min(self.max_frames, max(self.min_frames, target))
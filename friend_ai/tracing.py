@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import contextlib
+import itertools
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Iterator, List, Optional, Sequence
+
+# Process-wide tracer. Disabled by default; spans and marks then cost one
+# attribute check. Timestamps are time.perf_counter() seconds.
+#
+#   tracing.enable()
+#   with tracing.turn(turn_id):           # tags everything on this thread
+#       with tracing.span("memory.query"):
+#           ...
+#       tracing.mark("tts.first_chunk")
+#   tracing.get_tracer().export_chrome("trace.json")   # chrome://tracing / Perfetto
+
+# Turn latencies are measured from this mark (last voiced audio frame).
+TURN_ANCHOR = "vad.end_of_speech"
+
+
+def percentile(values: Sequence[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+@dataclass
+class TraceEvent:
+    name: str
+    start: float
+    end: Optional[float]  # None for instant marks
+    turn_id: Optional[int]
+    thread_id: int
+    args: Optional[Dict[str, Any]] = None
+
+    @property
+    def duration_s(self) -> float:
+        return 0.0 if self.end is None else self.end - self.start
+
+
+class Tracer:
+    def __init__(self, enabled: bool = False, max_events: int = 100_000):
+        self.enabled = enabled
+        self.t0 = time.perf_counter()
+        self._events: Deque[TraceEvent] = deque(maxlen=max_events)
+        self._thread_names: Dict[int, str] = {}
+        self._turn_ids = itertools.count(1)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def new_turn(self) -> int:
+        return next(self._turn_ids)
+
+    @contextlib.contextmanager
+    def turn(self, turn_id: Optional[int]) -> Iterator[None]:
+        prev = getattr(self._local, "turn_id", None)
+        self._local.turn_id = turn_id
+        try:
+            yield
+        finally:
+            self._local.turn_id = prev
+
+    def current_turn(self) -> Optional[int]:
+        return getattr(self._local, "turn_id", None)
+
+    def record(
+        self,
+        name: str,
+        start: float,
+        end: Optional[float] = None,
+        turn_id: Optional[int] = None,
+        **args: Any,
+    ) -> None:
+        if not self.enabled:
+            return
+        thread = threading.current_thread()
+        event = TraceEvent(
+            name=name,
+            start=start,
+            end=end,
+            turn_id=turn_id if turn_id is not None else self.current_turn(),
+            thread_id=thread.ident or 0,
+            args=args or None,
+        )
+        with self._lock:
+            self._events.append(event)
+            self._thread_names.setdefault(event.thread_id, thread.name)
+
+    def mark(self, name: str, turn_id: Optional[int] = None, ts: Optional[float] = None, **args: Any) -> None:
+        if self.enabled:
+            self.record(name, time.perf_counter() if ts is None else ts, None, turn_id, **args)
+
+    @contextlib.contextmanager
+    def _span(self, name: str, turn_id: Optional[int], args: Dict[str, Any]) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter(), turn_id, **args)
+
+    def span(self, name: str, turn_id: Optional[int] = None, **args: Any):
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return self._span(name, turn_id, args)
+
+    def events(self) -> List[TraceEvent]:
+        with self._lock:
+            return list(self._events)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._events.clear()
+
+    # --- reports ----------------------------------------------------------
+
+    def span_durations(self) -> Dict[str, List[float]]:
+        out: Dict[str, List[float]] = defaultdict(list)
+        for e in self.events():
+            if e.end is not None:
+                out[e.name].append(e.duration_s)
+        return dict(out)
+
+    def turn_latencies(self, anchor: str = TURN_ANCHOR) -> Dict[str, List[float]]:
+        """Seconds from each turn's anchor mark to the first occurrence of every
+        other event (span starts and marks) in that turn."""
+        firsts: Dict[int, Dict[str, float]] = defaultdict(dict)
+        for e in self.events():
+            if e.turn_id is None:
+                continue
+            seen = firsts[e.turn_id]
+            if e.name not in seen or e.start < seen[e.name]:
+                seen[e.name] = e.start
+        out: Dict[str, List[float]] = defaultdict(list)
+        for seen in firsts.values():
+            t_anchor = seen.get(anchor)
+            if t_anchor is None:
+                continue
+            for name, ts in seen.items():
+                if name != anchor:
+                    out[name].append(ts - t_anchor)
+        return dict(out)
+
+    def summary(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        def hist(values: List[float]) -> Dict[str, Any]:
+            ms = lambda v: None if v is None else round(v * 1000.0, 1)
+            return {
+                "count": len(values),
+                "p50_ms": ms(percentile(values, 50)),
+                "p95_ms": ms(percentile(values, 95)),
+                "p99_ms": ms(percentile(values, 99)),
+            }
+
+        return {
+            "spans": {name: hist(v) for name, v in sorted(self.span_durations().items())},
+            "since_end_of_speech": {
+                name: hist(v) for name, v in sorted(self.turn_latencies().items(), key=lambda kv: percentile(kv[1], 50))
+            },
+        }
+
+    def summary_lines(self) -> List[str]:
+        lines = []
+        for section, rows in self.summary().items():
+            lines.append(section)
+            for name, h in rows.items():
+                lines.append(
+                    f"  {name:<24} n={h['count']:<4} p50={h['p50_ms']}ms p95={h['p95_ms']}ms p99={h['p99_ms']}ms"
+                )
+        return lines
+
+    def export_chrome(self, path: str) -> None:
+        """Writes the Chrome trace-event JSON format (chrome://tracing, ui.perfetto.dev)."""
+        pid = os.getpid()
+        us = lambda s: round((s - self.t0) * 1e6, 1)
+        trace: List[Dict[str, Any]] = []
+        with self._lock:
+            names = dict(self._thread_names)
+        for tid, name in names.items():
+            trace.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}})
+        for e in self.events():
+            args = dict(e.args or {})
+            if e.turn_id is not None:
+                args["turn"] = e.turn_id
+            item: Dict[str, Any] = {"name": e.name, "pid": pid, "tid": e.thread_id, "ts": us(e.start), "args": args}
+            if e.end is None:
+                item.update(ph="i", s="t")
+            else:
+                item.update(ph="X", dur=round((e.end - e.start) * 1e6, 1))
+            trace.append(item)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def enable(enabled: bool = True) -> Tracer:
+    _tracer.enabled = enabled
+    return _tracer
+
+
+def span(name: str, turn_id: Optional[int] = None, **args: Any):
+    return _tracer.span(name, turn_id, **args)
+
+
+def mark(name: str, turn_id: Optional[int] = None, ts: Optional[float] = None, **args: Any) -> None:
+    _tracer.mark(name, turn_id, ts, **args)
+
+
+def turn(turn_id: Optional[int]):
+    return _tracer.turn(turn_id)
+
+
+def new_turn() -> int:
+    return _tracer.new_turn()
@@ -1,3 +1,7 @@
+from .cache import AudioCache, CachedTTS
 from .coqui_xtts import CoquiXTTS
+from .fillers import FillerClips
+from .segmenter import SentenceSegmenter, segment_stream
+from .sink import WavSink
 
-__all__ = ["CoquiXTTS"]
\ No newline at end of file
+__all__ = ["AudioCache", "CachedTTS", "CoquiXTTS", "FillerClips", "SentenceSegmenter", "segment_stream", "WavSink"]
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from friend_ai import tracing
+
+from .latents import file_sha256
+
+
+def normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class AudioCache:
+    """Content-addressed store of synthesized audio, on disk, LRU by total size.
+
+    Each entry is one float32 .npy file named by its key. Recency is the file
+    mtime (touched on every hit), so the LRU order survives restarts.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 64 << 20):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._index: "OrderedDict[str, int]" = OrderedDict()  # key -> bytes, oldest first
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        entries = []
+        for name in os.listdir(cache_dir):
+            if name.endswith(".npy"):
+                st = os.stat(os.path.join(cache_dir, name))
+                entries.append((st.st_mtime_ns, name[:-4], st.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._bytes += size
+        self._evict()
+
+    @staticmethod
+    def key(text: str, voice_hash: str, language: str, model_name: str, sample_rate: int) -> str:
+        raw = "\x1f".join((normalize_text(text), voice_hash, language, model_name, str(sample_rate)))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            if key not in self._index:
+                self.misses += 1
+                return None
+            self._index.move_to_end(key)
+        path = self._path(key)
+        try:
+            audio = np.load(path)
+            os.utime(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self._drop(key)
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return audio
+
+    def put(self, key: str, audio: np.ndarray) -> None:
+        audio = np.ascontiguousarray(audio, dtype=np.float32)
+        path = self._path(key)
+        tmp = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        try:
+            with open(tmp, "wb") as f:
+                np.save(f, audio)
+            os.replace(tmp, path)
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+        size = os.path.getsize(path)
+        with self._lock:
+            self._bytes -= self._index.pop(key, 0)
+            self._index[key] = size
+            self._bytes += size
+            self._evict()
+
+    def _drop(self, key: str) -> None:
+        self._bytes -= self._index.pop(key, 0)
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self) -> None:
+        while self._bytes > self.max_bytes and self._index:
+            self._drop(next(iter(self._index)))
+
+
+class CachedTTS:
+    """Wraps a TTS engine (CoquiXTTS, RemoteTTS, ...) with an AudioCache.
+
+    Short texts are looked up by (text, voice WAV hash, language, model,
+    sample rate); a hit is returned as a single chunk without touching the
+    model. Misses stream through unchanged and are stored once the whole
+    utterance has been synthesized; a stream abandoned halfway (barge-in) is
+    not cached. Everything else is delegated to the wrapped engine.
+    """
+
+    def __init__(self, tts, cache: AudioCache, model_name: str, max_chars: int = 160):
+        self.tts = tts
+        self.cache = cache
+        self.model_name = model_name
+        self.max_chars = max_chars
+        self._voice_hashes: Dict[Tuple[str, int, int], str] = {}
+
+    def __getattr__(self, name):
+        return getattr(self.tts, name)
+
+    def _voice_hash(self, speaker_ref_wav: str) -> str:
+        try:
+            st = os.stat(speaker_ref_wav)
+        except OSError:
+            return os.path.abspath(speaker_ref_wav)
+        stat_key = (os.path.abspath(speaker_ref_wav), st.st_mtime_ns, st.st_size)
+        digest = self._voice_hashes.get(stat_key)
+        if digest is None:
+            digest = file_sha256(speaker_ref_wav)
+            self._voice_hashes[stat_key] = digest
+        return digest
+
+    def _key(self, text: str, speaker_ref_wav: str, language: str) -> Optional[str]:
+        if len(text) > self.max_chars:
+            return None
+        return AudioCache.key(text, self._voice_hash(speaker_ref_wav), language, self.model_name, self.tts.sample_rate)
+
+    def _hit(self, key: Optional[str], text: str) -> Optional[np.ndarray]:
+        if key is None:
+            return None
+        audio = self.cache.get(key)
+        if audio is not None:
+            tracing.mark("tts.cache_hit", chars=len(text))
+            sink = getattr(self.tts, "sink", None)
+            if sink is not None:
+                sink.submit(audio, self.tts.sample_rate)
+        return audio
+
+    def synthesize_stream(self, text: str, speaker_ref_wav: str, language: str = "en", **kwargs) -> Iterator[np.ndarray]:
+        key = self._key(text, speaker_ref_wav, language)
+        audio = self._hit(key, text)
+        if audio is not None:
+            yield audio
+            return
+        chunks = self.tts.synthesize_stream(text, speaker_ref_wav, language, **kwargs)
+        parts = []
+        try:
+            for chunk in chunks:
+                parts.append(chunk)
+                yield chunk
+        finally:
+            chunks.close()
+        if key is not None and parts:
+            # Re-keyed: a remote engine only learns its sample rate from the first chunk.
+            self.cache.put(self._key(text, speaker_ref_wav, language), np.concatenate(parts))
+
+    def synthesize(self, text: str, speaker_ref_wav: str, language: str = "en") -> np.ndarray:
+        key = self._key(text, speaker_ref_wav, language)
+        audio = self._hit(key, text)
+        if audio is None:
+            audio = self.tts.synthesize(text, speaker_ref_wav, language)
+            if key is not None and len(audio):
+                self.cache.put(self._key(text, speaker_ref_wav, language), audio)
+        return audio
@@ -3,10 +3,14 @@ from __future__ import annotations
 import os
 import time
 from dataclasses import dataclass
-from typing import Optional
+from typing import Iterator, Optional
 
 import numpy as np
-import soundfile as sf
+
+from friend_ai import tracing
+
+from .latents import SpeakerLatentCache
+from .sink import WavSink
 
 
 @dataclass
@@ -16,8 +20,22 @@ class TTSResult:
     duration_s: float
 
 
+def _to_float32(wav) -> np.ndarray:
+    if hasattr(wav, "detach"):
+        wav = wav.detach().cpu().numpy()
+    return np.asarray(wav, dtype=np.float32).reshape(-1)
+
+
 class CoquiXTTS:
-    def __init__(self, model_name: str, device: str = "auto", default_sample_rate: int = 22050):
+    def __init__(
+        self,
+        model_name: str,
+        device: str = "auto",
+        default_sample_rate: int = 22050,
+        sink: Optional[WavSink] = None,
+        latent_cache_dir: Optional[str] = None,
+        threads: int = 0,
+    ):
         try:
             from TTS.api import TTS  # type: ignore
         except Exception as exc:  # pragma: no cover - optional dep
@@ -27,8 +45,84 @@ class CoquiXTTS:
             ) from exc
         if device == "auto":
             device = None  # type: ignore
+        if threads > 0:
+            import torch
+
+            torch.set_num_threads(threads)
         self.tts = TTS(model_name=model_name, progress_bar=False, gpu=device == "cuda")
         self.default_sample_rate = default_sample_rate
+        # Optional background writer; when set every synthesized utterance is also saved.
+        self.sink = sink
+        self.latents = SpeakerLatentCache(model_name=model_name, cache_dir=latent_cache_dir)
+
+    @property
+    def sample_rate(self) -> int:
+        synth = getattr(self.tts, "synthesizer", None)
+        return int(getattr(synth, "output_sample_rate", 0) or self.default_sample_rate)
+
+    def _xtts_model(self):
+        synth = getattr(self.tts, "synthesizer", None)
+        model = getattr(synth, "tts_model", None)
+        if model is not None and hasattr(model, "inference_stream"):
+            return model
+        return None
+
+    def warm_voice(self, speaker_ref_wav: str) -> None:
+        model = self._xtts_model()
+        if model is not None and os.path.exists(speaker_ref_wav):
+            self.latents.get(model, speaker_ref_wav)
+
+    def _synthesize(self, text: str, speaker_ref_wav: str, language: str) -> np.ndarray:
+        assert os.path.exists(speaker_ref_wav), f"Missing speaker reference wav: {speaker_ref_wav}"
+        model = self._xtts_model()
+        with tracing.span("tts.synthesize", chars=len(text)):
+            if model is not None:
+                gpt_cond_latent, speaker_embedding = self.latents.get(model, speaker_ref_wav)
+                out = model.inference(text, language, gpt_cond_latent, speaker_embedding)
+                return _to_float32(out["wav"])
+            wav = self.tts.tts(
+                text=text,
+                speaker_wav=speaker_ref_wav,
+                language=language,
+            )
+            return _to_float32(wav)
+
+    def synthesize(self, text: str, speaker_ref_wav: str, language: str = "en") -> np.ndarray:
+        audio = self._synthesize(text, speaker_ref_wav, language)
+        if self.sink is not None:
+            self.sink.submit(audio, self.sample_rate)
+        return audio
+
+    def synthesize_stream(
+        self,
+        text: str,
+        speaker_ref_wav: str,
+        language: str = "en",
+        stream_chunk_size: int = 20,
+    ) -> Iterator[np.ndarray]:
+        model = self._xtts_model()
+        if model is None:
+            yield self.synthesize(text, speaker_ref_wav, language)
+            return
+        assert os.path.exists(speaker_ref_wav), f"Missing speaker reference wav: {speaker_ref_wav}"
+        gpt_cond_latent, speaker_embedding = self.latents.get(model, speaker_ref_wav)
+        tracer = tracing.get_tracer()
+        t0 = time.perf_counter()
+        parts = []
+        for chunk in model.inference_stream(
+            text,
+            language,
+            gpt_cond_latent,
+            speaker_embedding,
+            stream_chunk_size=stream_chunk_size,
+        ):
+            audio = _to_float32(chunk)
+            if not parts:
+                tracer.record("tts.first_chunk", t0, time.perf_counter(), chars=len(text))
+            parts.append(audio)
+            yield audio
+        if self.sink is not None and parts:
+            self.sink.submit(np.concatenate(parts), self.sample_rate)
 
     def synthesize_to_file(
         self,
@@ -38,17 +132,13 @@ class CoquiXTTS:
         output_path: Optional[str] = None,
         sample_rate: Optional[int] = None,
     ) -> TTSResult:
-        assert os.path.exists(speaker_ref_wav), f"Missing speaker reference wav: {speaker_ref_wav}"
-        sample_rate = sample_rate or self.default_sample_rate
-        wav = self.tts.tts(
-            text=text,
-            speaker_wav=speaker_ref_wav,
-            language=language,
-        )
-        audio = np.array(wav, dtype=np.float32)
+        sample_rate = sample_rate or self.sample_rate
+        audio = self._synthesize(text, speaker_ref_wav, language)
         if output_path is None:
             ts = time.strftime("%Y%m%d-%H%M%S")
             output_path = f"output-{ts}.wav"
+        import soundfile as sf
+
         sf.write(output_path, audio, sample_rate)
         duration = len(audio) / float(sample_rate)
-        return TTSResult(audio_path=output_path, sample_rate=sample_rate, duration_s=duration)
\ No newline at end of file
+        return TTSResult(audio_path=output_path, sample_rate=sample_rate, duration_s=duration)
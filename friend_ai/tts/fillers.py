@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import itertools
+import threading
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+
+class FillerClips:
+    """Short backchannel clips ("Mm-hm.", "Let me think.") synthesized once up
+    front, so one can start playing the moment a reply is running late.
+
+    Synthesize through a CachedTTS and the clips come off disk on later runs.
+    """
+
+    def __init__(self, tts, phrases: Sequence[str], speaker_ref_wav: str, language: str = "en"):
+        self.clips: List[Tuple[str, np.ndarray]] = []
+        for phrase in phrases:
+            audio = tts.synthesize(phrase, speaker_ref_wav, language)
+            if len(audio):
+                self.clips.append((phrase, audio))
+        self.sample_rate = tts.sample_rate
+        self._order = itertools.cycle(range(len(self.clips))) if self.clips else None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.clips)
+
+    def next(self) -> Tuple[str, np.ndarray]:
+        """Round-robin, so the same clip never plays twice in a row."""
+        with self._lock:
+            return self.clips[next(self._order)]
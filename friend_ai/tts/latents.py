@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+Latents = Tuple[Any, Any]  # (gpt_cond_latent, speaker_embedding)
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class SpeakerLatentCache:
+    """XTTS conditioning latents per reference WAV, in memory and on disk.
+
+    Entries are keyed by the WAV content hash and the model name, so editing
+    the reference file or switching models never reuses stale latents.
+    """
+
+    def __init__(self, model_name: str, cache_dir: Optional[str] = None):
+        self.model_name = model_name
+        self.cache_dir = cache_dir
+        self._mem: Dict[str, Latents] = {}
+        # (path, mtime_ns, size) -> content hash, so we do not re-hash on every call
+        self._hashes: Dict[Tuple[str, int, int], str] = {}
+        self._lock = threading.Lock()
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def get(self, model, speaker_ref_wav: str) -> Latents:
+        key = self._hash(speaker_ref_wav)
+        latents = self._mem.get(key)
+        if latents is not None:
+            return latents
+        with self._lock:
+            latents = self._mem.get(key)
+            if latents is None:
+                latents = self._load(key, model)
+            if latents is None:
+                latents = model.get_conditioning_latents(audio_path=[speaker_ref_wav])
+                self._save(key, latents)
+            self._mem[key] = latents
+        return latents
+
+    def voice_hash(self, speaker_ref_wav: str) -> str:
+        return self._hash(speaker_ref_wav)
+
+    def _hash(self, path: str) -> str:
+        st = os.stat(path)
+        stat_key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+        digest = self._hashes.get(stat_key)
+        if digest is None:
+            digest = file_sha256(path)
+            self._hashes[stat_key] = digest
+        return digest
+
+    def _path(self, key: str) -> Optional[str]:
+        if not self.cache_dir:
+            return None
+        model = re.sub(r"[^A-Za-z0-9_.-]+", "_", self.model_name)
+        return os.path.join(self.cache_dir, f"{model}-{key[:32]}.pt")
+
+    def _load(self, key: str, model) -> Optional[Latents]:
+        path = self._path(key)
+        if path is None or not os.path.exists(path):
+            return None
+        import torch
+
+        try:
+            data = torch.load(path, map_location="cpu")
+        except Exception:
+            return None
+        if data.get("model_name") != self.model_name or data.get("sha256") != key:
+            return None
+        gpt_cond_latent, speaker_embedding = data["gpt_cond_latent"], data["speaker_embedding"]
+        try:
+            device = next(model.parameters()).device
+        except Exception:
+            return gpt_cond_latent, speaker_embedding
+        return gpt_cond_latent.to(device), speaker_embedding.to(device)
+
+    def _save(self, key: str, latents: Latents) -> None:
+        path = self._path(key)
+        if path is None:
+            return
+        import torch
+
+        gpt_cond_latent, speaker_embedding = latents
+        tmp = f"{path}.tmp-{os.getpid()}"
+        try:
+            torch.save(
+                {
+                    "model_name": self.model_name,
+                    "sha256": key,
+                    "gpt_cond_latent": gpt_cond_latent.detach().cpu(),
+                    "speaker_embedding": speaker_embedding.detach().cpu(),
+                },
+                tmp,
+            )
+            os.replace(tmp, path)
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
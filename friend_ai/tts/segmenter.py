@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import re
+from typing import Iterable, Iterator, List, Optional
+
+_SENTENCE_END = re.compile(r"[.!?…]+[\"')\]]*\s")
+_CLAUSE_END = re.compile(r"[,;:—]\s")
+_ABBREVIATIONS = {"mr.", "mrs.", "ms.", "dr.", "st.", "vs.", "e.g.", "i.e.", "etc."}
+
+
+class SentenceSegmenter:
+    """Splits a token stream into speakable sentence/clause chunks.
+
+    The first chunk is cut eagerly at clause boundaries so TTS can start as
+    soon as possible; later chunks prefer full sentences.
+    """
+
+    def __init__(self, first_clause_chars: int = 24, clause_chars: int = 80, max_chars: int = 240):
+        self.first_clause_chars = first_clause_chars
+        self.clause_chars = clause_chars
+        self.max_chars = max_chars
+        self._buf = ""
+        self._emitted = 0
+
+    def feed(self, token: str) -> List[str]:
+        self._buf += token
+        out: List[str] = []
+        while True:
+            cut = self._find_cut()
+            if cut is None:
+                break
+            chunk = self._buf[:cut].strip()
+            self._buf = self._buf[cut:]
+            if chunk:
+                out.append(chunk)
+                self._emitted += 1
+        return out
+
+    def flush(self) -> Optional[str]:
+        chunk = self._buf.strip()
+        self._buf = ""
+        if not chunk:
+            return None
+        self._emitted += 1
+        return chunk
+
+    def _find_cut(self) -> Optional[int]:
+        for m in _SENTENCE_END.finditer(self._buf):
+            word = self._buf[: m.start() + 1].rsplit(None, 1)[-1].lower()
+            if word in _ABBREVIATIONS:
+                continue
+            return m.end()
+        min_clause = self.first_clause_chars if self._emitted == 0 else self.clause_chars
+        for m in _CLAUSE_END.finditer(self._buf):
+            if m.end() >= min_clause:
+                return m.end()
+        if len(self._buf) >= self.max_chars:
+            # No punctuation in sight; fall back to the last word boundary.
+            space = self._buf.rfind(" ", 0, self.max_chars)
+            return space + 1 if space > 0 else self.max_chars
+        return None
+
+
+def segment_stream(tokens: Iterable[str], segmenter: Optional[SentenceSegmenter] = None) -> Iterator[str]:
+    segmenter = segmenter or SentenceSegmenter()
+    for token in tokens:
+        yield from segmenter.feed(token)
+    tail = segmenter.flush()
+    if tail:
+        yield tail
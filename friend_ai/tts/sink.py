@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import itertools
+import os
+import queue
+import threading
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+class WavSink:
+    """Writes synthesized audio to disk on a background thread.
+
+    Synthesis never waits on the disk; if the queue is full the clip is
+    dropped and counted in `dropped`.
+    """
+
+    def __init__(self, out_dir: str, prefix: str = "tts", max_pending: int = 32):
+        self.out_dir = out_dir
+        self.prefix = prefix
+        self.dropped = 0
+        os.makedirs(self.out_dir, exist_ok=True)
+        self._q: "queue.Queue[Optional[Tuple[str, np.ndarray, int]]]" = queue.Queue(maxsize=max_pending)
+        self._seq = itertools.count()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, audio: np.ndarray, sample_rate: int, path: Optional[str] = None) -> Optional[str]:
+        if path is None:
+            ts = time.strftime("%Y%m%d-%H%M%S")
+            path = os.path.join(self.out_dir, f"{self.prefix}-{ts}-{next(self._seq):04d}.wav")
+        try:
+            self._q.put_nowait((path, audio, sample_rate))
+        except queue.Full:
+            self.dropped += 1
+            return None
+        return path
+
+    def flush(self) -> None:
+        self._q.join()
+
+    def close(self) -> None:
+        self._q.put(None)
+        self._thread.join(timeout=5.0)
+
+    def _run(self) -> None:
+        import soundfile as sf
+
+        while True:
+            item = self._q.get()
+            try:
+                if item is None:
+                    return
+                path, audio, sample_rate = item
+                try:
+                    sf.write(path, audio, sample_rate)
+                except Exception:
+                    self.dropped += 1
+            finally:
+                self._q.task_done()